@@ -0,0 +1,59 @@
+"""
+Apex Cloud Mining — Versioned read-through cache
+
+Some rows (mining tiers, payment settings, exchange rate) are read on almost
+every request but written a few times a year. A VersionedCache keeps the
+loaded value per process and in the shared Django cache (Redis in production)
+under a versioned key. Writers call invalidate(), which bumps the version
+counter, so every process reloads on its next read without Postgres being
+touched in between.
+"""
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+_MISSING = object()
+
+
+class VersionedCache:
+    """Process-local + shared cache for one value built by `loader()`."""
+
+    def __init__(self, namespace, loader, timeout=60 * 60):
+        self.namespace = namespace
+        self.loader = loader
+        self.timeout = timeout
+        self._version_key = f'{namespace}:version'
+        self._local = None  # (version, value)
+
+    def version(self):
+        version = cache.get(self._version_key)
+        if version is None:
+            # Seed from the clock so a lost counter never reuses an old version
+            cache.add(self._version_key, time.time_ns(), timeout=None)
+            version = cache.get(self._version_key)
+        return version
+
+    def get(self):
+        version = self.version()
+        local = self._local
+        if local is not None and local[0] == version:
+            return local[1]
+
+        key = f'{self.namespace}:{version}'
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.loader()
+            cache.set(key, value, self.timeout)
+        self._local = (version, value)
+        return value
+
+    def invalidate(self):
+        """Bump the version once the current transaction commits."""
+        transaction.on_commit(self._bump)
+
+    def _bump(self):
+        try:
+            cache.incr(self._version_key)
+        except ValueError:
+            cache.set(self._version_key, time.time_ns(), timeout=None)
+        self._local = None
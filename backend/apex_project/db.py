@@ -0,0 +1,76 @@
+"""
+Apex Cloud Mining — Query helpers the ORM does not provide
+"""
+from django.db import connections
+from django.db.models import Case, Value, When
+from django.db.models.expressions import Col
+from django.db.models.sql import UpdateQuery
+
+
+def case_map(field, mapping, output_field, default=None):
+    """`CASE field WHEN key THEN value ... END` for every item of `mapping`.
+
+    Gives each row its own value in a single UPDATE, e.g.
+    `update(balance=F('balance') + case_map('pk', {user_id: amount}, DecimalField()))`.
+    """
+    return Case(
+        *[When(**{field: key}, then=Value(value)) for key, value in mapping.items()],
+        default=Value(default), output_field=output_field,
+    )
+
+
+def update_returning(queryset, returning, **values):
+    """`queryset.update(**values)` that also returns the updated rows.
+
+    Compiles the ORM UPDATE (so F() expressions, lookups and parameter
+    adaptation all behave as usual) and appends `RETURNING`, which both
+    PostgreSQL and SQLite 3.35+ support. Returns one dict of the `returning`
+    fields per updated row, converted to Python values like a normal query.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    sql, params = query.get_compiler(queryset.db).as_sql()
+
+    fields = [model._meta.get_field(name) for name in returning]
+    sql += ' RETURNING ' + ', '.join(connection.ops.quote_name(field.column) for field in fields)
+
+    columns = []
+    for field in fields:
+        col = Col(model._meta.db_table, field)
+        columns.append((col, connection.ops.get_db_converters(col) + field.get_db_converters(connection)))
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    results = []
+    for row in rows:
+        result = {}
+        for field, (col, converters), value in zip(fields, columns, row):
+            for converter in converters:
+                value = converter(value, col, connection)
+            result[field.name] = value
+        results.append(result)
+    return results
+
+
+def for_serializer(queryset, serializer_class):
+    """`queryset` narrowed to the columns `serializer_class` renders.
+
+    Dotted sources (`source='user.email'`) become select_related() joins that
+    load only the named columns, so a page of N rows is one query rather than
+    N + 1, and never drags the related row's other columns along.
+    """
+    related, columns = set(), []
+    for field in serializer_class().fields.values():
+        if field.source == '*':
+            continue
+        path = field.source.split('.')
+        columns.append('__'.join(path))
+        if len(path) > 1:
+            related.add('__'.join(path[:-1]))
+    if related:
+        queryset = queryset.select_related(*sorted(related))
+    return queryset.only(*columns)
@@ -230,6 +230,22 @@ else:
     MEDIA_URL = '/media/'
     MEDIA_ROOT = BASE_DIR / 'media'
 
+# Cache — Redis when REDIS_URL is configured so every gunicorn and Celery
+# process shares it; per-process memory for local development otherwise.
+if env('REDIS_URL', default=None):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': env('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Celery
 CELERY_BROKER_URL = env('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = env('REDIS_URL', default='redis://localhost:6379/0')
@@ -252,11 +268,21 @@ APEX_MIN_WITHDRAWAL_USDT = 10.0
 APEX_REFERRAL_COMMISSION_PCT = 10.0  # 10%
 APEX_USD_TO_NGN_RATE = 1450.0
 APEX_USD_TO_GHS_RATE = 15.5
+APEX_PAYOUT_CHUNK_SIZE = env.int('APEX_PAYOUT_CHUNK_SIZE', default=5000)  # users credited per payout transaction
+APEX_PAYOUT_SHARDS = env.int('APEX_PAYOUT_SHARDS', default=4)  # user-id ranges paid in parallel by Celery workers
+APEX_EXPIRY_BATCH_SIZE = env.int('APEX_EXPIRY_BATCH_SIZE', default=1000)  # plans downgraded per expiry-sweep transaction
+APEX_REVIEW_MAX_ITEMS = env.int('APEX_REVIEW_MAX_ITEMS', default=2000)  # ids per bulk approve/reject request
 
 # Paystack Settings (for account verification in Nigeria)
 # Set PAYSTACK_SECRET_KEY in .env to enable real account verification
 # For testing/development, realistic mock names are generated automatically
 PAYSTACK_SECRET_KEY = env('PAYSTACK_SECRET_KEY', default=None)
+# Lookups go through apps.payments.paystack: pooled connections, a circuit
+# breaker and a shared cache of resolved names. APEX_PAYSTACK_BACKEND picks a
+# backend explicitly, e.g. apps.payments.paystack.FakeBackend in tests.
+APEX_PAYSTACK_BACKEND = env('APEX_PAYSTACK_BACKEND', default=None)
+APEX_PAYSTACK_TIMEOUT = env.float('APEX_PAYSTACK_TIMEOUT', default=3.0)  # seconds per resolve call
+APEX_PAYSTACK_CACHE_TTL = env.int('APEX_PAYSTACK_CACHE_TTL', default=24 * 60 * 60)  # seconds a resolved name is reused
 
 # Resend Email Settings
 # Using onboarding@resend.dev works immediately (no domain verification needed)
@@ -266,6 +292,13 @@ PAYSTACK_SECRET_KEY = env('PAYSTACK_SECRET_KEY', default=None)
 #   3. Then set EMAIL_FROM=Apex Mining <noreply@apxcloudmine.com> in Render env vars
 RESEND_API_KEY = env('RESEND_API_KEY', default=None)
 EMAIL_FROM = env('EMAIL_FROM', default='Apex Mining <onboarding@resend.dev>')
+# Emails are queued in the outbox and sent by the deliver_email_outbox task.
+# APEX_EMAIL_TRANSPORT picks the transport explicitly, e.g.
+# apps.users.mailer.FakeTransport for local runs; by default Resend is used
+# when RESEND_API_KEY is set and the server log otherwise.
+APEX_EMAIL_TRANSPORT = env('APEX_EMAIL_TRANSPORT', default=None)
+APEX_EMAIL_BATCH_SIZE = env.int('APEX_EMAIL_BATCH_SIZE', default=50)  # messages per provider call (Resend allows 100)
+APEX_EMAIL_MAX_ATTEMPTS = env.int('APEX_EMAIL_MAX_ATTEMPTS', default=6)  # sends before a message is marked failed
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LANGUAGE_CODE = 'en-us'
@@ -0,0 +1,26 @@
+"""
+Apex Cloud Mining — Shared test helpers
+"""
+from django.db import connections
+
+
+def query_plan(queryset):
+    """The database's plan for `queryset` as text.
+
+    On PostgreSQL sequential scans are disabled for the current transaction
+    first, so tiny test tables still show which index the planner would pick
+    once the table is large.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return queryset.explain()
+
+
+class QueryPlanMixin:
+    """TestCase mixin for asserting which index backs a query."""
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = query_plan(queryset)
+        self.assertIn(index_name, plan, f'{index_name} not used:\n{plan}')
@@ -0,0 +1,408 @@
+"""
+Apex Cloud Mining — Per-endpoint query budgets
+
+Seeds a realistic dataset once (users on every plan, a deep referral tree,
+thousands of earnings, deposits and withdrawals) and calls every route through
+the DRF test client. Each call is measured (query count, total SQL time, wall
+time) and fails if it runs more queries than its declared budget, so an N+1
+in a list view shows up here instead of in production.
+
+Every call runs against a cleared cache (the cold, worst case) inside its own
+rolled-back transaction. A route added to a urls.py without a budget below
+fails test_every_route_has_a_budget.
+
+Set QUERY_BUDGET_REPORT=<path> (or '-' for stderr) to dump the measurements.
+"""
+import json
+import os
+import sys
+import time
+from datetime import timedelta
+from decimal import Decimal
+from typing import NamedTuple
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, resolve, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.admin_panel import rollups, stats as admin_stats
+from apps.mining.models import MiningEarning, UserMiningSession
+from apps.payments import ledger
+from apps.payments.models import Deposit, Withdrawal, WithdrawalFeePayment
+from apps.referrals import closure
+from apps.referrals.models import AdminCommissionSummary, ReferralClosure, ReferralCommission
+from apps.users.models import (
+    AdminInvitation, AuditLog, EmailVerificationCode, Notification, PasswordResetCode, User,
+)
+
+PASSWORD = 'Budget-Pass-123'
+CHAIN_DEPTH = 40        # referral chain below the agent
+CHAIN_FANOUT = 3        # leaf referrals hanging off every chain node
+MEMBER_REFERRALS = 25   # extra direct referrals of the member under test
+MEMBER_EARNINGS = 1500
+MEMBER_DEPOSITS = 200
+MEMBER_WITHDRAWALS = 200
+EARNINGS_PER_USER = 10
+DEPOSITS_PER_USER = 4
+WITHDRAWALS_PER_USER = 4
+BULK_REVIEW_ITEMS = 40  # ids per bulk approve/reject call
+
+
+class Route(NamedTuple):
+    method: str
+    path: str            # formatted with the fixture ids, e.g. '{pending_deposit}'
+    user: str | None     # fixture user to authenticate as (None = anonymous)
+    budget: int          # maximum number of queries
+    data: dict | None = None
+    status: tuple = (200,)
+
+
+# Budgets are the query counts measured against the dataset below, known N+1s
+# included. Lower a budget when a view gets cheaper; never raise one to make
+# the test pass without understanding why the view got more expensive.
+ROUTES = [
+    # --- Auth -------------------------------------------------------------
+    Route('post', '/api/v1/auth/token/', None, 2, {'email': 'member@budget.test', 'password': PASSWORD}),
+    Route('post', '/api/v1/auth/token/refresh/', None, 6, {'refresh': '{member_refresh}'}),
+    # Codes are queued in the email outbox: UPDATE, then a savepointed INSERT
+    Route('post', '/api/v1/auth/register/', None, 11,
+          {'email': 'fresh@budget.test', 'password': PASSWORD, 'confirm_password': PASSWORD,
+           'full_name': 'Fresh Signup', 'phone': '08012345678', 'referral_code': '{member_code}'}, (201,)),
+    Route('post', '/api/v1/auth/login/', None, 2, {'email': 'member@budget.test', 'password': PASSWORD}),
+    Route('post', '/api/v1/auth/verify-email/', None, 16, {'email': 'unverified@budget.test', 'code': '424242'}),
+    Route('post', '/api/v1/auth/resend-verification/', None, 7, {'email': 'unverified@budget.test'}, (200, 503)),
+    Route('post', '/api/v1/auth/request-password-reset/', None, 7, {'email': 'member@budget.test'}, (200, 503)),
+    Route('post', '/api/v1/auth/confirm-password-reset/', None, 4,
+          {'email': 'member@budget.test', 'code': '135790', 'new_password': 'Another-Pass-456'}),
+
+    # --- Account ----------------------------------------------------------
+    Route('get', '/api/v1/auth/me/', 'member', 1),
+    Route('get', '/api/v1/auth/dashboard/', 'member', 2),
+    Route('post', '/api/v1/auth/bind-wallet/', 'member', 2, {'trc20_wallet': 'T' + 'A' * 33}),
+    Route('post', '/api/v1/auth/change-password/', 'member', 2,
+          {'old_password': PASSWORD, 'new_password': 'Another-Pass-456'}),
+    Route('post', '/api/v1/auth/mark-telegram-joined/', 'member', 2),
+    # Own notifications and broadcasts are read separately, each over its index
+    Route('get', '/api/v1/auth/notifications/', 'member', 3),
+    Route('post', '/api/v1/auth/notifications/{notification}/read/', 'member', 2),
+    Route('get', '/api/v1/auth/agent-payment-info/', 'member', 6),
+    Route('post', '/api/v1/auth/admin/apply/', 'payer', 5, {'invite_token': '{invite}'}),
+    Route('get', '/api/v1/auth/admin/invites/', 'super', 2),
+    Route('post', '/api/v1/auth/admin/invites/create/', 'super', 2, {'days_valid': 7}, (200, 201)),
+
+    # --- Mining -----------------------------------------------------------
+    Route('post', '/api/v1/mining/mine/', 'payer', 7),
+    Route('get', '/api/v1/mining/status/', 'member', 2),
+    Route('get', '/api/v1/mining/earnings/', 'member', 2),
+    Route('get', '/api/v1/mining/tiers/', 'member', 2),
+
+    # --- Payments ---------------------------------------------------------
+    Route('post', '/api/v1/payments/deposit/', 'member', 2,
+          {'tier_target': 3, 'amount_usd': '100', 'method': 'crypto', 'tx_hash': 'abc'}, (201,)),
+    Route('post', '/api/v1/payments/withdraw/', 'member', 3,
+          {'amount_usdt': '120', 'method': 'crypto', 'wallet_address': 'T' + 'B' * 33}, (201,)),
+    Route('post', '/api/v1/payments/withdraw-referral/', 'member', 1, status=(400,)),
+    Route('post', '/api/v1/payments/transfer-referral-to-main/', 'member', 6, {'amount_usdt': '10'}),
+    Route('get', '/api/v1/payments/withdrawal-status/{member_withdrawal_tx}/', 'member', 2),
+    Route('get', '/api/v1/payments/withdrawal-limits/', 'member', 1),
+    Route('get', '/api/v1/payments/withdrawal-fees/', None, 1),
+    Route('get', '/api/v1/payments/settings/', 'member', 6),
+    Route('post', '/api/v1/payments/settings/update/', 'super', 6, {'support_url': 'https://t.me/apex'}),
+    Route('post', '/api/v1/payments/pay-withdrawal-fee/', 'payer', 3, {'method': 'crypto'}, (201,)),
+    Route('post', '/api/v1/payments/verify-account/', 'member', 1, {'account_number': '0123456789', 'bank_code': '058'}),
+    Route('get', '/api/v1/payments/banks/', None, 0),
+    Route('get', '/api/v1/payments/transactions/', 'member', 4),
+    Route('get', '/api/v1/payments/exchange-rate/', None, 1),
+
+    # --- Referrals --------------------------------------------------------
+    Route('get', '/api/v1/referrals/', 'member', 6),
+
+    # --- Admin panel ------------------------------------------------------
+    Route('get', '/api/v1/admin/stats/', 'super', 2),
+    Route('get', '/api/v1/admin/stats/', 'admin', 2),
+    Route('get', '/api/v1/admin/users/', 'super', 3),
+    Route('get', '/api/v1/admin/users/', 'admin', 3),
+    Route('get', '/api/v1/admin/users/{member_id}/', 'admin', 2),
+    Route('patch', '/api/v1/admin/users/{member_id}/', 'super', 7, {'full_name': 'Renamed Member'}),
+    Route('post', '/api/v1/admin/users/{member_id}/toggle/', 'admin', 6),
+    Route('get', '/api/v1/admin/deposits/', 'super', 3),
+    Route('get', '/api/v1/admin/deposits/', 'admin', 3),
+    # Single-item review goes through the review service, like the bulk calls:
+    # plan, session, commission, stats and notifications included
+    Route('post', '/api/v1/admin/deposits/{pending_deposit}/approve/', 'admin', 22),
+    Route('post', '/api/v1/admin/deposits/{pending_deposit}/reject/', 'admin', 10),
+    Route('get', '/api/v1/admin/withdrawals/', 'super', 3),
+    Route('get', '/api/v1/admin/withdrawals/', 'admin', 3),
+    Route('post', '/api/v1/admin/withdrawals/{pending_withdrawal}/approve/', 'admin', 16),
+    Route('post', '/api/v1/admin/withdrawals/{pending_withdrawal}/reject/', 'admin', 11),
+    # Bulk review: the count follows the distinct plans in the batch, not its size
+    Route('post', '/api/v1/admin/deposits/bulk/', 'admin', 26, {'action': 'approve', 'ids': '{bulk_deposits}'}),
+    Route('post', '/api/v1/admin/deposits/bulk/', 'super', 9, {'action': 'reject', 'ids': '{bulk_deposits}'}),
+    Route('post', '/api/v1/admin/withdrawals/bulk/', 'admin', 16, {'action': 'approve', 'ids': '{bulk_withdrawals}'}),
+    Route('post', '/api/v1/admin/withdrawals/bulk/', 'admin', 11, {'action': 'reject', 'ids': '{bulk_withdrawals}'}),
+    Route('post', '/api/v1/admin/fees/bulk/', 'admin', 11, {'action': 'approve', 'ids': '{bulk_fees}'}),
+    Route('get', '/api/v1/admin/tiers/', 'admin', 3),
+    Route('get', '/api/v1/admin/tiers/{tier}/', 'super', 2),
+    Route('get', '/api/v1/admin/exchange-rate/', 'super', 5),
+    Route('get', '/api/v1/admin/otp-lookup/?email=unverified@budget.test', 'super', 4),
+    Route('get', '/api/v1/admin/pending-admins/', 'super', 3),
+    Route('post', '/api/v1/admin/approve-admin/{applicant}/', 'super', 8),
+    Route('post', '/api/v1/admin/reject-admin/{applicant}/', 'super', 6),
+    # The admin stats signals make the delete collect deposits and withdrawals
+    Route('delete', '/api/v1/admin/delete-admin/{applicant}/', 'super', 36),
+    Route('get', '/api/v1/admin/commissions/', 'super', 4),
+    Route('get', '/api/v1/admin/analytics/volume/deposit/?interval=week&group_by=status', 'super', 2),
+    Route('get', '/api/v1/admin/analytics/volume/earning/?interval=month', 'super', 2),
+    Route('get', '/api/v1/admin/audit-log/', 'super', 3),
+    Route('get', '/api/v1/admin/broadcasts/', 'super', 2),
+    Route('post', '/api/v1/admin/broadcasts/', 'super', 2, {'title': 'Maintenance', 'message': 'Back in an hour.'}, (201,)),
+
+    # --- Docs / media -----------------------------------------------------
+    Route('get', '/api/schema/', None, 0),
+    Route('get', '/api/docs/', None, 0),
+    Route('get', '/media/missing.png', None, 0, status=(404,)),
+]
+
+# Served by django.contrib.admin (budgeted by CHANGELISTS below) — not API routes
+UNBUDGETED_PREFIXES = ('django-admin/',)
+
+# Django admin changelists whose columns reach through a foreign key, opened
+# as the superuser: (app_label, model_name, query budget). The counts include
+# the session/user lookups and the paginator's COUNTs.
+CHANGELISTS = [
+    ('payments', 'deposit', 7),
+    ('payments', 'referraldeposit', 7),
+    ('payments', 'withdrawal', 6),
+    ('payments', 'referralwithdrawal', 6),
+    ('payments', 'withdrawalfeepayment', 7),
+    ('payments', 'exchangerate', 6),
+    ('mining', 'userminingsession', 7),
+    ('mining', 'miningearning', 7),
+    ('referrals', 'referralcommission', 7),
+    ('users', 'notification', 6),
+]
+
+_results = []
+
+
+def _route_patterns(resolver=None, prefix=''):
+    """Every concrete route string in the URLconf, e.g. 'api/v1/mining/mine/'."""
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from _route_patterns(pattern, route)
+        elif isinstance(pattern, URLPattern):
+            yield route
+
+
+@override_settings(PAYSTACK_SECRET_KEY=None, RESEND_API_KEY=None)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        password = make_password(PASSWORD)
+        users = []
+
+        def user(email, referrer=None, tier=1, **fields):
+            obj = User(
+                email=email, full_name=email.split('@')[0].title(), password=password,
+                referral_code=f'B{len(users):07d}', referred_by=referrer, is_verified=True,
+                tier=tier, tier_expiry=now + timedelta(days=30) if tier > 1 else None, **fields,
+            )
+            users.append(obj)
+            return obj
+
+        cls.super = user('super@budget.test', is_superuser=True, is_staff=True)
+        cls.admin = user('admin@budget.test', cls.super, is_admin=True, is_staff=True, admin_status='approved')
+        agent = user('agent@budget.test', cls.admin, is_agent=True, is_staff=True,
+                     agent_wallet_usdt='T' + 'C' * 33, agent_bank_name='Budget Bank')
+
+        chain = []
+        parent = agent
+        for depth in range(CHAIN_DEPTH):
+            parent = user(f'chain{depth}@budget.test', parent, tier=depth % 5 + 1)
+            chain.append(parent)
+            for leaf in range(CHAIN_FANOUT):
+                user(f'leaf{depth}-{leaf}@budget.test', parent, tier=(depth + leaf) % 5 + 1)
+
+        cls.member = user('member@budget.test', chain[CHAIN_DEPTH // 2 - 1], tier=3, withdrawal_fee_paid=True)
+        referrals = [user(f'ref{i}@budget.test', cls.member, tier=i % 5 + 1) for i in range(MEMBER_REFERRALS)]
+        cls.payer = user('payer@budget.test', cls.member, tier=2)
+        cls.unverified = user('unverified@budget.test', cls.member)
+        cls.unverified.is_verified = False
+        cls.applicant = user('applicant@budget.test', cls.admin, admin_status='pending')
+
+        User.objects.bulk_create(users)
+        closure.build_closure(User, ReferralClosure)
+        closure.recompute_nearest_agent()
+
+        everyone = [u.pk for u in users]
+        ledger.credit_many(ledger.Kind.OPENING_BALANCE, Decimal('500'), everyone)
+        ledger.credit_many(ledger.Kind.OPENING_BALANCE, Decimal('50'), [cls.member.pk], account=ledger.Account.REFERRAL)
+
+        UserMiningSession.objects.bulk_create(
+            UserMiningSession(user=u, tier=u.tier, expires_at=u.tier_expiry) for u in users if u.tier > 1
+        )
+        earnings = [MiningEarning(user=cls.member, tier=3, amount_usdt=Decimal('4.5')) for _ in range(MEMBER_EARNINGS)]
+        deposits = [
+            Deposit(user=cls.member, tier_target=3, amount_usd=Decimal('100'), method='crypto',
+                    status=('approved', 'rejected', 'pending')[i % 3])
+            for i in range(MEMBER_DEPOSITS)
+        ]
+        withdrawals = [
+            Withdrawal(user=cls.member, amount_usdt=Decimal('100'), transaction_id=f'WD-M{i:06d}',
+                       status=('approved', 'rejected', 'pending')[i % 3])
+            for i in range(MEMBER_WITHDRAWALS)
+        ]
+        for n, u in enumerate(users):
+            earnings += [MiningEarning(user=u, tier=u.tier, amount_usdt=Decimal('1')) for _ in range(EARNINGS_PER_USER)]
+            deposits += [
+                Deposit(user=u, tier_target=u.tier % 5 + 1, amount_usd=Decimal('50'), method='bank',
+                        status=('pending', 'approved')[i % 2])
+                for i in range(DEPOSITS_PER_USER)
+            ]
+            withdrawals += [
+                Withdrawal(user=u, amount_usdt=Decimal('100'), method='bank', bank_name='Budget Bank',
+                           transaction_id=f'WD-{n:04d}{i:02d}', status=('pending', 'approved')[i % 2])
+                for i in range(WITHDRAWALS_PER_USER)
+            ]
+        MiningEarning.objects.bulk_create(earnings, batch_size=1000)
+        Deposit.objects.bulk_create(deposits, batch_size=1000)
+        Withdrawal.objects.bulk_create(withdrawals, batch_size=1000)
+        WithdrawalFeePayment.objects.bulk_create(
+            WithdrawalFeePayment(user=cls.member, tier=3, fee_amount_usd=Decimal('10'), method='crypto')
+            for _ in range(20)
+        )
+
+        member_deposits = [d for d in deposits if d.user_id == cls.member.pk]
+        ReferralCommission.objects.bulk_create(
+            ReferralCommission(referrer=cls.member, referee=referrals[i % MEMBER_REFERRALS],
+                               deposit=member_deposits[i], tier=3, amount_usdt=Decimal('10'))
+            for i in range(80)
+        )
+        AdminCommissionSummary.objects.bulk_create([
+            AdminCommissionSummary(admin=cls.super, total_earned=Decimal('1000'), total_referrals=2),
+            AdminCommissionSummary(admin=cls.admin, total_earned=Decimal('800'), total_referrals=2),
+        ])
+        Notification.objects.bulk_create(
+            Notification(user=cls.member, title=f'Notice {i}', message='Budget notice') for i in range(60)
+        )
+        for i in range(30):
+            AuditLog.log(actor=cls.super, action='settings_changed', detail=f'Budget change {i}')
+
+        EmailVerificationCode.objects.create(user=cls.unverified, code='424242')
+        PasswordResetCode.objects.create(user=cls.member, code='135790')
+        invite = AdminInvitation.objects.create(created_by=cls.super, expires_at=now + timedelta(days=7))
+        admin_stats.reconcile()
+        rollups.refresh(now=now + timedelta(minutes=10))
+
+        pending_deposit = Deposit.objects.filter(user__referred_by=chain[-1], status='pending').first()
+        pending_withdrawal = Withdrawal.objects.filter(user__referred_by=chain[-1], status='pending').first()
+        queued = dict(status='pending', user__email__startswith='leaf')
+        cls.tokens = {name: RefreshToken.for_user(getattr(cls, name)) for name in ('super', 'admin', 'member', 'payer')}
+        cls.ids = {
+            'member_id': cls.member.pk,
+            'member_code': cls.member.referral_code,
+            'member_refresh': str(cls.tokens['member']),
+            'member_withdrawal_tx': 'WD-M000000',
+            'notification': Notification.objects.filter(user=cls.member).values_list('pk', flat=True)[0],
+            'pending_deposit': pending_deposit.pk,
+            'pending_withdrawal': pending_withdrawal.pk,
+            'bulk_deposits': [str(pk) for pk in Deposit.objects.filter(**queued).values_list('pk', flat=True)[:BULK_REVIEW_ITEMS]],
+            'bulk_withdrawals': [str(pk) for pk in Withdrawal.objects.filter(**queued).values_list('pk', flat=True)[:BULK_REVIEW_ITEMS]],
+            'bulk_fees': [str(pk) for pk in WithdrawalFeePayment.objects.values_list('pk', flat=True)],
+            'applicant': cls.applicant.pk,
+            'invite': invite.token,
+            'tier': 3,
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        target = os.environ.get('QUERY_BUDGET_REPORT')
+        if not target or not _results:
+            return
+        if target == '-':
+            sys.stderr.write('\n{:<7} {:<58} {:<7} {:>7} {:>9} {:>9}\n'.format(
+                'method', 'path', 'user', 'queries', 'sql ms', 'wall ms'))
+            for row in _results:
+                sys.stderr.write('{method:<7} {path:<58} {user:<7} {queries:>3}/{budget:<3} '
+                                 '{sql_ms:>9.1f} {wall_ms:>9.1f}\n'.format(**row))
+        else:
+            with open(target, 'w') as fh:
+                json.dump(_results, fh, indent=2)
+
+    def _format(self, value):
+        if isinstance(value, str):
+            name = value[1:-1]
+            if value == f'{{{name}}}' and isinstance(self.ids.get(name), list):
+                return self.ids[name]  # a list fixture, e.g. the ids of a bulk call
+            return value.format(**self.ids)
+        if isinstance(value, dict):
+            return {key: self._format(item) for key, item in value.items()}
+        return value
+
+    def _call(self, route):
+        client = APIClient()
+        if route.user:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens[route.user].access_token}')
+        path = self._format(route.path)
+        cache.clear()
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(client, route.method)(path, self._format(route.data), format='json')
+                wall = time.perf_counter() - started
+            transaction.set_rollback(True)
+
+        sql = sum(float(query['time']) for query in queries.captured_queries)
+        _results.append({
+            'method': route.method.upper(), 'path': route.path, 'user': route.user or 'anon',
+            'status': response.status_code, 'queries': len(queries), 'budget': route.budget,
+            'sql_ms': sql * 1000, 'wall_ms': wall * 1000,
+        })
+        return response, queries
+
+    def test_every_route_has_a_budget(self):
+        budgeted = {resolve(self._format(route.path).split('?')[0]).route for route in ROUTES}
+        missing = [
+            route for route in _route_patterns()
+            if route not in budgeted and not route.startswith(UNBUDGETED_PREFIXES)
+        ]
+        self.assertEqual(missing, [], 'Add a Route (with a query budget) for every new endpoint')
+
+    def test_changelist_budgets(self):
+        self.client.force_login(self.super)
+        for app_label, model_name, budget in CHANGELISTS:
+            with self.subTest(changelist=f'{app_label}.{model_name}'):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(reverse(f'admin:{app_label}_{model_name}_changelist'))
+                self.assertEqual(response.status_code, 200)
+                _results.append({
+                    'method': 'GET', 'path': f'admin:{app_label}_{model_name}_changelist', 'user': 'super',
+                    'status': response.status_code, 'queries': len(queries), 'budget': budget,
+                    'sql_ms': sum(float(query['time']) for query in queries.captured_queries) * 1000, 'wall_ms': 0,
+                })
+                self.assertLessEqual(
+                    len(queries), budget,
+                    f'{len(queries)} queries (budget {budget}):\n'
+                    + '\n'.join(query['sql'] for query in queries.captured_queries),
+                )
+
+    def test_query_budgets(self):
+        for route in ROUTES:
+            with self.subTest(route=f'{route.method.upper()} {route.path} as {route.user or "anon"}'):
+                response, queries = self._call(route)
+                self.assertIn(response.status_code, route.status, getattr(response, 'data', response))
+                self.assertLessEqual(
+                    len(queries), route.budget,
+                    f'{len(queries)} queries (budget {route.budget}):\n'
+                    + '\n'.join(query['sql'] for query in queries.captured_queries),
+                )
@@ -0,0 +1,36 @@
+"""
+Rebuild the DailyVolume rollups from deposits, withdrawals and mining earnings.
+
+    python manage.py backfill_daily_volume                          # every source, full history
+    python manage.py backfill_daily_volume --source earning --since 2025-01-01
+
+Days are aggregated --chunk-days at a time over the time-column indexes.
+Each source's watermark moves to the cutoff, so refresh_daily_volume
+carries on from there without counting anything twice.
+"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from apps.admin_panel import rollups
+from apps.admin_panel.models import DailyVolume
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailyVolume rollups behind the admin volume charts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=DailyVolume.Source.values, action='append',
+                            help='Source to rebuild (repeatable; default: all)')
+        parser.add_argument('--since', help='First day to rebuild (YYYY-MM-DD); default: the oldest row')
+        parser.add_argument('--chunk-days', type=int, default=rollups.BACKFILL_CHUNK_DAYS)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format.')
+
+        for source in options['source'] or DailyVolume.Source.values:
+            days = rollups.backfill(source, since, options['chunk_days'], log=self.stdout.write)
+            self.stdout.write(self.style.SUCCESS(f'{source}: {days} day(s) rebuilt'))
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.9 on 2026-10-17 18:29
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminScopeStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=32)),
+                ('value', models.DecimalField(decimal_places=8, default=Decimal('0'), max_digits=24)),
+                ('scope', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Admin Scope Stat',
+                'verbose_name_plural': 'Admin Scope Stats',
+                'db_table': 'admin_scope_stats',
+                'constraints': [models.UniqueConstraint(fields=('scope', 'key'), name='admin_stat_scope_key_uniq'), models.UniqueConstraint(condition=models.Q(('scope__isnull', True)), fields=('key',), name='admin_stat_platform_key_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.9 on 2026-10-17 18:33
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0001_admin_scope_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('source', models.CharField(choices=[('deposit', 'Deposits'), ('withdrawal', 'Withdrawals'), ('earning', 'Mining Earnings')], max_length=10, primary_key=True, serialize=False)),
+                ('synced_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'rollup_watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyVolume',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('deposit', 'Deposits'), ('withdrawal', 'Withdrawals'), ('earning', 'Mining Earnings')], max_length=10)),
+                ('day', models.DateField()),
+                ('tier', models.PositiveSmallIntegerField(default=0)),
+                ('method', models.CharField(blank=True, max_length=20)),
+                ('status', models.CharField(blank=True, max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('amount_usd', models.DecimalField(decimal_places=8, default=Decimal('0'), max_digits=24)),
+            ],
+            options={
+                'verbose_name': 'Daily Volume',
+                'verbose_name_plural': 'Daily Volumes',
+                'db_table': 'daily_volume',
+                'ordering': ['source', 'day'],
+                'constraints': [models.UniqueConstraint(fields=('source', 'day', 'tier', 'method', 'status'), name='daily_volume_bucket_uniq')],
+            },
+        ),
+    ]
@@ -1,3 +1,79 @@
+from decimal import Decimal
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class AdminScopeStat(models.Model):
+    """One running dashboard counter for an admin scope — see apps.admin_panel.stats.
+
+    `scope` is NULL for the platform-wide figures a Super Admin sees (the
+    PlatformStats rows) and a junior admin for the totals over their
+    downline. Keys are fixed names such as 'pending_deposits' plus
+    'tier:<n>' and 'joined:<date>'; values move by F() increments and are
+    periodically recomputed from the source tables.
+    """
+    scope = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='+'
+    )
+    key   = models.CharField(max_length=32)
+    value = models.DecimalField(max_digits=24, decimal_places=8, default=Decimal('0'))
+
+    class Meta:
+        db_table = 'admin_scope_stats'
+        verbose_name = 'Admin Scope Stat'
+        verbose_name_plural = 'Admin Scope Stats'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='admin_stat_scope_key_uniq'),
+            # NULLs are distinct in a unique index, so the platform row needs its own
+            models.UniqueConstraint(fields=['key'], condition=models.Q(scope__isnull=True), name='admin_stat_platform_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope_id or 'platform'} {self.key} = {self.value}"
+
+
+class DailyVolume(models.Model):
+    """Count and USD total of one day's deposits, withdrawals or earnings in one bucket.
+
+    Maintained by apps.admin_panel.rollups. Days are local (TIME_ZONE) dates
+    of created_at / mined_at; `tier` is 0 and `method`/`status` are blank
+    where the source has no such column.
+    """
+
+    class Source(models.TextChoices):
+        DEPOSIT    = 'deposit',    'Deposits'
+        WITHDRAWAL = 'withdrawal', 'Withdrawals'
+        EARNING    = 'earning',    'Mining Earnings'
+
+    source     = models.CharField(max_length=10, choices=Source.choices)
+    day        = models.DateField()
+    tier       = models.PositiveSmallIntegerField(default=0)
+    method     = models.CharField(max_length=20, blank=True)
+    status     = models.CharField(max_length=20, blank=True)
+    count      = models.PositiveIntegerField(default=0)
+    amount_usd = models.DecimalField(max_digits=24, decimal_places=8, default=Decimal('0'))
+
+    class Meta:
+        db_table = 'daily_volume'
+        ordering = ['source', 'day']
+        verbose_name = 'Daily Volume'
+        verbose_name_plural = 'Daily Volumes'
+        constraints = [
+            # Leads with (source, day), so it also serves the chart range queries
+            models.UniqueConstraint(fields=['source', 'day', 'tier', 'method', 'status'], name='daily_volume_bucket_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.source} {self.day} tier {self.tier} {self.method} {self.status}: {self.count}'
+
+
+class RollupWatermark(models.Model):
+    """How far apps.admin_panel.rollups has folded each source into DailyVolume."""
+    source    = models.CharField(max_length=10, primary_key=True, choices=DailyVolume.Source.choices)
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'rollup_watermarks'
+
+    def __str__(self):
+        return f'{self.source} synced to {self.synced_at:%Y-%m-%d %H:%M}'
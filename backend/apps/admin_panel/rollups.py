@@ -0,0 +1,189 @@
+"""
+Apex Cloud Mining — Daily volume rollups
+
+Volume charts read DailyVolume (one row per source, local day, tier, method
+and status) instead of scanning deposits, withdrawals and mining_earnings.
+The refresh_daily_volume task folds in everything up to SETTLE_WINDOW ago,
+starting from each source's RollupWatermark:
+
+- deposits and withdrawals change status after the fact, so every day with
+  a row created or reviewed inside the window is recomputed whole, over the
+  (created_at) index;
+- mining earnings are append-only, so only the window's rows are aggregated
+  and added to their buckets.
+
+Everything is cut off at the same instant the watermark moves to, so a row
+is counted by exactly one run. A source without a watermark is backfilled in
+full on its first run; `manage.py backfill_daily_volume` does the same on
+demand, one chunk of days per query.
+"""
+from datetime import datetime, time, timedelta
+from typing import NamedTuple
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import DailyVolume, RollupWatermark
+
+# Rows whose transaction commits later than this after their timestamp are missed
+SETTLE_WINDOW = timedelta(minutes=5)
+BACKFILL_CHUNK_DAYS = 31
+
+
+class Spec(NamedTuple):
+    model: type
+    time: str
+    amount: str
+    tier: str = None
+    method: str = None
+    status: str = None
+    reviewed: str = None  # set for sources whose rows change bucket after insert
+
+
+def sources():
+    from apps.mining.models import MiningEarning
+    from apps.payments.models import Deposit, Withdrawal
+
+    return {
+        DailyVolume.Source.DEPOSIT: Spec(
+            Deposit, 'created_at', 'amount_usd', tier='tier_target', method='method', status='status',
+            reviewed='reviewed_at',
+        ),
+        DailyVolume.Source.WITHDRAWAL: Spec(
+            Withdrawal, 'created_at', 'amount_usdt', method='method', status='status', reviewed='reviewed_at',
+        ),
+        DailyVolume.Source.EARNING: Spec(MiningEarning, 'mined_at', 'amount_usdt', tier='tier'),
+    }
+
+
+def _midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _buckets(source, spec, rows):
+    """Aggregate `rows` into unsaved DailyVolume objects, one per bucket."""
+    grouped = (
+        rows.order_by()
+        .values(
+            bucket_day=TruncDate(spec.time, tzinfo=timezone.get_current_timezone()),
+            bucket_tier=F(spec.tier) if spec.tier else Value(0),
+            bucket_method=F(spec.method) if spec.method else Value(''),
+            bucket_status=F(spec.status) if spec.status else Value(''),
+        )
+        .annotate(n=Count('pk'), total=Sum(spec.amount))
+    )
+    return [
+        DailyVolume(
+            source=source, day=row['bucket_day'], tier=row['bucket_tier'], method=row['bucket_method'],
+            status=row['bucket_status'], count=row['n'], amount_usd=row['total'] or 0,
+        )
+        for row in grouped
+    ]
+
+
+def _rebuild(source, spec, first_day, last_day, until):
+    """Replace the buckets of [first_day, last_day] with a fresh aggregate of rows before `until`."""
+    end = min(_midnight(last_day + timedelta(days=1)), until)
+    rows = spec.model.objects.filter(**{f'{spec.time}__gte': _midnight(first_day), f'{spec.time}__lt': end})
+    buckets = _buckets(source, spec, rows)
+    DailyVolume.objects.filter(source=source, day__range=(first_day, last_day)).delete()
+    DailyVolume.objects.bulk_create(buckets)
+    return len(buckets)
+
+
+def _fold(source, spec, since, until):
+    """Add rows timestamped in [since, until) to their buckets (append-only sources)."""
+    rows = spec.model.objects.filter(**{f'{spec.time}__gte': since, f'{spec.time}__lt': until})
+    buckets = _buckets(source, spec, rows)
+    for bucket in buckets:
+        updated = DailyVolume.objects.filter(
+            source=source, day=bucket.day, tier=bucket.tier, method=bucket.method, status=bucket.status,
+        ).update(count=F('count') + bucket.count, amount_usd=F('amount_usd') + bucket.amount_usd)
+        if not updated:
+            bucket.save()
+    return len({bucket.day for bucket in buckets})
+
+
+def _runs(days):
+    """Collapse sorted dates into (first, last) runs of consecutive days."""
+    runs = []
+    for day in days:
+        if runs and day == runs[-1][1] + timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return runs
+
+
+def _lock_watermark(source):
+    return RollupWatermark.objects.select_for_update().filter(source=source).first()
+
+
+def _set_watermark(source, until):
+    RollupWatermark.objects.update_or_create(source=source, defaults={'synced_at': until})
+
+
+def _backfill(source, spec, until, first_day=None, chunk_days=BACKFILL_CHUNK_DAYS, log=None):
+    if first_day is None:
+        first = (
+            spec.model.objects.filter(**{f'{spec.time}__lt': until})
+            .order_by(spec.time).values_list(spec.time, flat=True).first()
+        )
+        if first is None:
+            DailyVolume.objects.filter(source=source).delete()
+            return 0
+        first_day = timezone.localdate(first)
+    last_day = timezone.localdate(until)
+
+    # Buckets of days outside the rebuilt range are left as they are
+    days = 0
+    start = first_day
+    while start <= last_day:
+        end = min(start + timedelta(days=chunk_days - 1), last_day)
+        buckets = _rebuild(source, spec, start, end, until)
+        if log:
+            log(f'{source}: {start} – {end}: {buckets} buckets')
+        days += (end - start).days + 1
+        start = end + timedelta(days=1)
+    return days
+
+
+def backfill(source, first_day=None, chunk_days=BACKFILL_CHUNK_DAYS, now=None, log=None):
+    """Rebuild `source` from `first_day` (default: its oldest row) through today. Returns days rebuilt."""
+    spec = sources()[source]
+    until = (now or timezone.now()) - SETTLE_WINDOW
+    with transaction.atomic():
+        _lock_watermark(source)
+        days = _backfill(source, spec, until, first_day, chunk_days, log)
+        _set_watermark(source, until)
+    return days
+
+
+def refresh_source(source, now=None):
+    """Fold one source's changes since its watermark into DailyVolume. Returns days touched."""
+    spec = sources()[source]
+    until = (now or timezone.now()) - SETTLE_WINDOW
+    with transaction.atomic():
+        mark = _lock_watermark(source)
+        if mark is None:
+            days = _backfill(source, spec, until)
+        elif mark.synced_at >= until:
+            return 0
+        elif spec.reviewed:
+            window = Q(**{f'{spec.time}__gte': mark.synced_at, f'{spec.time}__lt': until})
+            window |= Q(**{f'{spec.reviewed}__gte': mark.synced_at, f'{spec.reviewed}__lt': until})
+            touched = spec.model.objects.filter(window).order_by().datetimes(spec.time, 'day')
+            days = 0
+            for first_day, last_day in _runs(sorted({moment.date() for moment in touched})):
+                _rebuild(source, spec, first_day, last_day, until)
+                days += (last_day - first_day).days + 1
+        else:
+            days = _fold(source, spec, mark.synced_at, until)
+        _set_watermark(source, until)
+    return days
+
+
+def refresh(now=None):
+    """Fold every source's changes into DailyVolume. Returns {source: days touched}."""
+    now = now or timezone.now()
+    return {source: refresh_source(source, now) for source in sources()}
@@ -0,0 +1,69 @@
+"""
+Apex Mining - Admin statistics signals
+
+Keep apps.admin_panel.stats counters in step with users, deposits and
+withdrawals saved or deleted through the ORM.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from apps.payments.models import Deposit, Withdrawal
+from . import stats
+
+# model -> (amount field, contribution function)
+COUNTED_PAYMENTS = {
+    Deposit: ('amount_usd', stats.deposit_counters),
+    Withdrawal: ('amount_usdt', stats.withdrawal_counters),
+}
+
+
+def _saved(update_fields, *names):
+    return update_fields is None or bool(set(names) & set(update_fields))
+
+
+def _payment_counters(sender, instance):
+    amount_field, counters = COUNTED_PAYMENTS[sender]
+    return counters(instance.status, getattr(instance, amount_field))
+
+
+@receiver(post_init, sender=Deposit)
+@receiver(post_init, sender=Withdrawal)
+def snapshot_payment(sender, instance, **kwargs):
+    # Deferred fields are absent from __dict__; such rows are not diffed
+    amount_field, _ = COUNTED_PAYMENTS[sender]
+    instance._stats_loaded = (instance.__dict__.get('status'), instance.__dict__.get(amount_field))
+
+
+@receiver(post_save, sender=Deposit)
+@receiver(post_save, sender=Withdrawal)
+def count_payment(sender, instance, created, **kwargs):
+    amount_field, counters = COUNTED_PAYMENTS[sender]
+    status, amount = instance._stats_loaded
+    new = _payment_counters(sender, instance)
+    if created:
+        stats.record(instance.user_id, new)
+    elif status is not None:
+        stats.record(instance.user_id, stats.diff(counters(status, amount), new))
+    instance._stats_loaded = (instance.status, getattr(instance, amount_field))
+
+
+@receiver(post_delete, sender=Deposit)
+@receiver(post_delete, sender=Withdrawal)
+def uncount_payment(sender, instance, **kwargs):
+    stats.record(instance.user_id, stats.diff(_payment_counters(sender, instance), {}))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def count_user(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        stats.record(instance.pk, stats.user_counters(instance.tier, instance.date_joined))
+    elif _saved(update_fields, 'tier') and instance.field_changed('tier'):
+        previous = instance._loaded_values['tier']
+        stats.record(instance.pk, {stats.tier_key(previous): -1, stats.tier_key(instance.tier): 1})
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def uncount_user(sender, instance, **kwargs):
+    # The closure rows are gone by now, so only the platform counters move;
+    # the admin scopes above are corrected by the next reconciliation
+    stats.record(instance.pk, stats.diff(stats.user_counters(instance.tier, instance.date_joined), {}))
@@ -0,0 +1,241 @@
+"""
+Apex Cloud Mining — Materialized admin statistics
+
+AdminStatsView used to recount users, deposits and withdrawals on every
+load (about nine COUNT/SUM queries, over an `id__in` downline subquery for
+junior admins). The figures now live in AdminScopeStat, one running counter
+per (scope, key), so a dashboard load is a single indexed read of its scope.
+
+- Signals (apps.admin_panel.signals) diff every saved user, deposit and
+  withdrawal against the values it was loaded with; bulk writers such as the
+  expiry sweep call record_many() directly, and the review queues
+  record_each() for per-user amounts.
+- Deltas are applied after commit as one UPDATE for the platform row and
+  every materialized admin scope above the affected users (found through the
+  referral closure), so the hot platform rows are locked for one statement
+  rather than for the writer's whole transaction.
+- A scope gets its counters from reconcile_scope(): on an admin's first
+  dashboard load, and for every scope from the reconcile_admin_stats task,
+  which also corrects drift from writes no signal sees (raw SQL, seed_load,
+  users deleted with their downline attached).
+"""
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.utils import timezone
+from apex_project.db import case_map
+from .models import AdminScopeStat
+
+PLATFORM = None
+
+TOTAL_USERS         = 'total_users'
+PENDING_DEPOSITS    = 'pending_deposits'
+TOTAL_DEPOSITS      = 'total_deposits'
+PENDING_WITHDRAWALS = 'pending_withdrawals'
+APPROVED_WITHDRAWALS = 'approved_withdrawals'
+TOTAL_WITHDRAWALS   = 'total_withdrawals'
+FIXED_KEYS = (TOTAL_USERS, PENDING_DEPOSITS, TOTAL_DEPOSITS, PENDING_WITHDRAWALS, APPROVED_WITHDRAWALS, TOTAL_WITHDRAWALS)
+
+TIER_PREFIX = 'tier:'
+JOINED_PREFIX = 'joined:'
+
+
+def tier_key(tier):
+    return f'{TIER_PREFIX}{tier}'
+
+
+def joined_key(day):
+    return f'{JOINED_PREFIX}{day.isoformat()}'
+
+
+# ── What each row contributes ──────────────────────────────────────────────
+
+def user_counters(tier, date_joined):
+    return {TOTAL_USERS: 1, tier_key(tier): 1, joined_key(timezone.localdate(date_joined)): 1}
+
+
+def deposit_counters(status, amount_usd):
+    if status == 'pending':
+        return {PENDING_DEPOSITS: 1}
+    if status == 'approved':
+        return {TOTAL_DEPOSITS: amount_usd}
+    return {}
+
+
+def withdrawal_counters(status, amount_usdt):
+    if status == 'pending':
+        return {PENDING_WITHDRAWALS: 1}
+    if status == 'approved':
+        return {APPROVED_WITHDRAWALS: 1, TOTAL_WITHDRAWALS: amount_usdt}
+    return {}
+
+
+def diff(old, new):
+    """Per-key change from contribution `old` to `new`, zeros dropped."""
+    deltas = {key: new.get(key, 0) - old.get(key, 0) for key in set(old) | set(new)}
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+# ── Incremental updates ────────────────────────────────────────────────────
+
+def record(user_id, deltas):
+    record_many([user_id], deltas)
+
+
+def record_many(user_ids, deltas):
+    """Add `deltas` once per user in `user_ids` to every scope counting them, after commit."""
+    user_ids = list(user_ids)
+    deltas = {key: Decimal(delta) for key, delta in deltas.items() if delta}
+    if user_ids and deltas:
+        transaction.on_commit(lambda: _apply(user_ids, deltas))
+
+
+def _apply(user_ids, deltas):
+    from apps.referrals.models import ReferralClosure
+
+    above = ReferralClosure.objects.filter(descendant_id__in=user_ids, depth__gt=0).values('ancestor_id')
+    rows = AdminScopeStat.objects.filter(Q(scope__isnull=True) | Q(scope_id__in=above))
+
+    # Day counters start at zero in every materialized scope that sees the day's first signup
+    dated = [key for key in deltas if key.startswith(JOINED_PREFIX)]
+    if dated:
+        scopes = rows.filter(key=TOTAL_USERS).values_list('scope_id', flat=True)
+        AdminScopeStat.objects.bulk_create(
+            [AdminScopeStat(scope_id=scope, key=key) for scope in scopes for key in dated],
+            ignore_conflicts=True,
+        )
+
+    increment = Case(
+        *[When(key=key, then=Value(delta)) for key, delta in deltas.items()],
+        default=Value(Decimal('0')), output_field=DecimalField(),
+    )
+    if len(user_ids) > 1:
+        # Each scope moves once per affected user in its downline
+        below = (
+            ReferralClosure.objects
+            .filter(ancestor_id=OuterRef('scope_id'), descendant_id__in=user_ids, depth__gt=0)
+            .values('ancestor_id').annotate(n=Count('*')).values('n')
+        )
+        increment = increment * Case(
+            When(scope__isnull=True, then=Value(len(user_ids))), default=Subquery(below),
+        )
+    rows.filter(key__in=deltas).update(value=F('value') + increment)
+
+
+def record_each(deltas_by_user):
+    """Like record() for many users with different deltas ({user_id: deltas}).
+
+    Applied after commit as one UPDATE: every scope's change is summed here
+    from the referral closure, so a review batch moves the counters once.
+    Day counters are not created; record signups with record_many().
+    """
+    deltas_by_user = {
+        user_id: {key: Decimal(delta) for key, delta in deltas.items() if delta}
+        for user_id, deltas in deltas_by_user.items()
+    }
+    deltas_by_user = {user_id: deltas for user_id, deltas in deltas_by_user.items() if deltas}
+    if deltas_by_user:
+        transaction.on_commit(lambda: _apply_each(deltas_by_user))
+
+
+def _apply_each(deltas_by_user):
+    from apps.referrals.models import ReferralClosure
+
+    totals = defaultdict(lambda: defaultdict(Decimal))
+    for deltas in deltas_by_user.values():
+        for key, delta in deltas.items():
+            totals[PLATFORM][key] += delta
+    materialized = AdminScopeStat.objects.filter(scope__isnull=False, key=TOTAL_USERS).values('scope_id')
+    above = ReferralClosure.objects.filter(
+        descendant_id__in=list(deltas_by_user), depth__gt=0, ancestor_id__in=materialized,
+    ).values_list('ancestor_id', 'descendant_id')
+    for scope_id, user_id in above:
+        for key, delta in deltas_by_user[user_id].items():
+            totals[scope_id][key] += delta
+
+    whens = [
+        When(Q(scope__isnull=True) if scope_id is PLATFORM else Q(scope_id=scope_id), key=key, then=Value(delta))
+        for scope_id, deltas in totals.items() for key, delta in deltas.items()
+    ]
+    increment = Case(*whens, default=Value(Decimal('0')), output_field=DecimalField())
+    scopes = [scope_id for scope_id in totals if scope_id is not PLATFORM]
+    keys = {key for deltas in totals.values() for key in deltas}
+    (
+        AdminScopeStat.objects
+        .filter(Q(scope__isnull=True) | Q(scope_id__in=scopes), key__in=keys)
+        .update(value=F('value') + increment)
+    )
+
+
+# ── Recomputation ──────────────────────────────────────────────────────────
+
+def _compute(scope_id):
+    from apps.mining.catalogue import get_catalogue
+    from apps.payments.models import Deposit, Withdrawal
+    from apps.referrals.models import ReferralClosure
+    from apps.users.models import User
+
+    users, deposits, withdrawals = User.objects.all(), Deposit.objects.all(), Withdrawal.objects.all()
+    if scope_id is not PLATFORM:
+        downline = ReferralClosure.objects.filter(ancestor_id=scope_id, depth__gt=0).values('descendant_id')
+        users = users.filter(id__in=downline)
+        deposits = deposits.filter(user_id__in=downline)
+        withdrawals = withdrawals.filter(user_id__in=downline)
+
+    counters = dict.fromkeys(FIXED_KEYS, Decimal('0'))
+    counters.update((tier_key(tier.tier_number), Decimal('0')) for tier in get_catalogue())
+    for row in users.order_by().values('tier').annotate(n=Count('id')):
+        counters[tier_key(row['tier'])] = Decimal(row['n'])
+        counters[TOTAL_USERS] += row['n']
+
+    # A range on date_joined, unlike date_joined__date, can use an index
+    today = timezone.localdate()
+    midnight = timezone.make_aware(datetime.combine(today, time.min))
+    counters[joined_key(today)] = Decimal(users.filter(date_joined__gte=midnight).count())
+
+    for row in deposits.order_by().values('status').annotate(n=Count('id'), total=Sum('amount_usd')):
+        for key, value in deposit_counters(row['status'], row['total'] or Decimal('0')).items():
+            counters[key] += row['n'] if key == PENDING_DEPOSITS else value
+    for row in withdrawals.order_by().values('status').annotate(n=Count('id'), total=Sum('amount_usdt')):
+        for key, value in withdrawal_counters(row['status'], row['total'] or Decimal('0')).items():
+            counters[key] += value if key == TOTAL_WITHDRAWALS else row['n']
+    return counters
+
+
+def reconcile_scope(scope_id=PLATFORM):
+    """Recompute every counter of one scope from the source tables. Returns {key: value}."""
+    counters = _compute(scope_id)
+    rows = AdminScopeStat.objects.filter(scope_id=scope_id)
+    with transaction.atomic():
+        # Upsert rather than delete-then-insert: a concurrent first-load snapshot() may
+        # be materializing the same scope, and its rows must not collide with ours.
+        # The platform scope is only unique through a partial index, which ON CONFLICT
+        # can't name, so insert the missing keys and then set every value in one UPDATE.
+        rows.exclude(key__in=counters).delete()
+        AdminScopeStat.objects.bulk_create(
+            [AdminScopeStat(scope_id=scope_id, key=key, value=value) for key, value in counters.items()],
+            ignore_conflicts=True,
+        )
+        rows.update(value=case_map('key', counters, DecimalField(), Decimal('0')))
+    return counters
+
+
+def reconcile():
+    """Recompute the platform and every junior admin scope; drop scopes of demoted admins."""
+    from apps.users.models import User
+
+    admin_ids = list(User.objects.filter(is_admin=True, is_superuser=False).values_list('id', flat=True))
+    AdminScopeStat.objects.filter(scope__isnull=False).exclude(scope_id__in=admin_ids).delete()
+    for scope_id in [PLATFORM, *admin_ids]:
+        reconcile_scope(scope_id)
+    return 1 + len(admin_ids)
+
+
+def snapshot(scope_id=PLATFORM):
+    """Current counters for a scope, materializing it on first use."""
+    counters = dict(AdminScopeStat.objects.filter(scope_id=scope_id).values_list('key', 'value'))
+    if TOTAL_USERS not in counters:
+        counters = reconcile_scope(scope_id)
+    return counters
@@ -0,0 +1,33 @@
+"""
+Apex Cloud Mining — Admin statistics maintenance
+
+The dashboard counters in apps.admin_panel.stats move incrementally;
+`reconcile_admin_stats` recomputes every scope from the source tables so
+any drift is bounded by its schedule, and prunes day counters from before
+today. `refresh_daily_volume` folds new and reviewed rows into the
+DailyVolume rollups behind the volume charts (apps.admin_panel.rollups).
+"""
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='reconcile_admin_stats')
+def reconcile_admin_stats():
+    """Recompute the platform and every junior admin's dashboard counters."""
+    from apps.admin_panel import stats
+
+    scopes = stats.reconcile()
+    logger.info(f'[Admin] Reconciled dashboard counters for {scopes} scope(s)')
+    return scopes
+
+
+@shared_task(name='refresh_daily_volume')
+def refresh_daily_volume():
+    """Fold deposits, withdrawals and earnings since the last run into DailyVolume."""
+    from apps.admin_panel import rollups
+
+    touched = rollups.refresh()
+    logger.info(f'[Admin] Daily volume rollups refreshed: {touched}')
+    return touched
@@ -1,3 +1,240 @@
+from datetime import timedelta
+from decimal import Decimal
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.mining.models import MiningEarning
+from apps.payments.models import Deposit, Withdrawal
+from apps.users.models import User
+from . import rollups, stats
+from .models import AdminScopeStat, DailyVolume
 
-# Create your tests here.
+
+class AdminStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.super = User.objects.create_superuser(email='super@example.com', password='x')
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', password='x', referred_by=cls.super,
+            is_admin=True, is_staff=True, admin_status='approved',
+        )
+        cls.member = User.objects.create_user(email='member@example.com', password='x', referred_by=cls.admin, tier=2)
+        cls.outsider = User.objects.create_user(email='outsider@example.com', password='x', referred_by=cls.super)
+        cls.old = User.objects.create_user(email='old@example.com', password='x', referred_by=cls.member)
+        User.objects.filter(pk=cls.old.pk).update(date_joined=timezone.now() - timedelta(days=3))
+
+        Deposit.objects.create(user=cls.member, tier_target=3, amount_usd=Decimal('69.99'), method='crypto')
+        Deposit.objects.create(user=cls.outsider, tier_target=2, amount_usd=Decimal('16'), method='bank', status='approved')
+        Withdrawal.objects.create(user=cls.old, amount_usdt=Decimal('20'), transaction_id='WD-1', status='approved')
+        Withdrawal.objects.create(user=cls.member, amount_usdt=Decimal('15'), transaction_id='WD-2')
+
+    def assertCountersExact(self):
+        for scope in (stats.PLATFORM, self.admin.pk):
+            current = {k: v for k, v in stats.snapshot(scope).items() if v}
+            self.assertEqual(current, {k: v for k, v in stats._compute(scope).items() if v})
+
+    def test_reconcile_counts_scope(self):
+        counters = stats.reconcile_scope(self.admin.pk)
+        self.assertEqual(counters[stats.TOTAL_USERS], 2)
+        self.assertEqual(counters[stats.joined_key(timezone.localdate())], 1)
+        self.assertEqual(counters[stats.tier_key(2)], 1)
+        self.assertEqual(counters[stats.PENDING_DEPOSITS], 1)
+        self.assertEqual(counters[stats.TOTAL_DEPOSITS], 0)
+        self.assertEqual(counters[stats.APPROVED_WITHDRAWALS], 1)
+        self.assertEqual(counters[stats.TOTAL_WITHDRAWALS], Decimal('20'))
+
+        platform = stats.reconcile_scope()
+        self.assertEqual(platform[stats.TOTAL_USERS], 5)
+        self.assertEqual(platform[stats.TOTAL_DEPOSITS], Decimal('16'))
+
+    def test_reconcile_upserts_over_existing_rows(self):
+        # A concurrent first load may already have materialized the scope
+        for scope in (stats.PLATFORM, self.admin.pk):
+            stats.snapshot(scope)
+            rows = AdminScopeStat.objects.filter(scope_id=scope)
+            rows.filter(key=stats.TOTAL_USERS).update(value=99)
+            rows.filter(key=stats.PENDING_DEPOSITS).delete()
+            AdminScopeStat.objects.create(scope_id=scope, key=stats.joined_key(timezone.localdate() - timedelta(days=9)), value=4)
+
+            counters = stats.reconcile_scope(scope)
+            self.assertEqual(dict(rows.values_list('key', 'value')), counters)
+        self.assertCountersExact()
+
+    def test_counters_follow_writes(self):
+        stats.reconcile()
+        with self.captureOnCommitCallbacks(execute=True):
+            newcomer = User.objects.create_user(email='new@example.com', password='x', referred_by=self.member)
+        with self.captureOnCommitCallbacks(execute=True):
+            deposit = Deposit.objects.get(user=self.member)
+            deposit.status = 'approved'
+            deposit.save()
+            self.member.tier = 3
+            self.member.save(update_fields=['tier'])
+        with self.captureOnCommitCallbacks(execute=True):
+            wd = Withdrawal.objects.get(transaction_id='WD-2')
+            wd.status = 'processing'
+            wd.save()
+            wd.status = 'approved'
+            wd.save()
+            Deposit.objects.create(user=newcomer, tier_target=4, amount_usd=Decimal('235.99'), method='crypto')
+            Withdrawal.objects.filter(transaction_id='WD-1').delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            # A bulk write moves each scope once per affected user below it
+            moved = [newcomer.pk, self.old.pk, self.outsider.pk]
+            User.objects.filter(pk__in=moved).update(tier=4)
+            stats.record_many(moved, {stats.tier_key(1): -1, stats.tier_key(4): 1})
+
+        self.assertCountersExact()
+        self.assertEqual(stats.snapshot(self.admin.pk)[stats.TOTAL_USERS], 3)
+
+    def test_first_signup_of_the_day_creates_day_counter(self):
+        stats.reconcile()
+        today = stats.joined_key(timezone.localdate())
+        AdminScopeStat.objects.filter(key=today).delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(email='new@example.com', password='x', referred_by=self.member)
+        self.assertEqual(stats.snapshot(self.admin.pk)[today], 1)
+        self.assertEqual(stats.snapshot()[today], 1)
+
+    def test_unmaterialized_scopes_are_left_alone(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(email='new@example.com', password='x', referred_by=self.member)
+        self.assertFalse(AdminScopeStat.objects.exists())
+
+    def test_dashboard_reads_one_scope(self):
+        stats.reconcile()
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with self.assertNumQueries(1):
+            response = client.get('/api/v1/admin/stats/')
+        self.assertEqual(response.data['total_users'], 2)
+        self.assertEqual(response.data['new_today'], 1)
+        self.assertEqual(response.data['pending_withdrawals'], 1)
+        self.assertEqual(response.data['users_by_tier'], [{'tier': 1, 'count': 1}, {'tier': 2, 'count': 1}])
+
+        client.force_authenticate(self.super)
+        response = client.get('/api/v1/admin/stats/')
+        self.assertEqual(response.data['total_users'], 5)
+        self.assertEqual(response.data['total_volume'], 36.0)
+
+
+class DailyVolumeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.super = User.objects.create_superuser(email='super@example.com', password='x')
+        cls.user = User.objects.create_user(email='user@example.com', password='x', referred_by=cls.super)
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def days_ago(self, n):
+        return self.now - timedelta(days=n)
+
+    def day(self, days_ago):
+        return timezone.localdate(self.days_ago(days_ago))
+
+    def deposit(self, days_ago, status='pending', amount='16', method='crypto', tier=2):
+        deposit = Deposit.objects.create(
+            user=self.user, tier_target=tier, amount_usd=Decimal(amount), method=method, status=status,
+        )
+        Deposit.objects.filter(pk=deposit.pk).update(created_at=self.days_ago(days_ago))
+        return deposit
+
+    def earning(self, days_ago, amount='1', tier=1):
+        earning = MiningEarning.objects.create(user=self.user, tier=tier, amount_usdt=Decimal(amount))
+        MiningEarning.objects.filter(pk=earning.pk).update(mined_at=self.days_ago(days_ago))
+        return earning
+
+    def refresh(self, minutes_later=10):
+        return rollups.refresh(now=self.now + timedelta(minutes=minutes_later))
+
+    def volume(self, source, **filters):
+        return {
+            (row.day, row.tier, row.method, row.status): (row.count, row.amount_usd)
+            for row in DailyVolume.objects.filter(source=source, **filters)
+        }
+
+    def test_first_refresh_backfills_history(self):
+        self.deposit(40, 'approved', '69.99', tier=3)
+        self.deposit(40, 'approved', '16')
+        self.deposit(2, 'pending', '16', method='bank')
+        Withdrawal.objects.create(user=self.user, amount_usdt=Decimal('20'), transaction_id='WD-1')
+        self.earning(3)
+        self.earning(3, '50', tier=2)
+
+        self.refresh()
+
+        self.assertEqual(self.volume('deposit'), {
+            (self.day(40), 3, 'crypto', 'approved'): (1, Decimal('69.99')),
+            (self.day(40), 2, 'crypto', 'approved'): (1, Decimal('16')),
+            (self.day(2), 2, 'bank', 'pending'): (1, Decimal('16')),
+        })
+        self.assertEqual(self.volume('withdrawal'), {(self.day(0), 0, 'crypto', 'pending'): (1, Decimal('20'))})
+        self.assertEqual(self.volume('earning'), {
+            (self.day(3), 1, '', ''): (1, Decimal('1')),
+            (self.day(3), 2, '', ''): (1, Decimal('50')),
+        })
+
+    def test_reviews_rebuild_the_day_the_row_was_created(self):
+        deposit = self.deposit(10)
+        self.refresh()
+        self.now += timedelta(hours=1)
+
+        deposit = Deposit.objects.get(pk=deposit.pk)
+        deposit.status = 'approved'
+        deposit.reviewed_at = self.now
+        deposit.save()
+        self.refresh()
+
+        day = self.day(10)
+        self.assertEqual(self.volume('deposit'), {(day, 2, 'crypto', 'approved'): (1, Decimal('16'))})
+
+    def test_earnings_are_folded_once(self):
+        self.earning(0)
+        self.refresh()
+        self.now += timedelta(hours=1)
+        self.earning(0, '2')
+        self.refresh()
+        self.refresh(minutes_later=20)
+
+        day = self.day(0)
+        self.assertEqual(self.volume('earning'), {(day, 1, '', ''): (2, Decimal('3'))})
+
+        # A full backfill rebuilds the same figures and hands over to refresh cleanly
+        rollups.backfill('earning', now=self.now + timedelta(minutes=20))
+        self.refresh(minutes_later=30)
+        self.assertEqual(self.volume('earning'), {(day, 1, '', ''): (2, Decimal('3'))})
+
+    def test_rows_inside_the_settle_window_wait_for_the_next_run(self):
+        self.refresh(minutes_later=0)
+        self.earning(0)
+        self.assertEqual(self.volume('earning'), {})
+        self.refresh(minutes_later=10)
+        self.assertEqual(sum(count for count, _ in self.volume('earning').values()), 1)
+
+    def test_series_endpoint(self):
+        self.deposit(1, 'approved', '16')
+        self.deposit(1, 'rejected', '16')
+        self.deposit(0, 'approved', '69.99', tier=3)
+        self.refresh()
+        client = APIClient()
+        client.force_authenticate(self.super)
+
+        with self.assertNumQueries(1):
+            response = client.get('/api/v1/admin/analytics/volume/deposit/', {'group_by': 'status'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['period'], row['status'], row['count']) for row in response.data['series']],
+            [
+                (self.day(1), 'approved', 1),
+                (self.day(1), 'rejected', 1),
+                (self.day(0), 'approved', 1),
+            ],
+        )
+
+        response = client.get('/api/v1/admin/analytics/volume/deposit/', {'interval': 'month', 'status': 'approved'})
+        self.assertEqual(sum(row['amount_usd'] for row in response.data['series']), 85.99)
+
+        self.assertEqual(client.get('/api/v1/admin/analytics/volume/deposit/', {'interval': 'hour'}).status_code, 400)
+        self.assertEqual(client.get('/api/v1/admin/analytics/volume/deposit/', {'start': 'soon'}).status_code, 400)
+        self.assertEqual(client.get('/api/v1/admin/analytics/volume/fees/').status_code, 404)
@@ -9,9 +9,12 @@ urlpatterns = [
     path('deposits/',                       views.AdminDepositListView.as_view()),
     path('deposits/<uuid:pk>/approve/',     views.AdminDepositApproveView.as_view()),
     path('deposits/<uuid:pk>/reject/',      views.AdminDepositRejectView.as_view()),
+    path('deposits/bulk/',                  views.AdminDepositBulkView.as_view()),
     path('withdrawals/',                    views.AdminWithdrawalListView.as_view()),
     path('withdrawals/<uuid:pk>/approve/',  views.AdminWithdrawalApproveView.as_view()),
     path('withdrawals/<uuid:pk>/reject/',   views.AdminWithdrawalRejectView.as_view()),
+    path('withdrawals/bulk/',               views.AdminWithdrawalBulkView.as_view()),
+    path('fees/bulk/',                      views.AdminFeeBulkView.as_view()),
     path('tiers/',                          views.AdminTierListView.as_view()),
     path('tiers/<int:pk>/',                 views.AdminTierDetailView.as_view()),
     path('exchange-rate/',                  views.AdminExchangeRateView.as_view()),
@@ -23,5 +26,7 @@ urlpatterns = [
     path('reject-admin/<uuid:pk>/',         views.RejectAdminView.as_view()),
     path('delete-admin/<uuid:pk>/',         views.DeleteAdminView.as_view()),
     path('commissions/',                    views.GlobalCommissionsView.as_view()),
+    path('analytics/volume/<str:source>/',  views.AdminVolumeSeriesView.as_view()),
     path('audit-log/',                      views.AuditLogListView.as_view()),
+    path('broadcasts/',                     views.AdminBroadcastListView.as_view()),
 ]
\ No newline at end of file
@@ -2,7 +2,7 @@
 Apex Mining — Admin Panel API (RBAC v2)
 
 Role guards:
-  - IsSuperAdmin: is_superuser role only — approve/delete admins, global commissions, audit log
+  - IsSuperAdmin: is_superuser role only — approve/delete admins, global commissions, volume analytics, audit log, broadcasts
   - IsJuniorAdminOrAbove: is_admin OR is_superuser — transaction approvals, user management
 """
 from rest_framework import generics, serializers, status, filters
@@ -10,14 +10,23 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes as pc
 from rest_framework.exceptions import PermissionDenied
+from collections import Counter
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db.models import Sum, Count
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from apex_project.db import for_serializer
+from apps.payments import review
 from apps.payments.models import Deposit, Withdrawal, ExchangeRate, WithdrawalFeePayment
 from apps.mining.models import MiningTier, UserMiningSession
+from apps.mining import catalogue as tier_catalogue, plans
 from apps.referrals.models import ReferralCommission, AdminCommissionSummary
 from apps.users.permissions import IsSuperAdmin, IsJuniorAdminOrAbove
-from apps.users.models import AuditLog
+from apps.users.models import AuditLog, Broadcast
+from apps.users import notify
+from . import stats as admin_stats
+from .models import DailyVolume
 import datetime
 
 User = get_user_model()
@@ -37,10 +46,12 @@ class AdminUserSerializer(serializers.ModelSerializer):
         model  = User
         fields = [
             'id', 'full_name', 'email', 'phone', 'country',
-            'tier', 'balance_usdt', 'total_earned',
+            'tier', 'tier_expiry', 'balance_usdt', 'total_earned',
             'is_active', 'is_verified', 'is_admin', 'is_superuser',
             'admin_status', 'referral_code', 'date_joined', 'last_mined_at',
         ]
+        # Balances are ledger projections — adjust them through the ledger
+        read_only_fields = ['balance_usdt', 'total_earned']
 
 
 class AdminDepositSerializer(serializers.ModelSerializer):
@@ -48,7 +59,10 @@ class AdminDepositSerializer(serializers.ModelSerializer):
     user_email = serializers.CharField(source='user.email',     read_only=True)
     class Meta:
         model  = Deposit
-        fields = '__all__'
+        fields = [
+            'id', 'user', 'user_name', 'user_email', 'tier_target', 'amount_usd', 'amount_ngn', 'method',
+            'proof_image', 'tx_hash', 'status', 'admin_note', 'created_at', 'reviewed_at',
+        ]
 
 
 class AdminWithdrawalSerializer(serializers.ModelSerializer):
@@ -56,7 +70,11 @@ class AdminWithdrawalSerializer(serializers.ModelSerializer):
     user_email = serializers.CharField(source='user.email',     read_only=True)
     class Meta:
         model  = Withdrawal
-        fields = '__all__'
+        fields = [
+            'id', 'user', 'user_name', 'user_email', 'amount_usdt', 'amount_ngn', 'method', 'wallet_address',
+            'bank_name', 'account_number', 'account_name', 'status', 'is_referral', 'transaction_id',
+            'created_at', 'reviewed_at', 'completed_at',
+        ]
 
 
 class AdminTierSerializer(serializers.ModelSerializer):
@@ -78,41 +96,58 @@ class AuditLogSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class BulkReviewSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=['approve', 'reject'])
+    ids    = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+
+    def validate_ids(self, ids):
+        if len(ids) > settings.APEX_REVIEW_MAX_ITEMS:
+            raise serializers.ValidationError(f'At most {settings.APEX_REVIEW_MAX_ITEMS} items per request.')
+        return ids
+
+
+class BroadcastSerializer(serializers.ModelSerializer):
+    read_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model  = Broadcast
+        fields = ['id', 'type', 'title', 'message', 'icon', 'created_at', 'read_count']
+        read_only_fields = ['id', 'created_at']
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Stats — Junior Admin and above
 # ──────────────────────────────────────────────────────────────────────────────
 class AdminStatsView(APIView):
-    """GET /api/v1/admin/stats/"""
+    """GET /api/v1/admin/stats/ — read from the materialized counters in apps.admin_panel.stats"""
     permission_classes = [IsJuniorAdminOrAbove]
 
     def get(self, request):
         user = request.user
-        today = timezone.now().date()
 
         # Super Admins see global stats; Junior Admins see only their downline
-        if user.is_superuser:
-            users_qs      = User.objects.all()
-            deposits_qs   = Deposit.objects.all()
-            withdraw_qs   = Withdrawal.objects.all()
-        else:
-            downline_ids = user.get_downline_user_ids()
-            users_qs      = User.objects.filter(id__in=downline_ids)
-            deposits_qs   = Deposit.objects.filter(user_id__in=downline_ids)
-            withdraw_qs   = Withdrawal.objects.filter(user_id__in=downline_ids)
+        counters = admin_stats.snapshot(admin_stats.PLATFORM if user.is_superuser else user.pk)
 
-        total_deposits    = float(deposits_qs.filter(status='approved').aggregate(t=Sum('amount_usd'))['t'] or 0)
-        total_withdrawals = float(withdraw_qs.filter(status='approved').aggregate(t=Sum('amount_usdt'))['t'] or 0)
+        def count(key):
+            return int(counters.get(key, 0))
+
+        total_deposits    = float(counters[admin_stats.TOTAL_DEPOSITS])
+        total_withdrawals = float(counters[admin_stats.TOTAL_WITHDRAWALS])
+        users_by_tier = sorted(
+            (int(key[len(admin_stats.TIER_PREFIX):]), int(value)) for key, value in counters.items()
+            if key.startswith(admin_stats.TIER_PREFIX) and value
+        )
 
         return Response({
-            'total_users':          users_qs.count(),
-            'new_today':            users_qs.filter(date_joined__date=today).count(),
-            'pending_deposits':     deposits_qs.filter(status='pending').count(),
-            'pending_withdrawals':  withdraw_qs.filter(status='pending').count(),
-            'approved_withdrawals': withdraw_qs.filter(status='approved').count(),
+            'total_users':          count(admin_stats.TOTAL_USERS),
+            'new_today':            count(admin_stats.joined_key(timezone.localdate())),
+            'pending_deposits':     count(admin_stats.PENDING_DEPOSITS),
+            'pending_withdrawals':  count(admin_stats.PENDING_WITHDRAWALS),
+            'approved_withdrawals': count(admin_stats.APPROVED_WITHDRAWALS),
             'total_deposits':       total_deposits,
             'total_withdrawals':    total_withdrawals,
             'total_volume':         total_deposits + total_withdrawals,
-            'users_by_tier':        list(users_qs.values('tier').annotate(count=Count('id')).order_by('tier')),
+            'users_by_tier':        [{'tier': tier, 'count': n} for tier, n in users_by_tier],
         })
 
 
@@ -131,7 +166,7 @@ class AdminUserListView(generics.ListAPIView):
         if self.request.user.is_superuser:
             qs = User.objects.all()
         else:
-            qs = User.objects.filter(id__in=self.request.user.get_downline_user_ids())
+            qs = User.objects.filter(id__in=self.request.user.downline_ids())
             
         is_admin_only = self.request.query_params.get('is_admin_only')
         if is_admin_only == 'true':
@@ -149,7 +184,7 @@ class AdminUserDetailView(generics.RetrieveUpdateAPIView):
         if self.request.user.is_superuser:
             return User.objects.all()
         # Junior Admin can only see their downline
-        return User.objects.filter(id__in=self.request.user.get_downline_user_ids())
+        return User.objects.filter(id__in=self.request.user.downline_ids())
 
     def perform_update(self, serializer):
         target = self.get_object()
@@ -157,7 +192,10 @@ class AdminUserDetailView(generics.RetrieveUpdateAPIView):
         if not self.request.user.is_superuser and (target.is_admin or target.is_superuser):
             raise PermissionDenied("⛔ You cannot modify admin accounts.")
         
-        serializer.save()
+        user = serializer.save()
+        # A hand-set plan gets an end date and a session, like an approved deposit
+        if user.tier != target.tier or 'tier_expiry' in serializer.validated_data:
+            plans.grant(user, serializer.validated_data.get('tier_expiry'))
         AuditLog.log(
             actor=self.request.user, 
             action='settings_changed', 
@@ -218,8 +256,7 @@ class ApproveAdminView(APIView):
         target.is_staff = True
         target.save(update_fields=['admin_status', 'is_admin', 'is_staff'])
 
-        from apps.users.models import Notification
-        Notification.objects.create(
+        notify.notify(
             user=target, type='system',
             title='✅ Admin Access Granted!',
             message='Your admin application has been approved.',
@@ -279,55 +316,45 @@ class AdminDepositListView(generics.ListAPIView):
     search_fields      = ['user__email', 'user__full_name', 'status']
 
     def get_queryset(self):
+        deposits = for_serializer(Deposit.objects.all(), AdminDepositSerializer)
         if self.request.user.is_superuser:
-            return Deposit.objects.all()
-        return Deposit.objects.filter(user_id__in=self.request.user.get_downline_user_ids())
+            return deposits
+        return deposits.filter(user_id__in=self.request.user.downline_ids())
 
 
-class AdminDepositApproveView(APIView):
-    """POST /api/v1/admin/deposits/<id>/approve/"""
+class AdminReviewItemView(APIView):
+    """POST .../<id>/approve|reject/ — one item through apps.payments.review,
+    exactly as the bulk endpoints and the Django admin review it."""
     permission_classes = [IsJuniorAdminOrAbove]
+    review_fn = None  # an apps.payments.review batch function
+    done      = ''
 
-    def post(self, request, pk):
-        deposit = Deposit.objects.get(pk=pk)
-        if deposit.status != 'pending':
-            return Response({'detail': 'Already reviewed.'}, status=400)
-
-        # Junior Admin can only approve their own downline's deposits
-        if not request.user.is_superuser and deposit.user_id not in request.user.get_downline_user_ids():
-            return Response({'detail': '⛔ Not in your downline.'}, status=403)
+    # review outcome → (status, detail); None keeps the service's detail
+    ERRORS = {
+        review.NOT_FOUND:        (404, 'Not found.'),
+        review.FORBIDDEN:        (403, '⛔ Not in your downline.'),
+        review.ALREADY_REVIEWED: (400, 'Already reviewed.'),
+        review.FAILED:           (400, None),
+    }
 
-        deposit.status      = 'approved'
-        deposit.reviewed_at = timezone.now()
-        deposit.save()
+    def post(self, request, pk):
+        result = self.review_fn([pk], request.user, ip=_ip(request))[0]
+        if result['result'] not in (review.APPROVED, review.REJECTED):
+            status, detail = self.ERRORS[result['result']]
+            return Response({'detail': detail or result['detail']}, status=status)
+        return Response({'detail': self.done})
 
-        user = deposit.user
-        user.tier = deposit.tier_target
-        user.save(update_fields=['tier'])
 
-        AuditLog.log(
-            actor=request.user, action='deposit_approved', target=deposit.user, ip=_ip(request),
-            detail=f'Deposit ${deposit.amount_usd} approved — {deposit.user.email} → Plan {deposit.tier_target}'
-        )
-        return Response({'detail': 'Deposit approved.'})
+class AdminDepositApproveView(AdminReviewItemView):
+    """POST /api/v1/admin/deposits/<id>/approve/"""
+    review_fn = staticmethod(review.approve_deposits)
+    done      = 'Deposit approved.'
 
 
-class AdminDepositRejectView(APIView):
+class AdminDepositRejectView(AdminReviewItemView):
     """POST /api/v1/admin/deposits/<id>/reject/"""
-    permission_classes = [IsJuniorAdminOrAbove]
-
-    def post(self, request, pk):
-        deposit = Deposit.objects.get(pk=pk)
-        if not request.user.is_superuser and deposit.user_id not in request.user.get_downline_user_ids():
-            return Response({'detail': '⛔ Not in your downline.'}, status=403)
-        deposit.status      = 'rejected'
-        deposit.reviewed_at = timezone.now()
-        deposit.save()
-        AuditLog.log(
-            actor=request.user, action='deposit_rejected', target=deposit.user,
-            ip=_ip(request), detail=f'Deposit ${deposit.amount_usd} rejected for {deposit.user.email}'
-        )
-        return Response({'detail': 'Deposit rejected.'})
+    review_fn = staticmethod(review.reject_deposits)
+    done      = 'Deposit rejected.'
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -339,51 +366,130 @@ class AdminWithdrawalListView(generics.ListAPIView):
     serializer_class   = AdminWithdrawalSerializer
 
     def get_queryset(self):
+        withdrawals = for_serializer(Withdrawal.objects.all(), AdminWithdrawalSerializer)
         if self.request.user.is_superuser:
-            return Withdrawal.objects.all()
-        return Withdrawal.objects.filter(user_id__in=self.request.user.get_downline_user_ids())
+            return withdrawals
+        return withdrawals.filter(user_id__in=self.request.user.downline_ids())
 
 
-class AdminWithdrawalApproveView(APIView):
+class AdminWithdrawalApproveView(AdminReviewItemView):
     """POST /api/v1/admin/withdrawals/<id>/approve/"""
-    permission_classes = [IsJuniorAdminOrAbove]
-
-    def post(self, request, pk):
-        wd = Withdrawal.objects.get(pk=pk)
-        if not request.user.is_superuser and wd.user_id not in request.user.get_downline_user_ids():
-            return Response({'detail': '⛔ Not in your downline.'}, status=403)
-        if wd.status not in ['pending', 'processing']:
-            return Response({'detail': 'Already reviewed.'}, status=400)
-        wd.status = 'approved'
-        wd.reviewed_at = timezone.now()
-        wd.save()
-        AuditLog.log(
-            actor=request.user, action='withdrawal_approved', target=wd.user, ip=_ip(request),
-            detail=f'Withdrawal ${wd.amount_usdt} USDT approved for {wd.user.email}'
-        )
-        return Response({'detail': 'Withdrawal approved.'})
+    review_fn = staticmethod(review.approve_withdrawals)
+    done      = 'Withdrawal approved.'
 
 
-class AdminWithdrawalRejectView(APIView):
+class AdminWithdrawalRejectView(AdminReviewItemView):
     """POST /api/v1/admin/withdrawals/<id>/reject/"""
+    review_fn = staticmethod(review.reject_withdrawals)
+    done      = 'Withdrawal rejected.'
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Bulk review — Junior Admin and above (downline only)
+# ──────────────────────────────────────────────────────────────────────────────
+class AdminBulkReviewView(APIView):
+    """POST {"action": "approve" | "reject", "ids": [...]} — one transaction, per-item results"""
     permission_classes = [IsJuniorAdminOrAbove]
+    approve = reject = None  # apps.payments.review functions
 
-    def post(self, request, pk):
-        wd = Withdrawal.objects.get(pk=pk)
-        if not request.user.is_superuser and wd.user_id not in request.user.get_downline_user_ids():
-            return Response({'detail': '⛔ Not in your downline.'}, status=403)
-        if wd.status != 'pending':
-            return Response({'detail': 'Cannot reject at this stage.'}, status=400)
-        wd.user.balance_usdt += wd.amount_usdt
-        wd.user.save(update_fields=['balance_usdt'])
-        wd.status = 'rejected'
-        wd.reviewed_at = timezone.now()
-        wd.save()
-        AuditLog.log(
-            actor=request.user, action='withdrawal_rejected', target=wd.user, ip=_ip(request),
-            detail=f'Withdrawal ${wd.amount_usdt} USDT rejected, balance refunded to {wd.user.email}'
+    def post(self, request):
+        serializer = BulkReviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action = serializer.validated_data['action']
+        results = getattr(self, action)(serializer.validated_data['ids'], request.user, ip=_ip(request))
+        return Response({
+            'action':  action,
+            'summary': Counter(item['result'] for item in results),
+            'results': results,
+        })
+
+
+class AdminDepositBulkView(AdminBulkReviewView):
+    """POST /api/v1/admin/deposits/bulk/"""
+    approve = staticmethod(review.approve_deposits)
+    reject  = staticmethod(review.reject_deposits)
+
+
+class AdminWithdrawalBulkView(AdminBulkReviewView):
+    """POST /api/v1/admin/withdrawals/bulk/"""
+    approve = staticmethod(review.approve_withdrawals)
+    reject  = staticmethod(review.reject_withdrawals)
+
+
+class AdminFeeBulkView(AdminBulkReviewView):
+    """POST /api/v1/admin/fees/bulk/"""
+    approve = staticmethod(review.approve_fees)
+    reject  = staticmethod(review.reject_fees)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Volume Analytics — Super Admin only
+# ──────────────────────────────────────────────────────────────────────────────
+class AdminVolumeSeriesView(APIView):
+    """
+    GET /api/v1/admin/analytics/volume/<source>/ — deposit | withdrawal | earning
+
+    Query params: interval (day|week|month), start / end (YYYY-MM-DD, inclusive),
+    tier / method / status filters and group_by (tier|method|status).
+    Served from the DailyVolume rollups (apps.admin_panel.rollups) with one
+    range query on (source, day); today's figures lag by up to one refresh.
+    """
+    permission_classes = [IsSuperAdmin]
+
+    INTERVALS = {'day': None, 'week': TruncWeek, 'month': TruncMonth}
+    DEFAULT_SPAN = {'day': 30, 'week': 7 * 12, 'month': 365}
+    DIMENSIONS = ('tier', 'method', 'status')
+
+    def get(self, request, source):
+        if source not in DailyVolume.Source.values:
+            return Response({'detail': f'Unknown source. Use one of: {", ".join(DailyVolume.Source.values)}.'}, status=404)
+
+        params = request.query_params
+        interval = params.get('interval', 'day')
+        if interval not in self.INTERVALS:
+            return Response({'detail': 'interval must be day, week or month.'}, status=400)
+        group_by = params.get('group_by')
+        if group_by and group_by not in self.DIMENSIONS:
+            return Response({'detail': 'group_by must be tier, method or status.'}, status=400)
+        try:
+            end = datetime.date.fromisoformat(params['end']) if params.get('end') else timezone.localdate()
+            start = (
+                datetime.date.fromisoformat(params['start']) if params.get('start')
+                else end - datetime.timedelta(days=self.DEFAULT_SPAN[interval] - 1)
+            )
+        except ValueError:
+            return Response({'detail': 'start and end must be dates in YYYY-MM-DD format.'}, status=400)
+        if start > end:
+            return Response({'detail': 'start must not be after end.'}, status=400)
+
+        rows = DailyVolume.objects.filter(source=source, day__range=(start, end))
+        for dimension in self.DIMENSIONS:
+            if params.get(dimension):
+                rows = rows.filter(**{dimension: params[dimension]})
+
+        trunc = self.INTERVALS[interval]
+        groups = [group_by] if group_by else []
+        series = (
+            rows.order_by()
+            .values(*groups, period=trunc('day') if trunc else F('day'))
+            .annotate(n=Sum('count'), total=Sum('amount_usd'))
+            .order_by('period', *groups)
         )
-        return Response({'detail': 'Withdrawal rejected and balance refunded.'})
+        return Response({
+            'source':   source,
+            'interval': interval,
+            'start':    start,
+            'end':      end,
+            'series': [
+                {
+                    'period':     row['period'],
+                    **({group_by: row[group_by]} if group_by else {}),
+                    'count':      row['n'],
+                    'amount_usd': float(row['total']),
+                }
+                for row in series
+            ],
+        })
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -432,6 +538,26 @@ class AuditLogListView(generics.ListAPIView):
         return qs
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Broadcasts — Super Admin only
+# ──────────────────────────────────────────────────────────────────────────────
+class AdminBroadcastListView(generics.ListCreateAPIView):
+    """GET/POST /api/v1/admin/broadcasts/ — announcements shown to every user"""
+    permission_classes = [IsSuperAdmin]
+    serializer_class   = BroadcastSerializer
+
+    def get_queryset(self):
+        return Broadcast.objects.annotate(read_count=Count('receipts'))
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        serializer.instance = notify.broadcast(
+            data['title'], data['message'], type=data.get('type', 'system'), icon=data.get('icon', '📢'),
+            created_by=self.request.user,
+        )
+        serializer.instance.read_count = 0
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Tier & Exchange Rate — Super Admin only (read allowed for Junior)
 # ──────────────────────────────────────────────────────────────────────────────
@@ -446,6 +572,10 @@ class AdminTierListView(generics.ListCreateAPIView):
             return Response({'detail': '⛔ Only Super Admin can create plans.'}, status=403)
         return super().create(request, *args, **kwargs)
 
+    def perform_create(self, serializer):
+        serializer.save()
+        tier_catalogue.invalidate()
+
 
 class AdminTierDetailView(generics.RetrieveUpdateDestroyAPIView):
     """GET/PUT/DELETE /api/v1/admin/tiers/<id>/"""
@@ -455,9 +585,14 @@ class AdminTierDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def perform_update(self, serializer):
         serializer.save()
+        tier_catalogue.invalidate()
         AuditLog.log(actor=self.request.user, action='settings_changed',
                      detail=f'Mining tier updated: Plan {serializer.instance.tier_number}')
 
+    def perform_destroy(self, instance):
+        instance.delete()
+        tier_catalogue.invalidate()
+
 
 class AdminExchangeRateView(generics.RetrieveUpdateAPIView):
     """GET/PUT /api/v1/admin/exchange-rate/ — Super Admin only"""
@@ -534,7 +669,7 @@ class AdminOTPLookupView(APIView):
         import random
         import string
         from apps.users.models import EmailVerificationCode, PasswordResetCode
-        from apps.users.utils import send_verification_email, send_password_reset_email
+        from apps.users.utils import queue_verification_email, queue_password_reset_email
 
         email = request.data.get('email', '').strip().lower()
         code_type = request.data.get('type', 'verification')  # 'verification' or 'reset'
@@ -555,24 +690,24 @@ class AdminOTPLookupView(APIView):
             # Invalidate all old unused codes
             EmailVerificationCode.objects.filter(user=user, is_used=False).update(is_used=True)
             EmailVerificationCode.objects.create(user=user, code=new_code)
-            email_sent = send_verification_email(user.email, new_code)
+            email_sent = queue_verification_email(user, new_code)
             action_label = 'verification'
         else:
             PasswordResetCode.objects.filter(user=user, is_used=False).update(is_used=True)
             PasswordResetCode.objects.create(user=user, code=new_code)
-            email_sent = send_password_reset_email(user.email, new_code)
+            email_sent = queue_password_reset_email(user, new_code)
             action_label = 'password reset'
 
         AuditLog.log(
             actor=request.user,
             action='settings_changed',
-            detail=f'Admin manually resent {action_label} code to {user.email}. Email delivered: {email_sent}',
+            detail=f'Admin manually resent {action_label} code to {user.email}. Email queued: {email_sent}',
             target=user,
             ip=_ip(request)
         )
 
         return Response({
-            'detail': f'New {action_label} code generated and {"sent via email" if email_sent else "NOT sent (no email API key — check server logs)"}.',
+            'detail': f'New {action_label} code generated and {"queued for email" if email_sent else "NOT sent (no email API key — check server logs)"}.',
             'email': user.email,
             'code': new_code,   # Always return code so admin can share it manually
             'email_sent': email_sent,
@@ -2,7 +2,7 @@
 Apex Mining - Mining Admin (FIXED)
 """
 from django.contrib import admin
-from .models import MiningTier, UserMiningSession, MiningEarning
+from .models import MiningTier, UserMiningSession, MiningEarning, PayoutRun, PayoutShard
 
 
 @admin.register(MiningTier)
@@ -39,6 +39,7 @@ class MiningTierAdmin(admin.ModelAdmin):
 @admin.register(UserMiningSession)
 class UserMiningSessionAdmin(admin.ModelAdmin):
     list_display = ['user_email', 'tier', 'is_active', 'started_at', 'expires_at']
+    list_select_related = ['user']
     list_filter = ['tier', 'is_active']
     search_fields = ['user__email']
     readonly_fields = ['user', 'tier', 'started_at', 'expires_at']
@@ -60,6 +61,7 @@ class UserMiningSessionAdmin(admin.ModelAdmin):
 @admin.register(MiningEarning)
 class MiningEarningAdmin(admin.ModelAdmin):
     list_display = ['user_email', 'tier', 'amount_display', 'mined_at']
+    list_select_related = ['user']
     list_filter = ['tier', 'mined_at']
     search_fields = ['user__email']
     readonly_fields = ['user', 'tier', 'amount_usdt', 'amount_ngn', 'mined_at']
@@ -84,4 +86,29 @@ class MiningEarningAdmin(admin.ModelAdmin):
             ngn = f'{float(obj.amount_ngn):,.0f}'
             return format_html('<strong>{}</strong><br><small>≈ ₦{}</small>', usd, ngn)
         return format_html('<strong>{}</strong>', usd)
-    amount_display.short_description = 'Amount'
\ No newline at end of file
+    amount_display.short_description = 'Amount'
+
+class PayoutShardInline(admin.TabularInline):
+    model = PayoutShard
+    fields = ['index', 'status', 'users_paid', 'total_usd', 'cursor', 'finished_at']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PayoutRun)
+class PayoutRunAdmin(admin.ModelAdmin):
+    list_display = ['business_date', 'status', 'users_paid', 'total_usd', 'started_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['business_date', 'status', 'users_paid', 'total_usd', 'started_at', 'updated_at', 'finished_at']
+    inlines = [PayoutShardInline]
+    ordering = ['-business_date']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
@@ -0,0 +1,83 @@
+"""
+Apex Mining - Tier Catalogue
+
+MiningTier rows are read on almost every hot path (plan list, withdrawal
+fees, deposit approval, daily payout) but edited only by Super Admins. The
+catalogue is an immutable snapshot of every tier, cached per process and in
+Redis, and invalidated by MiningTier post_save/post_delete signals and by the
+admin tier endpoints. Read tiers through here instead of querying MiningTier.
+"""
+from decimal import Decimal
+from typing import NamedTuple
+from apex_project.cache import VersionedCache
+
+DEFAULT_EARN_PER_DAY = Decimal('1.00')
+DEFAULT_WITHDRAWAL_FEE = Decimal('10.00')
+DEFAULT_DURATION_DAYS = 14
+
+
+class Tier(NamedTuple):
+    id: int
+    tier_number: int
+    name: str
+    price_usd: Decimal
+    earn_per_24h_usd: Decimal
+    duration_days: int
+    withdrawal_fee_usd: Decimal
+    referral_reward: Decimal
+
+
+class TierCatalogue:
+    """Immutable snapshot of every MiningTier, ordered by tier number."""
+    __slots__ = ('tiers', '_by_number')
+
+    def __init__(self, tiers):
+        self.tiers = tuple(tiers)
+        self._by_number = {t.tier_number: t for t in self.tiers}
+
+    def __iter__(self):
+        return iter(self.tiers)
+
+    def get(self, tier_number):
+        """Tier for `tier_number`, or None if no such plan exists."""
+        return self._by_number.get(tier_number)
+
+    def earn_per_day(self, tier_number):
+        tier = self.get(tier_number)
+        return tier.earn_per_24h_usd if tier else DEFAULT_EARN_PER_DAY
+
+    def withdrawal_fee(self, tier_number):
+        tier = self.get(tier_number)
+        return tier.withdrawal_fee_usd if tier else DEFAULT_WITHDRAWAL_FEE
+
+    def duration_days(self, tier_number):
+        tier = self.get(tier_number)
+        return tier.duration_days if tier else DEFAULT_DURATION_DAYS
+
+    def rates(self):
+        """{tier_number: daily earnings} for every tier."""
+        return {t.tier_number: t.earn_per_24h_usd for t in self.tiers}
+
+
+def _load():
+    from .models import MiningTier
+    return TierCatalogue(
+        Tier(*row) for row in MiningTier.objects.order_by('tier_number').values_list(*Tier._fields)
+    )
+
+
+_cache = VersionedCache('mining:tiers', _load)
+
+
+def get_catalogue():
+    """Current TierCatalogue (no database query once warm)."""
+    return _cache.get()
+
+
+def get_tier(tier_number):
+    return get_catalogue().get(tier_number)
+
+
+def invalidate():
+    """Drop every cached catalogue once the current transaction commits."""
+    _cache.invalidate()
@@ -0,0 +1,67 @@
+"""
+Apex Cloud Mining — Atomic mining claim
+
+A claim is a single conditional UPDATE: it only matches while the 24h cooldown
+has passed (and the user is still on the tier the reward was priced for). It
+moves the balances with F(), stamps last_mined_at and returns the new balances
+via RETURNING. The ledger journal and the MiningEarning row are inserted in the
+same short transaction, so two concurrent taps can never both be paid.
+An expired plan is paid at the Tier 1 rate; the downgrade itself is left to
+the expiry sweep (see expiry.py).
+"""
+from datetime import timedelta
+from decimal import Decimal
+from typing import NamedTuple
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from apex_project.db import update_returning
+from apps.payments import ledger
+from apps.payments.ledger import Account, Kind
+from .catalogue import get_catalogue
+from .models import MiningEarning
+
+CLAIM_INTERVAL = timedelta(hours=24)
+NGN_RATE = 1400  # 1 USDT = 1400 NGN
+
+
+class Claim(NamedTuple):
+    tier: int
+    earned_usdt: Decimal
+    earned_ngn: Decimal
+    balance_usdt: Decimal
+    balance_ngn: Decimal
+    mined_at: object
+
+
+def claim(user, now=None):
+    """Pay `user` one mining reward. Returns a Claim, or None if the user is
+    still cooling down (or their tier changed since `user` was loaded)."""
+    from apps.users.models import User
+
+    now = now or timezone.now()
+    expired = user.tier_expiry is not None and now > user.tier_expiry
+    paid_tier = 1 if expired else user.tier
+    earned_usdt = get_catalogue().earn_per_day(paid_tier)
+    earned_ngn = earned_usdt * NGN_RATE
+
+    legs = [(user.pk, Account.MAIN, earned_usdt), (user.pk, Account.MAIN_NGN, earned_ngn)]
+    changes = ledger.projection_updates(Kind.MINING, {Account.MAIN: earned_usdt, Account.MAIN_NGN: earned_ngn})
+    changes['last_mined_at'] = now
+
+    due = User.objects.filter(pk=user.pk, tier=user.tier).filter(
+        Q(last_mined_at__isnull=True) | Q(last_mined_at__lte=now - CLAIM_INTERVAL)
+    )
+    with transaction.atomic():
+        rows = update_returning(due, ['balance_usdt', 'balance_ngn'], **changes)
+        if not rows:
+            return None
+        ledger.record(Kind.MINING, legs)
+        MiningEarning.objects.create(
+            user_id=user.pk,
+            tier=paid_tier,
+            amount_usdt=earned_usdt,
+            amount_ngn=earned_ngn,
+        )
+
+    return Claim(paid_tier, earned_usdt, earned_ngn, rows[0]['balance_usdt'], rows[0]['balance_ngn'], now)
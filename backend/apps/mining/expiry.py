@@ -0,0 +1,110 @@
+"""
+Apex Cloud Mining — Plan expiry sweep
+
+Paid plans end at User.tier_expiry (mirrored on the UserMiningSession opened
+by the deposit approval). Nothing on the request path writes the downgrade:
+readers report an expired plan as Tier 1 (see state.describe) and the
+sweep_expired_plans beat task calls sweep(), which walks the partial index on
+tier_expiry in batches:
+
+    SELECT id, tier FROM users WHERE tier_expiry < now ORDER BY tier_expiry LIMIT n
+    UPDATE users SET tier = 1, tier_expiry = NULL WHERE id IN (...) AND tier_expiry < now
+
+then closes the batch's sessions, bulk-inserts one notification per
+downgraded user and moves the admin dashboard's per-tier counters. Each pass
+only touches rows that are actually due, so the cost follows the number of
+expiring plans rather than the number of users.
+
+Every paid tier carries a tier_expiry: deposit approvals set one, admin tier
+edits set one through plans.grant(), and users migration 0022 gave one to the
+paid rows that predate both, so no plan is left outside this queue.
+"""
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from apex_project.db import update_returning
+from apps.admin_panel import stats as admin_stats
+from .catalogue import get_catalogue
+from .models import UserMiningSession
+
+
+def _notification(user_id, tier_number):
+    from apps.users.notify import build
+
+    tier = get_catalogue().get(tier_number)
+    name = tier.name if tier else f'Plan {tier_number}'
+    return build(
+        user=user_id,
+        type='tier',
+        title=f'{name} has expired',
+        message=f'Your {name} has ended. You are back on the free Plan 1 and keep earning $1.00 daily.',
+        icon='⏰',
+    )
+
+
+def _downgrade(due, expired_ids):
+    """Close sessions, notify and move counters for the `due` (id, tier) pairs
+    whose row the guarded UPDATE reset. Returns the number of paid plans ended.
+    """
+    from apps.users.notify import notify_many
+
+    downgraded = [(user_id, tier) for user_id, tier in due if user_id in expired_ids and tier > 1]
+
+    UserMiningSession.objects.filter(user_id__in=expired_ids, is_active=True).update(is_active=False)
+    notify_many(_notification(user_id, tier) for user_id, tier in downgraded)
+
+    by_tier = defaultdict(list)
+    for user_id, tier in downgraded:
+        by_tier[tier].append(user_id)
+    for tier, user_ids in by_tier.items():
+        admin_stats.record_many(user_ids, {admin_stats.tier_key(tier): -1, admin_stats.tier_key(1): 1})
+    return len(downgraded)
+
+
+def _expire_batch(now, batch_size):
+    """Downgrade one batch of due plans. Returns (plans seen, plans downgraded)."""
+    from apps.users.models import User
+
+    with transaction.atomic():
+        due = list(
+            User.objects.filter(tier_expiry__lt=now)
+            .order_by('tier_expiry')
+            .values_list('id', 'tier')[:batch_size]
+        )
+        if not due:
+            return 0, 0
+
+        # The guard skips anyone whose plan was renewed since the SELECT
+        rows = update_returning(
+            User.objects.filter(id__in=[user_id for user_id, _ in due], tier_expiry__lt=now),
+            ['id'], tier=1, tier_expiry=None,
+        )
+        return len(due), _downgrade(due, {row['id'] for row in rows})
+
+
+def _close_sessions(now, batch_size):
+    """Deactivate one batch of lapsed sessions. Returns the number closed."""
+    lapsed = UserMiningSession.objects.filter(is_active=True, expires_at__lt=now)
+    ids = list(lapsed.order_by('expires_at').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    return lapsed.filter(id__in=ids).update(is_active=False)
+
+
+def sweep(now=None, batch_size=None):
+    """Expire every plan due at `now`. Returns the number of paid plans downgraded."""
+    now = now or timezone.now()
+    batch_size = batch_size or settings.APEX_EXPIRY_BATCH_SIZE
+
+    downgraded = 0
+    while True:
+        seen, count = _expire_batch(now, batch_size)
+        downgraded += count
+        if seen < batch_size:
+            break
+
+    # Sessions whose user row was already reset (e.g. by an admin edit)
+    while _close_sessions(now, batch_size) == batch_size:
+        pass
+    return downgraded
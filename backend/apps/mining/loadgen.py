@@ -0,0 +1,426 @@
+"""
+Apex Cloud Mining — Synthetic load dataset
+
+Builds a large, reproducible dataset to measure payouts, downline scoping and
+the admin dashboards against (see `manage.py seed_load`). The same arguments
+always produce the same rows, ids included: the referral forest comes from one
+random.Random(seed), and every user's profile and history from a generator
+seeded with (seed, user index), so each table is written in its own streaming
+pass without holding the dataset in memory.
+
+- one super admin, `admins` junior admins and a forest of referral trees, each
+  rooted at an agent and up to `depth` levels deep with `fanout` referrals per
+  user on average;
+- the referral closure and nearest_agent, written directly (no signals run);
+- an opening-balance ledger journal per batch, matching the wallet columns;
+- MiningEarning history spread over `history_days`, deposits and withdrawals
+  in every status, and the paid users' mining sessions.
+
+Rows are streamed with COPY on PostgreSQL (psycopg 3) and bulk_create
+elsewhere. Every seeded user has an @load.test address; reset() removes them
+and everything that references them.
+"""
+import random
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from typing import NamedTuple
+from django.contrib.auth.hashers import make_password
+from django.db import connection, models, transaction
+from apps.payments.models import Deposit, LedgerEntry, Withdrawal
+from apps.referrals.models import ReferralClosure
+from apps.users.models import User
+from .catalogue import get_catalogue
+from .models import MiningEarning, UserMiningSession
+from .seed import create_tiers
+
+EMAIL_DOMAIN = 'load.test'
+PASSWORD = 'load-test-password'
+NGN_RATE = Decimal('1400')
+CENT = Decimal('0.01')
+
+# Relative share of users on each plan
+TIER_WEIGHTS = {1: 70, 2: 12, 3: 9, 4: 6, 5: 3}
+DEPOSIT_STATUSES = {'approved': 70, 'pending': 15, 'rejected': 15}
+WITHDRAWAL_STATUSES = {'approved': 60, 'pending': 20, 'processing': 5, 'rejected': 15}
+AUTO_PK_TYPES = ('AutoField', 'BigAutoField', 'SmallAutoField')
+
+
+class Profile(NamedTuple):
+    tier: int
+    joined: object
+    tier_expiry: object
+    last_mined_at: object
+    balance_usdt: Decimal
+    referral_balance_usdt: Decimal
+    withdrawal_fee_paid: bool
+    is_verified: bool
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _base36(n, width):
+    digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    out = ''
+    while n:
+        n, r = divmod(n, 36)
+        out = digits[r] + out
+    return out.rjust(width, '0')
+
+
+@contextmanager
+def _historical_timestamps(*model_classes):
+    """Let bulk_create keep the explicit created_at/mined_at values we generate."""
+    fields = [
+        field for model in model_classes for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _can_copy():
+    if connection.vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    return is_psycopg3
+
+
+class LoadSeeder:
+    def __init__(self, users, depth, fanout, end, admins=5, history_days=730, earnings_per_user=30,
+                 deposits_per_user=2, withdrawals_per_user=1, seed=42, batch_size=10000, log=None):
+        self.users = users
+        self.depth = depth
+        self.fanout = fanout
+        self.end = end
+        self.admins = admins
+        self.history_days = history_days
+        self.earnings_per_user = earnings_per_user
+        self.deposits_per_user = deposits_per_user
+        self.withdrawals_per_user = withdrawals_per_user
+        self.seed = seed
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.use_copy = _can_copy()
+        self._namespace = uuid.uuid5(uuid.NAMESPACE_DNS, f'{seed}.{EMAIL_DOMAIN}')
+
+    # ── Deterministic building blocks ───────────────────────────────────────
+
+    def _id(self, kind, *parts):
+        return uuid.uuid5(self._namespace, ':'.join(map(str, (kind, *parts))))
+
+    def _rng(self, kind, idx):
+        return random.Random(f'{self.seed}:{kind}:{idx}')
+
+    def _role(self, idx):
+        if idx == 0:
+            return 'super'
+        if idx <= self.admins:
+            return 'admin'
+        return 'agent' if self.parents[idx] <= self.admins else 'user'
+
+    def _nearest_agent(self, idx):
+        parent = self.parents[idx]
+        if parent is None:
+            return None
+        # Only staff and tree roots act as agents
+        return parent if parent <= self.admins or self._role(parent) == 'agent' else self.roots[parent]
+
+    def _profile(self, idx):
+        rng = self._rng('user', idx)
+        if idx <= self.admins:
+            joined = self.end - timedelta(days=self.history_days)
+            return Profile(1, joined, None, None, Decimal('0'), Decimal('0'), False, True)
+
+        tier = _weighted(rng, TIER_WEIGHTS)
+        joined = self.end - timedelta(seconds=rng.uniform(0, self.history_days * 86400))
+        tier_expiry = None
+        if tier > 1:
+            duration = self.catalogue.get(tier).duration_days
+            # A few plans are already due, so the expiry sweeper has work to do
+            tier_expiry = self.end + timedelta(seconds=rng.uniform(-2 * 86400, duration * 86400))
+        last_mined_at = self.end - timedelta(seconds=rng.uniform(0, 48 * 3600)) if rng.random() < 0.6 else None
+        return Profile(
+            tier=tier,
+            joined=joined,
+            tier_expiry=tier_expiry,
+            last_mined_at=last_mined_at,
+            balance_usdt=Decimal(rng.randint(0, 500000)) * CENT,
+            referral_balance_usdt=Decimal(rng.randint(0, 5000)) * CENT if rng.random() < 0.3 else Decimal('0'),
+            withdrawal_fee_paid=rng.random() < 0.3,
+            is_verified=rng.random() < 0.9,
+        )
+
+    def _build_forest(self):
+        """Parent index of every node: super admin, admins, then the agent trees in BFS order."""
+        parents = [None] + [0] * self.admins
+        levels = [0] * (1 + self.admins)
+        roots = list(range(1 + self.admins))
+        total = 1 + self.admins + self.users
+        queue = deque()
+        trees = 0
+        while len(parents) < total:
+            if not queue:
+                idx = len(parents)
+                parents.append(1 + trees % self.admins if self.admins else 0)
+                levels.append(0)
+                roots.append(idx)
+                queue.append(idx)
+                trees += 1
+                continue
+            node = queue.popleft()
+            if levels[node] >= self.depth:
+                continue
+            for _ in range(min(self.rng.randint(0, 2 * self.fanout), total - len(parents))):
+                idx = len(parents)
+                parents.append(node)
+                levels.append(levels[node] + 1)
+                roots.append(roots[node])
+                queue.append(idx)
+        self.parents, self.roots = parents, roots
+        self.log(f'Referral forest: {trees} agent trees, {total} users, up to {max(levels, default=0)} levels')
+
+    # ── Writers ─────────────────────────────────────────────────────────────
+
+    def _copy(self, model, batch):
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not (field.primary_key and field.get_internal_type() in AUTO_PK_TYPES)
+        ]
+        quote = connection.ops.quote_name
+        sql = f'COPY {quote(model._meta.db_table)} ({", ".join(quote(f.column) for f in fields)}) FROM STDIN'
+        with connection.cursor() as cursor:
+            with cursor.cursor.copy(sql) as copy:
+                for obj in batch:
+                    copy.write_row([field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields])
+
+    def _write(self, model, objs):
+        def flush(batch):
+            with transaction.atomic():
+                if self.use_copy:
+                    self._copy(model, batch)
+                else:
+                    model.objects.bulk_create(batch)
+
+        count = 0
+        batch = []
+        for obj in objs:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                flush(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            flush(batch)
+            count += len(batch)
+        self.log(f'{model._meta.db_table}: {count} rows')
+        return count
+
+    # ── Row generators ──────────────────────────────────────────────────────
+
+    def _user_rows(self):
+        for idx in range(len(self.parents)):
+            role = self._role(idx)
+            profile = self._profile(idx)
+            parent = self.parents[idx]
+            nearest = self._nearest_agent(idx)
+            yield User(
+                id=self._id('user', idx),
+                email=f'{role}{idx}@{EMAIL_DOMAIN}',
+                full_name=f'Load {role.title()} {idx}',
+                password=self.password,
+                referral_code='L' + _base36(idx, 7),
+                referred_by_id=self._id('user', parent) if parent is not None else None,
+                nearest_agent_id=self._id('user', nearest) if nearest is not None else None,
+                tier=profile.tier,
+                tier_expiry=profile.tier_expiry,
+                balance_usdt=profile.balance_usdt,
+                referral_balance_usdt=profile.referral_balance_usdt,
+                balance_ngn=profile.balance_usdt * NGN_RATE,
+                total_earned=profile.balance_usdt + profile.referral_balance_usdt,
+                last_mined_at=profile.last_mined_at,
+                withdrawal_fee_paid=profile.withdrawal_fee_paid,
+                is_verified=profile.is_verified,
+                is_superuser=role == 'super',
+                is_admin=role == 'admin',
+                admin_status='approved' if role == 'admin' else 'none',
+                is_agent=role == 'agent',
+                is_staff=role != 'user',
+                agent_wallet_usdt=f'TLoad{idx:029d}' if role == 'agent' else '',
+                date_joined=profile.joined,
+            )
+
+    def _closure_rows(self):
+        for idx in range(len(self.parents)):
+            descendant = self._id('user', idx)
+            ancestor, depth = idx, 0
+            while ancestor is not None:
+                yield ReferralClosure(ancestor_id=self._id('user', ancestor), descendant_id=descendant, depth=depth)
+                ancestor, depth = self.parents[ancestor], depth + 1
+
+    def _ledger_rows(self):
+        """One OPENING_BALANCE journal per batch of users, balanced per currency."""
+        reference = f'seed_load:{self.seed}'
+        for start in range(0, len(self.parents), self.batch_size):
+            journal_id = self._id('journal', start)
+            totals = {'USDT': Decimal('0'), 'NGN': Decimal('0')}
+            for idx in range(start, min(start + self.batch_size, len(self.parents))):
+                profile = self._profile(idx)
+                legs = (
+                    (LedgerEntry.Account.MAIN, 'USDT', profile.balance_usdt),
+                    (LedgerEntry.Account.REFERRAL, 'USDT', profile.referral_balance_usdt),
+                    (LedgerEntry.Account.MAIN_NGN, 'NGN', profile.balance_usdt * NGN_RATE),
+                )
+                for account, currency, amount in legs:
+                    if amount:
+                        totals[currency] += amount
+                        yield LedgerEntry(
+                            journal_id=journal_id, kind=LedgerEntry.Kind.OPENING_BALANCE,
+                            user_id=self._id('user', idx), account=account, currency=currency,
+                            amount=amount, reference=reference, created_at=self.end,
+                        )
+            for currency, total in totals.items():
+                if total:
+                    yield LedgerEntry(
+                        journal_id=journal_id, kind=LedgerEntry.Kind.OPENING_BALANCE, user_id=None,
+                        account=LedgerEntry.Account.PLATFORM, currency=currency, amount=-total,
+                        reference=reference, created_at=self.end,
+                    )
+
+    def _session_rows(self):
+        for idx in range(1 + self.admins, len(self.parents)):
+            profile = self._profile(idx)
+            if profile.tier == 1:
+                continue
+            duration = self.catalogue.get(profile.tier).duration_days
+            yield UserMiningSession(
+                id=self._id('session', idx),
+                user_id=self._id('user', idx),
+                tier=profile.tier,
+                started_at=profile.tier_expiry - timedelta(days=duration),
+                expires_at=profile.tier_expiry,
+                is_active=profile.tier_expiry > self.end,
+            )
+
+    def _earning_rows(self):
+        for idx in range(1 + self.admins, len(self.parents)):
+            profile = self._profile(idx)
+            rng = self._rng('earnings', idx)
+            days = (self.end - profile.joined).days
+            plan_start = None
+            if profile.tier > 1:
+                plan_start = profile.tier_expiry - timedelta(days=self.catalogue.get(profile.tier).duration_days)
+            for n, offset in enumerate(rng.sample(range(days), min(self.earnings_per_user, days))):
+                mined_at = self.end - timedelta(days=offset, seconds=rng.randint(0, 86399))
+                tier = profile.tier if plan_start and plan_start <= mined_at <= profile.tier_expiry else 1
+                amount = self.catalogue.earn_per_day(tier)
+                yield MiningEarning(
+                    id=self._id('earning', idx, n), user_id=self._id('user', idx), tier=tier,
+                    amount_usdt=amount, amount_ngn=amount * NGN_RATE, mined_at=mined_at,
+                )
+
+    def _deposit_rows(self):
+        for idx in range(1 + self.admins, len(self.parents)):
+            profile = self._profile(idx)
+            rng = self._rng('deposits', idx)
+            for n in range(rng.randint(0, 2 * self.deposits_per_user)):
+                tier = self.catalogue.get(rng.randint(2, 5))
+                method = rng.choice(('crypto', 'bank'))
+                status = _weighted(rng, DEPOSIT_STATUSES)
+                created_at = profile.joined + (self.end - profile.joined) * rng.random()
+                yield Deposit(
+                    id=self._id('deposit', idx, n), user_id=self._id('user', idx),
+                    tier_target=tier.tier_number, amount_usd=tier.price_usd,
+                    amount_ngn=(tier.price_usd * NGN_RATE).quantize(CENT) if method == 'bank' else None,
+                    method=method, tx_hash=f'{rng.getrandbits(256):064x}' if method == 'crypto' else '',
+                    status=status, created_at=created_at,
+                    reviewed_at=created_at + timedelta(hours=rng.uniform(0.1, 48)) if status != 'pending' else None,
+                )
+
+    def _withdrawal_rows(self):
+        for idx in range(1 + self.admins, len(self.parents)):
+            profile = self._profile(idx)
+            rng = self._rng('withdrawals', idx)
+            for n in range(rng.randint(0, 2 * self.withdrawals_per_user)):
+                amount = Decimal(rng.randint(100, 2000))
+                method = rng.choice(('crypto', 'bank'))
+                status = _weighted(rng, WITHDRAWAL_STATUSES)
+                created_at = profile.joined + (self.end - profile.joined) * rng.random()
+                reviewed_at = created_at + timedelta(hours=rng.uniform(0.1, 48)) if status != 'pending' else None
+                yield Withdrawal(
+                    id=self._id('withdrawal', idx, n), user_id=self._id('user', idx),
+                    amount_usdt=amount, amount_ngn=amount * NGN_RATE if method == 'bank' else None,
+                    method=method,
+                    wallet_address=f'TLoad{idx:020d}{n:09d}' if method == 'crypto' else '',
+                    bank_name='Load Bank' if method == 'bank' else '',
+                    account_number=f'{idx % 10 ** 10:010d}' if method == 'bank' else '',
+                    account_name=f'Load User {idx}' if method == 'bank' else '',
+                    status=status, transaction_id=f'LD{self.seed}-{idx}-{n}',
+                    created_at=created_at, reviewed_at=reviewed_at,
+                    completed_at=reviewed_at if status == 'approved' else None,
+                )
+
+    # ── Entry points ────────────────────────────────────────────────────────
+
+    def run(self):
+        create_tiers(log=self.log)
+        self.catalogue = get_catalogue()
+        self.rng = random.Random(self.seed)
+        self.password = make_password(PASSWORD, salt=f'load{self.seed}')
+        self.log(f'Writing with {"COPY" if self.use_copy else "bulk_create"}, {self.batch_size} rows per batch')
+
+        self._build_forest()
+        with _historical_timestamps(User, LedgerEntry, MiningEarning, UserMiningSession, Deposit, Withdrawal):
+            return {
+                'users': self._write(User, self._user_rows()),
+                'closure': self._write(ReferralClosure, self._closure_rows()),
+                'ledger': self._write(LedgerEntry, self._ledger_rows()),
+                'sessions': self._write(UserMiningSession, self._session_rows()),
+                'earnings': self._write(MiningEarning, self._earning_rows()),
+                'deposits': self._write(Deposit, self._deposit_rows()),
+                'withdrawals': self._write(Withdrawal, self._withdrawal_rows()),
+            }
+
+
+def seeded_users():
+    return User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}')
+
+
+def reset(log=None):
+    """Delete every @load.test user and the rows referencing them, without
+    loading them into Python (no signals run). Returns the number of users removed."""
+    log = log or (lambda message: None)
+    db = User.objects.db
+    ids = seeded_users().values('id')
+
+    with transaction.atomic():
+        for field in User._meta.many_to_many:
+            through = field.remote_field.through
+            through.objects.filter(**{f'{field.m2m_field_name()}_id__in': ids})._raw_delete(db)
+        for relation in User._meta.get_fields(include_hidden=True):
+            if not (relation.one_to_many or relation.one_to_one) or relation.concrete:
+                continue
+            model, field = relation.related_model, relation.field
+            if model is User:
+                continue
+            rows = model._base_manager.filter(**{f'{field.attname}__in': ids})
+            if field.remote_field.on_delete is models.SET_NULL:
+                rows.update(**{field.attname: None})
+            else:
+                deleted = rows._raw_delete(db)
+                if deleted:
+                    log(f'{model._meta.db_table}: {deleted} rows removed')
+        LedgerEntry.objects.filter(user__isnull=True, reference__startswith='seed_load:')._raw_delete(db)
+        removed = seeded_users()._raw_delete(db)
+    log(f'users: {removed} rows removed')
+    return removed
@@ -0,0 +1,72 @@
+"""
+Generate a large, deterministic synthetic dataset for load and query-plan testing.
+
+    python manage.py seed_load --users 1000000 --depth 12 --fanout 3 --end 2026-01-01
+    python manage.py seed_load --reset --users 50000 --seed 7 --end 2026-01-01
+    python manage.py seed_load --reset-only
+
+The same --seed and --end always produce the same rows and ids (--end
+defaults to today). Rows are streamed with COPY on PostgreSQL and
+bulk_create elsewhere; see apps.mining.loadgen for what gets generated.
+No signals run, so the admin dashboard counters are rebuilt afterwards.
+"""
+from datetime import datetime, time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.admin_panel import stats as admin_stats
+from apps.mining import loadgen
+
+
+class Command(BaseCommand):
+    help = 'Seed a large deterministic synthetic dataset (users, referral trees, earnings, payments)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='Agents and users to create (admins excluded)')
+        parser.add_argument('--depth', type=int, default=8, help='Maximum referral levels below each agent')
+        parser.add_argument('--fanout', type=int, default=3, help='Average referrals per user')
+        parser.add_argument('--admins', type=int, default=5)
+        parser.add_argument('--history-days', type=int, default=730)
+        parser.add_argument('--earnings-per-user', type=int, default=30)
+        parser.add_argument('--deposits-per-user', type=int, default=2, help='Average deposits per user')
+        parser.add_argument('--withdrawals-per-user', type=int, default=1, help='Average withdrawals per user')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--end', help='Anchor date (YYYY-MM-DD) the history runs up to; defaults to today')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--reset', action='store_true', help='Remove previously seeded load data first')
+        parser.add_argument('--reset-only', action='store_true', help='Remove previously seeded load data and exit')
+
+    def handle(self, *args, **options):
+        if options['reset'] or options['reset_only']:
+            loadgen.reset(log=self.stdout.write)
+            if options['reset_only']:
+                admin_stats.reconcile()
+                return
+        elif loadgen.seeded_users().exists():
+            raise CommandError('Load data already exists; pass --reset to replace it.')
+
+        if options['end']:
+            try:
+                end = datetime.strptime(options['end'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--end must be a date in YYYY-MM-DD format.')
+        else:
+            end = timezone.localdate()
+        end = timezone.make_aware(datetime.combine(end, time.min))
+
+        counts = loadgen.LoadSeeder(
+            users=options['users'],
+            depth=options['depth'],
+            fanout=options['fanout'],
+            end=end,
+            admins=options['admins'],
+            history_days=options['history_days'],
+            earnings_per_user=options['earnings_per_user'],
+            deposits_per_user=options['deposits_per_user'],
+            withdrawals_per_user=options['withdrawals_per_user'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        ).run()
+        admin_stats.reconcile()
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Load data seeded: {summary}'))
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.9 on 2026-10-17 17:56
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mining', '0005_miningtier_referral_reward'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_date', models.DateField(unique=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed')], default='running', max_length=10)),
+                ('cursor', models.UUIDField(blank=True, null=True, verbose_name='Last Credited User ID')),
+                ('users_paid', models.PositiveIntegerField(default=0)),
+                ('total_usd', models.DecimalField(decimal_places=8, default=Decimal('0'), max_digits=20)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Payout Run',
+                'verbose_name_plural': 'Payout Runs',
+                'db_table': 'mining_payout_runs',
+                'ordering': ['-business_date'],
+            },
+        ),
+    ]
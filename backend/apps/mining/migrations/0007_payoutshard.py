@@ -0,0 +1,42 @@
+# Generated by Django 5.1.9 on 2026-10-17 17:57
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mining', '0006_payoutrun'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='payoutrun',
+            name='cursor',
+        ),
+        migrations.CreateModel(
+            name='PayoutShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('lower_bound', models.UUIDField(blank=True, null=True)),
+                ('upper_bound', models.UUIDField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed')], default='running', max_length=10)),
+                ('cursor', models.UUIDField(blank=True, null=True, verbose_name='Last Credited User ID')),
+                ('users_paid', models.PositiveIntegerField(default=0)),
+                ('total_usd', models.DecimalField(decimal_places=8, default=Decimal('0'), max_digits=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='mining.payoutrun')),
+            ],
+            options={
+                'verbose_name': 'Payout Shard',
+                'verbose_name_plural': 'Payout Shards',
+                'db_table': 'mining_payout_shards',
+                'ordering': ['run', 'index'],
+                'unique_together': {('run', 'index')},
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.9 on 2026-10-17 18:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mining', '0007_payoutshard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userminingsession',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['expires_at'], name='mining_sess_active_exp_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.9 on 2026-10-17 18:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mining', '0008_userminingsession_active_expires_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # Build the composite indexes before dropping the single-column FK indexes they replace
+    operations = [
+        migrations.AddIndex(
+            model_name='miningearning',
+            index=models.Index(fields=['user', '-mined_at'], name='mining_earn_user_mined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userminingsession',
+            index=models.Index(fields=['user', 'is_active', '-started_at'], name='mining_sess_user_active_idx'),
+        ),
+        migrations.AlterField(
+            model_name='miningearning',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='mining_earnings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='userminingsession',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='mining_sessions', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.9 on 2026-10-17 18:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mining', '0009_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='miningearning',
+            index=models.Index(fields=['mined_at'], name='mining_earn_mined_idx'),
+        ),
+    ]
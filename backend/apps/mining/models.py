@@ -40,7 +40,10 @@ class MiningTier(models.Model):
 class UserMiningSession(models.Model):
     """Track user mining sessions"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='mining_sessions')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='mining_sessions',
+        db_index=False,  # covered by mining_sess_user_active_idx
+    )
     tier = models.PositiveIntegerField()
     started_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(null=True, blank=True)
@@ -51,6 +54,14 @@ class UserMiningSession(models.Model):
         ordering = ['-started_at']
         verbose_name = 'Mining Session'
         verbose_name_plural = 'Mining Sessions'
+        indexes = [
+            models.Index(fields=['user', 'is_active', '-started_at'], name='mining_sess_user_active_idx'),
+            # Lapsed-session queue walked by apps.mining.expiry — active sessions only
+            models.Index(
+                fields=['expires_at'], name='mining_sess_active_exp_idx',
+                condition=models.Q(is_active=True),
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user.email} - Tier {self.tier}'
@@ -59,7 +70,10 @@ class UserMiningSession(models.Model):
 class MiningEarning(models.Model):
     """Track individual mining earnings"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='mining_earnings')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='mining_earnings',
+        db_index=False,  # covered by mining_earn_user_mined_idx
+    )
     tier = models.PositiveIntegerField()
     amount_usdt = models.DecimalField(max_digits=12, decimal_places=8)
     amount_ngn = models.DecimalField(max_digits=16, decimal_places=2, null=True, blank=True)
@@ -70,6 +84,68 @@ class MiningEarning(models.Model):
         ordering = ['-mined_at']
         verbose_name = 'Mining Earning'
         verbose_name_plural = 'Mining Earnings'
+        indexes = [
+            models.Index(fields=['user', '-mined_at'], name='mining_earn_user_mined_idx'),
+            # Day ranges for apps.admin_panel.rollups
+            models.Index(fields=['mined_at'], name='mining_earn_mined_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.email} - ${self.amount_usdt}'
+
+class PayoutRun(models.Model):
+    """One daily payout, keyed by business date (Africa/Lagos).
+
+    The run is split into PayoutShards that cover disjoint user-id ranges and
+    are processed in parallel by separate Celery workers. Totals here are
+    filled in by the reducer once every shard has finished.
+    """
+    class Status(models.TextChoices):
+        RUNNING = 'running', 'Running'
+        COMPLETED = 'completed', 'Completed'
+
+    business_date = models.DateField(unique=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.RUNNING)
+    users_paid = models.PositiveIntegerField(default=0)
+    total_usd = models.DecimalField(max_digits=20, decimal_places=8, default=Decimal('0'))
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'mining_payout_runs'
+        ordering = ['-business_date']
+        verbose_name = 'Payout Run'
+        verbose_name_plural = 'Payout Runs'
+
+    def __str__(self):
+        return f'Payout {self.business_date} [{self.status}] - {self.users_paid} users'
+
+
+class PayoutShard(models.Model):
+    """A user-id range of a PayoutRun, processed by a single worker.
+
+    The shard stores the last credited user id as its cursor in the same
+    transaction that credits each chunk, so a crashed or redeployed worker
+    resumes where it stopped and re-running a date never pays anyone twice.
+    """
+    run = models.ForeignKey(PayoutRun, on_delete=models.CASCADE, related_name='shards')
+    index = models.PositiveIntegerField()
+    lower_bound = models.UUIDField(null=True, blank=True)  # inclusive; NULL = unbounded
+    upper_bound = models.UUIDField(null=True, blank=True)  # exclusive; NULL = unbounded
+    status = models.CharField(max_length=10, choices=PayoutRun.Status.choices, default=PayoutRun.Status.RUNNING)
+    cursor = models.UUIDField(null=True, blank=True, verbose_name='Last Credited User ID')
+    users_paid = models.PositiveIntegerField(default=0)
+    total_usd = models.DecimalField(max_digits=20, decimal_places=8, default=Decimal('0'))
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'mining_payout_shards'
+        ordering = ['run', 'index']
+        unique_together = [('run', 'index')]
+        verbose_name = 'Payout Shard'
+        verbose_name_plural = 'Payout Shards'
 
     def __str__(self):
-        return f'{self.user.email} - ${self.amount_usdt}'
\ No newline at end of file
+        return f'{self.run.business_date} shard {self.index} [{self.status}]'
@@ -0,0 +1,38 @@
+"""
+Apex Cloud Mining — Plans granted by an admin edit
+
+Deposit approvals start a plan in bulk (see apps.payments.review): the user
+gets a tier_expiry and a fresh UserMiningSession. An admin who sets a tier by
+hand — the admin panel user endpoint or the Django UserAdmin — goes through
+grant() after saving, so the plan they give runs until an end date and is
+ended by the expiry sweep like any other, instead of being left open-ended.
+"""
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from .catalogue import get_catalogue
+from .models import UserMiningSession
+
+
+def grant(user, tier_expiry=None, now=None):
+    """Match `user`'s plan to their just-saved tier.
+
+    A paid tier runs until `tier_expiry`, or for the tier's duration when the
+    admin gave no end date; Tier 1 is permanent. The previous session is
+    closed and, for a paid tier, a new one opened. Returns the plan's end.
+    """
+    from apps.users.models import User
+
+    now = now or timezone.now()
+    if user.tier > 1:
+        tier_expiry = tier_expiry or now + timedelta(days=get_catalogue().duration_days(user.tier))
+    else:
+        tier_expiry = None
+
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(tier_expiry=tier_expiry)
+        UserMiningSession.objects.filter(user_id=user.pk, is_active=True).update(is_active=False)
+        if user.tier > 1:
+            UserMiningSession.objects.create(user_id=user.pk, tier=user.tier, expires_at=tier_expiry, is_active=True)
+    user.tier_expiry = tier_expiry
+    return tier_expiry
@@ -0,0 +1,14 @@
+"""
+Apex Mining - Mining Signals
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import catalogue
+from .models import MiningTier
+
+
+@receiver(post_save, sender=MiningTier)
+@receiver(post_delete, sender=MiningTier)
+def invalidate_tier_catalogue(sender, **kwargs):
+    catalogue.invalidate()
+
@@ -0,0 +1,59 @@
+"""
+Apex Cloud Mining — Per-user mining state
+
+The mining screen and dashboard poll for "can I mine yet?" many times a
+minute. Everything they show (cooldown, countdown, effective tier) is derived
+at read time from the request user's tier, tier_expiry and last_mined_at,
+which authentication has already loaded, so a poll costs no extra query; only
+the tier rates come from a cache (see catalogue.py). Readers never write: a
+plan that has expired but not yet been swept is simply reported as Tier 1.
+"""
+from django.utils import timezone
+from .catalogue import get_catalogue
+
+CLAIM_INTERVAL_SECONDS = 24 * 60 * 60
+
+
+def of(user):
+    """The state inputs of an already-loaded user."""
+    return {'tier': user.tier, 'tier_expiry': user.tier_expiry, 'last_mined_at': user.last_mined_at}
+
+
+def describe(state, now=None):
+    """Everything the client shows, derived from a state dict (see of())."""
+    now = now or timezone.now()
+    tier_expiry = state['tier_expiry']
+    last_mined_at = state['last_mined_at']
+
+    is_expired = tier_expiry is not None and now > tier_expiry
+    tier = 1 if is_expired else state['tier']
+
+    remaining_seconds = 0
+    if last_mined_at:
+        elapsed = (now - last_mined_at).total_seconds()
+        remaining_seconds = max(0, int(CLAIM_INTERVAL_SECONDS - elapsed))
+
+    countdown = None
+    if tier_expiry and state['tier'] != 1:
+        if is_expired:
+            countdown = {'expired': True, 'days': 0, 'hours': 0, 'minutes': 0, 'total_seconds': 0}
+        else:
+            diff = tier_expiry - now
+            countdown = {
+                'expired': False,
+                'days': diff.days,
+                'hours': diff.seconds // 3600,
+                'minutes': (diff.seconds % 3600) // 60,
+                'total_seconds': int(diff.total_seconds()),
+            }
+
+    return {
+        'tier': tier,
+        'tier_expiry': None if is_expired else tier_expiry,
+        'is_expired': is_expired,
+        'last_mined_at': last_mined_at,
+        'can_mine': remaining_seconds == 0,
+        'remaining_seconds': remaining_seconds,
+        'earn_per_day': get_catalogue().earn_per_day(tier),
+        'tier_expiry_countdown': countdown,
+    }
@@ -5,86 +5,210 @@ Runs every day at midnight (Africa/Lagos).
 ALL users earn every day:
 - Tier 1 (free, permanent): $1.00/day — ALWAYS active, never expires
 - Tier 2–5: their plan rate for duration of their plan
+
+The payout is set-based: tier rates are loaded once, expired plans are
+downgraded by the indexed expiry sweep (apps.mining.expiry), and balances
+are credited per tier as one ledger journal (a single F() UPDATE plus
+bulk-inserted entries).
+
+Every run is recorded as a PayoutRun keyed by business date and split into
+APEX_PAYOUT_SHARDS user-id ranges. `distribute_daily_earnings` fans the shards
+out as a Celery chord: each `payout_shard` task walks its range in bounded
+chunks, advancing the shard cursor in the same short transaction that credits
+each chunk, and `finalize_payout_run` aggregates the shard totals. A crashed
+worker resumes where it stopped and a repeated run for the same date never
+double-credits.
 """
-from celery import shared_task
+from collections import defaultdict
+from decimal import Decimal
+import datetime
+import uuid
+from celery import chord, shared_task
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Sum
 from django.utils import timezone
-from django.db import transaction
 import logging
 
 logger = logging.getLogger(__name__)
 
+TIER_1_RATE = Decimal('1.00')
 
-@shared_task(name='distribute_daily_earnings')
-def distribute_daily_earnings():
+
+def _load_tier_rates():
+    """Daily rate per tier number, read once per run."""
+    from apps.mining.catalogue import get_catalogue
+
+    rates = get_catalogue().rates()
+    rates[1] = TIER_1_RATE  # Tier 1 is free and permanent — always $1/day
+    return rates
+
+
+def _expire_plans(now):
+    """Downgrade every paid plan that expired by `now` to permanent Tier 1."""
+    from apps.mining import expiry
+
+    return expiry.sweep(now)
+
+
+def _shard_bounds(count):
+    """Split the UUID space into `count` contiguous [lower, upper) ranges."""
+    edges = [uuid.UUID(int=(i << 128) // count) for i in range(1, count)]
+    lowers = [None] + edges
+    uppers = edges + [None]
+    return list(zip(lowers, uppers))
+
+
+def _pay_chunk(shard_id, rates, chunk_size):
+    """Credit the next `chunk_size` users of a shard after its cursor.
+
+    The PayoutShard row is locked for the duration of the chunk, and the
+    cursor and totals are advanced in the same transaction as the credits.
+    Returns the number of users paid (0 once the shard is exhausted).
+    """
     from apps.users.models import User
-    from apps.mining.models import MiningEarning, MiningTier, UserMiningSession
+    from apps.mining.models import MiningEarning, PayoutRun, PayoutShard
+    from apps.payments import ledger
+    from apps.payments.ledger import Kind
+
+    with transaction.atomic():
+        shard = PayoutShard.objects.select_for_update().select_related('run').get(pk=shard_id)
+        if shard.status == PayoutRun.Status.COMPLETED:
+            return 0
+
+        users = User.objects.filter(is_active=True, date_joined__lte=shard.run.started_at)
+        if shard.lower_bound is not None:
+            users = users.filter(id__gte=shard.lower_bound)
+        if shard.upper_bound is not None:
+            users = users.filter(id__lt=shard.upper_bound)
+        if shard.cursor is not None:
+            users = users.filter(id__gt=shard.cursor)
+        rows = list(users.order_by('id').values_list('id', 'tier')[:chunk_size])
+        if not rows:
+            shard.status      = PayoutRun.Status.COMPLETED
+            shard.finished_at = timezone.now()
+            shard.save(update_fields=['status', 'finished_at', 'updated_at'])
+            return 0
+
+        ids_by_tier = defaultdict(list)
+        for user_id, tier in rows:
+            ids_by_tier[tier].append(user_id)
+
+        earnings = []
+        total = Decimal('0')
+        for tier, user_ids in ids_by_tier.items():
+            rate = rates.get(tier, TIER_1_RATE)
+            ledger.credit_many(
+                Kind.PAYOUT, rate, user_ids,
+                reference=f'payout:{shard.run.business_date.isoformat()}',
+            )
+            earnings.extend(
+                MiningEarning(user_id=user_id, tier=tier, amount_usdt=rate)
+                for user_id in user_ids
+            )
+            total += rate * len(user_ids)
+
+        MiningEarning.objects.bulk_create(earnings, batch_size=1000)
+
+        shard.cursor      = rows[-1][0]
+        shard.users_paid += len(rows)
+        shard.total_usd  += total
+        shard.save(update_fields=['cursor', 'users_paid', 'total_usd', 'updated_at'])
 
-    now     = timezone.now()
-    count   = 0
-    total   = 0
+    return len(rows)
+
+
+def _summary(run):
+    return {
+        'business_date': run.business_date.isoformat(),
+        'status':        run.status,
+        'users_paid':    run.users_paid,
+        'total_usd':     float(run.total_usd),
+    }
+
+
+@shared_task(
+    name='payout_shard',
+    acks_late=True,
+    autoretry_for=(DatabaseError,),
+    retry_backoff=True,
+    max_retries=5,
+)
+def payout_shard(run_id, index):
+    """Pay every user in one shard of a run; returns the shard's summary."""
+    from apps.mining.models import PayoutShard
+
+    shard = PayoutShard.objects.get(run_id=run_id, index=index)
+    rates = _load_tier_rates()
+    while _pay_chunk(shard.pk, rates, settings.APEX_PAYOUT_CHUNK_SIZE):
+        pass
+
+    shard.refresh_from_db()
+    logger.info(f'[Mining] Shard {index} of run {run_id}: ${shard.total_usd:.2f} USDT to {shard.users_paid} users')
+    return {'shard': index, 'users_paid': shard.users_paid, 'total_usd': float(shard.total_usd)}
+
+
+@shared_task(name='finalize_payout_run')
+def finalize_payout_run(shard_results, run_id):
+    """Chord reducer: roll the shard totals up into the PayoutRun."""
+    from apps.mining.models import PayoutRun
 
     with transaction.atomic():
-        # All active users
-        users = User.objects.filter(is_active=True).select_for_update()
-
-        for user in users:
-            earn_amount = None
-
-            # --- Tier 1 (free/permanent) ALWAYS earns $1/day, NEVER expires ---
-            if user.tier == 1:
-                earn_amount = 1.00
-                # Ensure tier_expiry is None (permanent)
-                if user.tier_expiry is not None:
-                    user.tier_expiry = None
-                    user.save(update_fields=['tier_expiry'])
-
-            else:
-                # Paid tiers: check if session is still active
-                session = UserMiningSession.objects.filter(
-                    user=user, is_active=True
-                ).order_by('-started_at').first()
-
-                if session:
-                    if session.expires_at and now > session.expires_at:
-                        # Session expired — downgrade to Tier 1 (permanent)
-                        session.is_active = False
-                        session.save()
-                        user.tier = 1
-                        user.tier_expiry = None  # Tier 1 is PERMANENT
-                        user.save(update_fields=['tier', 'tier_expiry'])
-                        # Still earn Tier 1 rate
-                        earn_amount = 1.00
-                        logger.info(f'[Mining] User {user.email} tier expired, reset to Tier 1 (permanent)')
-                    else:
-                        # Active paid tier — earn their rate
-                        try:
-                            tier_obj = MiningTier.objects.get(tier_number=user.tier)
-                            earn_amount = float(tier_obj.earn_per_24h_usd)
-                        except MiningTier.DoesNotExist:
-                            earn_amount = 1.00
-                else:
-                    # No session (shouldn't happen for paid tiers but handle it)
-                    # Reset to Tier 1 permanent
-                    user.tier = 1
-                    user.tier_expiry = None
-                    user.save(update_fields=['tier', 'tier_expiry'])
-                    earn_amount = 1.00
-
-            if earn_amount is not None:
-                # Credit user balance
-                user.balance_usdt  = float(user.balance_usdt or 0) + earn_amount
-                user.total_earned  = float(user.total_earned  or 0) + earn_amount
-                user.save(update_fields=['balance_usdt', 'total_earned'])
-
-                # Log the earning
-                MiningEarning.objects.create(
-                    user       = user,
-                    amount_usd = earn_amount,
-                    tier       = user.tier,
-                    earned_at  = now,
-                )
-                count += 1
-                total += earn_amount
-
-    logger.info(f'[Mining] Distributed ${total:.2f} USDT to {count} users (all Tier 1 users earn permanently)')
-    return {'users_paid': count, 'total_usd': total}
\ No newline at end of file
+        run = PayoutRun.objects.select_for_update().get(pk=run_id)
+        totals = run.shards.aggregate(users=Sum('users_paid'), usd=Sum('total_usd'))
+        run.users_paid = totals['users'] or 0
+        run.total_usd  = totals['usd'] or Decimal('0')
+        if not run.shards.exclude(status=PayoutRun.Status.COMPLETED).exists():
+            run.status      = PayoutRun.Status.COMPLETED
+            run.finished_at = timezone.now()
+        run.save(update_fields=['users_paid', 'total_usd', 'status', 'finished_at', 'updated_at'])
+
+    logger.info(
+        f'[Mining] Distributed ${run.total_usd:.2f} USDT to {run.users_paid} users for '
+        f'{run.business_date} across {len(shard_results)} shard(s) (all Tier 1 users earn permanently)'
+    )
+    return _summary(run)
+
+
+@shared_task(name='distribute_daily_earnings')
+def distribute_daily_earnings(business_date=None):
+    """Fan the payout for `business_date` (ISO date, default today in Lagos) out to the workers."""
+    from apps.mining.models import PayoutRun, PayoutShard
+
+    if business_date is None:
+        business_date = timezone.localdate()  # TIME_ZONE is Africa/Lagos
+    else:
+        business_date = datetime.date.fromisoformat(str(business_date))
+
+    run, created = PayoutRun.objects.get_or_create(business_date=business_date)
+    if run.status == PayoutRun.Status.COMPLETED:
+        logger.info(f'[Mining] Payout for {business_date} already completed — skipping')
+        return _summary(run)
+
+    if created or not run.shards.exists():
+        PayoutShard.objects.bulk_create(
+            [
+                PayoutShard(run=run, index=index, lower_bound=lower, upper_bound=upper)
+                for index, (lower, upper) in enumerate(_shard_bounds(settings.APEX_PAYOUT_SHARDS))
+            ],
+            ignore_conflicts=True,
+        )
+    else:
+        logger.warning(f'[Mining] Resuming payout for {business_date}')
+
+    downgraded = _expire_plans(timezone.now())
+    if downgraded:
+        logger.info(f'[Mining] {downgraded} expired plan(s) reset to Tier 1 (permanent)')
+
+    pending = run.shards.exclude(status=PayoutRun.Status.COMPLETED).values_list('index', flat=True)
+    chord(payout_shard.s(run.pk, index) for index in pending)(finalize_payout_run.s(run.pk))
+    return _summary(run)
+
+
+@shared_task(name='sweep_expired_plans')
+def sweep_expired_plans():
+    """Downgrade expired plans between payouts so read paths never have to."""
+    downgraded = _expire_plans(timezone.now())
+    if downgraded:
+        logger.info(f'[Mining] Sweeper reset {downgraded} expired plan(s) to Tier 1')
+    return downgraded
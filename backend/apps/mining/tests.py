@@ -1,3 +1,377 @@
-from django.test import TestCase
+import datetime
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from types import SimpleNamespace
+from django.apps import apps as django_apps
+from django.contrib.admin import site
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from config.celery import app as celery_app
+from apex_project.testing import QueryPlanMixin
+from apps.payments import ledger
+from apps.payments.models import LedgerEntry
+from apps.referrals.models import ReferralClosure
+from apps.users.models import Notification, User
+from . import catalogue, claims, expiry, loadgen, tasks
+from .catalogue import get_catalogue
+from .models import MiningEarning, MiningTier, PayoutRun, PayoutShard, UserMiningSession
 
-# Create your tests here.
+
+class HotQueryIndexTests(QueryPlanMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='miner@example.com', password='x', full_name='Miner')
+
+    def test_earning_history_uses_user_mined_index(self):
+        qs = MiningEarning.objects.filter(user=self.user).order_by('-mined_at')[:50]
+        self.assertUsesIndex(qs, 'mining_earn_user_mined_idx')
+
+    def test_active_session_lookup_uses_user_active_index(self):
+        qs = UserMiningSession.objects.filter(user=self.user, is_active=True).order_by('-started_at')[:1]
+        self.assertUsesIndex(qs, 'mining_sess_user_active_idx')
+
+
+class CatalogueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(email='super@example.com', password='x'))
+
+    def version(self):
+        return catalogue._cache.version()
+
+    def test_warm_reads_run_no_queries(self):
+        get_catalogue()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_catalogue().get(2).tier_number, 2)
+            catalogue.get_tier(3)
+            get_catalogue().earn_per_day(4)
+            tasks._load_tier_rates()
+
+    def test_model_writes_bump_the_version(self):
+        before = self.version()
+        tier = MiningTier.objects.get(tier_number=2)
+        get_catalogue()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tier.earn_per_24h_usd = Decimal('55.00')
+            tier.save()
+        self.assertGreater(self.version(), before)
+        self.assertEqual(get_catalogue().earn_per_day(2), Decimal('55.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tier.delete()
+        self.assertIsNone(get_catalogue().get(2))
+
+    def test_admin_tier_endpoints_bump_the_version(self):
+        get_catalogue()
+        plan = {
+            'tier_number': 6, 'name': 'Plan 6', 'price_usd': '999.00', 'earn_per_24h_usd': '1500.00',
+            'duration_days': 30, 'withdrawal_fee_usd': '30.00',
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/admin/tiers/', plan, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(get_catalogue().get(6).name, 'Plan 6')
+
+        pk = response.data['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/v1/admin/tiers/{pk}/', {'name': 'Plan Six'}, format='json')
+        self.assertEqual(get_catalogue().get(6).name, 'Plan Six')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/v1/admin/tiers/{pk}/')
+        self.assertIsNone(get_catalogue().get(6))
+
+
+class ExpirySweepTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def user(self, email, tier, expiry=None, session=False):
+        user = User.objects.create_user(email=email, password='x', tier=tier, tier_expiry=expiry)
+        if session:
+            UserMiningSession.objects.create(user=user, tier=tier, expires_at=expiry, is_active=True)
+        return user
+
+    def test_downgrades_due_plans(self):
+        lapsed = self.user('lapsed@example.com', 3, self.now - timedelta(hours=1), session=True)
+        renewed = self.user('renewed@example.com', 4, self.now + timedelta(days=3), session=True)
+        free = self.user('free@example.com', 1)
+
+        self.assertEqual(expiry.sweep(self.now, batch_size=1), 1)
+
+        tiers = dict(User.objects.values_list('email', 'tier'))
+        self.assertEqual(tiers[lapsed.email], 1)
+        self.assertEqual(tiers[renewed.email], 4)
+        self.assertEqual(tiers[free.email], 1)
+        self.assertFalse(UserMiningSession.objects.filter(user=lapsed, is_active=True).exists())
+        self.assertEqual(list(Notification.objects.filter(type='tier').values_list('user_id', flat=True)), [lapsed.pk])
+
+        # Nothing is left due, so a second pass is a no-op
+        self.assertEqual(expiry.sweep(self.now), 0)
+        self.assertEqual(Notification.objects.filter(type='tier').count(), 1)
+
+    def test_admin_granted_plan_runs_until_its_end_date(self):
+        admin = User.objects.create_superuser(email='super@example.com', password='x')
+        granted = self.user('granted@example.com', 1)
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        response = client.patch(f'/api/v1/admin/users/{granted.pk}/', {'tier': 3}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        granted.refresh_from_db()
+        duration = timedelta(days=get_catalogue().duration_days(3))
+        self.assertAlmostEqual(granted.tier_expiry, self.now + duration, delta=timedelta(minutes=1))
+        session = UserMiningSession.objects.get(user=granted, is_active=True)
+        self.assertEqual((session.tier, session.expires_at), (3, granted.tier_expiry))
+
+        self.assertEqual(expiry.sweep(self.now + timedelta(hours=1)), 0)
+        self.assertEqual(expiry.sweep(granted.tier_expiry + timedelta(seconds=1)), 1)
+        granted.refresh_from_db()
+        self.assertEqual((granted.tier, granted.tier_expiry), (1, None))
+
+    def test_django_admin_tier_edit_grants_a_plan(self):
+        admin = User.objects.create_superuser(email='super@example.com', password='x')
+        granted = self.user('granted@example.com', 1)
+        user_admin = site._registry[User]
+        end = self.now + timedelta(days=3)
+
+        granted.tier, granted.tier_expiry = 4, end
+        form = SimpleNamespace(changed_data=['tier', 'tier_expiry'], cleaned_data={'tier': 4, 'tier_expiry': end})
+        user_admin.save_model(SimpleNamespace(user=admin), granted, form, change=True)
+        self.assertEqual(UserMiningSession.objects.get(user=granted, is_active=True).expires_at, end)
+
+        granted.tier = 1
+        user_admin.save_model(SimpleNamespace(user=admin), granted, SimpleNamespace(changed_data=['tier'], cleaned_data={'tier': 1}), change=True)
+        granted.refresh_from_db()
+        self.assertIsNone(granted.tier_expiry)
+        self.assertFalse(UserMiningSession.objects.filter(user=granted, is_active=True).exists())
+
+    def test_migration_gives_open_ended_plans_an_end_date(self):
+        migration = import_module('apps.users.migrations.0022_user_end_open_ended_plans')
+        session_end = self.now + timedelta(days=5)
+        running = self.user('running@example.com', 2)
+        UserMiningSession.objects.create(user=running, tier=2, expires_at=session_end, is_active=True)
+        granted = self.user('granted@example.com', 4)
+
+        migration.end_open_ended_plans(django_apps, None)
+
+        running.refresh_from_db()
+        granted.refresh_from_db()
+        self.assertEqual(running.tier_expiry, session_end)
+        self.assertAlmostEqual(
+            granted.tier_expiry, self.now + timedelta(days=get_catalogue().duration_days(4)), delta=timedelta(minutes=1),
+        )
+        self.assertEqual(UserMiningSession.objects.get(user=granted, is_active=True).expires_at, granted.tier_expiry)
+        # Both are now in the expiry queue, and neither is due yet
+        self.assertEqual(expiry.sweep(self.now), 0)
+
+    def test_closes_lapsed_sessions_of_reset_users(self):
+        user = self.user('reset@example.com', 1)
+        UserMiningSession.objects.create(user=user, tier=3, expires_at=self.now - timedelta(days=1), is_active=True)
+
+        self.assertEqual(expiry.sweep(self.now), 0)
+        self.assertFalse(UserMiningSession.objects.filter(user=user, is_active=True).exists())
+
+
+@override_settings(APEX_PAYOUT_SHARDS=3, APEX_PAYOUT_CHUNK_SIZE=2)
+class DailyPayoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        expires = timezone.now() + timedelta(days=5)
+        cls.free = [User.objects.create_user(email=f'free{i}@example.com', password='x') for i in range(5)]
+        cls.paid = [
+            User.objects.create_user(email=f'paid{i}@example.com', password='x', tier=3, tier_expiry=expires)
+            for i in range(2)
+        ]
+        for user in cls.paid:
+            UserMiningSession.objects.create(user=user, tier=3, expires_at=expires, is_active=True)
+        cls.users = cls.free + cls.paid
+
+    def setUp(self):
+        cache.clear()
+        self.rates = tasks._load_tier_rates()
+        # Run the chord in-process, as a worker would
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', celery_app.conf.task_always_eager)
+        celery_app.conf.task_always_eager = True
+
+    def earned(self):
+        return dict(User.objects.filter(pk__in=[u.pk for u in self.users]).values_list('email', 'balance_usdt'))
+
+    def assertPaidOnce(self):
+        self.assertEqual(MiningEarning.objects.count(), len(self.users))
+        expected = {u.email: self.rates[1] for u in self.free} | {u.email: self.rates[3] for u in self.paid}
+        self.assertEqual(self.earned(), expected)
+        call_command('audit_ledger', '--journals', stdout=StringIO())
+
+    def test_credits_every_user_at_their_tier_rate(self):
+        tasks.distribute_daily_earnings('2026-03-01')
+
+        self.assertPaidOnce()
+        run = PayoutRun.objects.get(business_date=datetime.date(2026, 3, 1))
+        self.assertEqual(run.status, PayoutRun.Status.COMPLETED)
+        self.assertEqual(run.users_paid, len(self.users))
+        self.assertEqual(run.total_usd, self.rates[1] * len(self.free) + self.rates[3] * len(self.paid))
+        self.assertEqual(run.shards.count(), 3)
+        self.assertFalse(run.shards.exclude(status=PayoutRun.Status.COMPLETED).exists())
+        self.assertEqual(set(LedgerEntry.objects.filter(user__isnull=False).values_list('reference', flat=True)), {'payout:2026-03-01'})
+
+    def test_rerunning_a_completed_date_pays_nothing(self):
+        tasks.distribute_daily_earnings('2026-03-01')
+        entries = LedgerEntry.objects.count()
+
+        summary = tasks.distribute_daily_earnings('2026-03-01')
+
+        self.assertEqual(summary['users_paid'], len(self.users))
+        self.assertEqual(LedgerEntry.objects.count(), entries)
+        self.assertPaidOnce()
+
+    def test_shard_resumes_from_its_cursor(self):
+        run = PayoutRun.objects.create(business_date=datetime.date(2026, 3, 2))
+        shard = PayoutShard.objects.create(run=run, index=0)  # unbounded: every user
+
+        # A worker paid one chunk, then died
+        self.assertEqual(tasks._pay_chunk(shard.pk, self.rates, 2), 2)
+        shard.refresh_from_db()
+        self.assertEqual(shard.users_paid, 2)
+        self.assertEqual(shard.cursor, sorted(u.pk for u in self.users)[1])
+        self.assertEqual(MiningEarning.objects.count(), 2)
+
+        result = tasks.payout_shard(run.pk, 0)
+
+        self.assertEqual(result['users_paid'], len(self.users))
+        self.assertPaidOnce()
+        shard.refresh_from_db()
+        self.assertEqual(shard.status, PayoutRun.Status.COMPLETED)
+        # A redelivered task finds the shard done
+        self.assertEqual(tasks._pay_chunk(shard.pk, self.rates, 2), 0)
+        self.assertEqual(MiningEarning.objects.count(), len(self.users))
+
+    def test_finalize_rolls_shard_totals_into_the_run(self):
+        run = PayoutRun.objects.create(business_date=datetime.date(2026, 3, 3))
+        PayoutShard.objects.bulk_create([
+            PayoutShard(run=run, index=0, users_paid=4, total_usd=Decimal('4'), status=PayoutRun.Status.COMPLETED),
+            PayoutShard(run=run, index=1, users_paid=3, total_usd=Decimal('262'), status=PayoutRun.Status.RUNNING),
+        ])
+
+        summary = tasks.finalize_payout_run([{}, {}], run.pk)
+
+        run.refresh_from_db()
+        self.assertEqual((run.users_paid, run.total_usd), (7, Decimal('266')))
+        self.assertEqual(summary['status'], PayoutRun.Status.RUNNING)  # a shard is still running
+        self.assertIsNone(run.finished_at)
+
+        run.shards.update(status=PayoutRun.Status.COMPLETED)
+        self.assertEqual(tasks.finalize_payout_run([{}, {}], run.pk)['status'], PayoutRun.Status.COMPLETED)
+        run.refresh_from_db()
+        self.assertIsNotNone(run.finished_at)
+
+
+class ClaimTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        self.user = User.objects.create_user(
+            email='claimer@example.com', password='x', tier=2, tier_expiry=self.now + timedelta(days=3),
+        )
+
+    def rows(self):
+        return LedgerEntry.objects.count(), MiningEarning.objects.count()
+
+    def test_pays_once_per_interval(self):
+        paid = claims.claim(self.user, now=self.now)
+
+        self.assertEqual(paid.tier, 2)
+        self.assertEqual(paid.earned_usdt, get_catalogue().earn_per_day(2))
+        self.assertEqual(paid.balance_usdt, paid.earned_usdt)
+        self.assertEqual(self.rows(), (4, 1))  # USDT and NGN legs, a platform leg each
+
+        self.assertIsNone(claims.claim(self.user, now=self.now + timedelta(hours=23)))
+        self.assertEqual(self.rows(), (4, 1))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance_usdt, paid.earned_usdt)
+
+        self.assertIsNotNone(claims.claim(self.user, now=self.now + claims.CLAIM_INTERVAL))
+        self.assertEqual(self.rows(), (8, 2))
+        call_command('audit_ledger', '--journals', stdout=StringIO())
+
+    def test_stale_tier_is_not_paid(self):
+        stale = User.objects.get(pk=self.user.pk)
+        User.objects.filter(pk=self.user.pk).update(tier=4)
+
+        self.assertIsNone(claims.claim(stale, now=self.now))
+        self.assertEqual(self.rows(), (0, 0))
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.balance_usdt, self.user.last_mined_at), (Decimal('0'), None))
+
+    def test_expired_plan_is_paid_at_the_tier_1_rate(self):
+        paid = claims.claim(self.user, now=self.now + timedelta(days=4))
+
+        self.assertEqual((paid.tier, paid.earned_usdt), (1, get_catalogue().earn_per_day(1)))
+        self.assertEqual(MiningEarning.objects.get().tier, 1)
+
+
+class SeedLoadTests(TestCase):
+    ARGS = ['--users', '60', '--depth', '4', '--fanout', '2', '--admins', '2', '--history-days', '30',
+            '--earnings-per-user', '3', '--end', '2026-01-01', '--batch-size', '25']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.keeper = User.objects.create_user(email='keeper@example.com', password='x')
+        ledger.credit(cls.keeper.pk, Decimal('5'), ledger.Kind.ADJUSTMENT)
+
+    def setUp(self):
+        cache.clear()
+
+    def seed(self, *args):
+        call_command('seed_load', *self.ARGS, *args, stdout=StringIO())
+
+    def snapshot(self):
+        ids = sorted(loadgen.seeded_users().values_list('id', flat=True))
+        return {
+            'ids': ids,
+            'closure': set(ReferralClosure.objects.filter(descendant_id__in=ids).values_list(
+                'ancestor_id', 'descendant_id', 'depth',
+            )),
+            'balances': set(loadgen.seeded_users().values_list(
+                'id', 'balance_usdt', 'referral_balance_usdt', 'balance_ngn', 'nearest_agent_id',
+            )),
+        }
+
+    def test_same_seed_reproduces_the_dataset(self):
+        self.seed('--seed', '7')
+        first = self.snapshot()
+        self.assertEqual(len(first['ids']), 63)
+        self.assertGreater(len(first['closure']), len(first['ids']))
+        call_command('audit_ledger', '--journals', stdout=StringIO())
+
+        self.seed('--seed', '7', '--reset')
+        self.assertEqual(self.snapshot(), first)
+        call_command('audit_ledger', '--journals', stdout=StringIO())
+
+        self.seed('--seed', '8', '--reset')
+        self.assertFalse(set(first['ids']) & set(self.snapshot()['ids']))
+
+    def test_reset_removes_only_load_rows(self):
+        self.seed('--seed', '7')
+        self.assertTrue(LedgerEntry.objects.filter(reference='seed_load:7').exists())
+
+        call_command('seed_load', '--reset-only', stdout=StringIO())
+
+        self.assertFalse(loadgen.seeded_users().exists())
+        self.assertFalse(LedgerEntry.objects.filter(reference__startswith='seed_load:').exists())
+        self.assertFalse(MiningEarning.objects.exists())
+        self.assertEqual(list(User.objects.values_list('email', flat=True)), ['keeper@example.com'])
+        self.assertEqual(
+            list(ReferralClosure.objects.values_list('ancestor_id', 'descendant_id')),
+            [(self.keeper.pk, self.keeper.pk)],
+        )
+        self.assertEqual(LedgerEntry.objects.filter(user=self.keeper).get().amount, Decimal('5'))
+        call_command('audit_ledger', '--journals', stdout=StringIO())
@@ -8,19 +8,20 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
 from datetime import timedelta
-from decimal import Decimal
-from .models import MiningTier, UserMiningSession, MiningEarning
+from . import claims, state as mining_state
+from .catalogue import get_catalogue
+from .models import MiningEarning
 
-# Earnings per plan (24 hours)
-EARN_PER_DAY = {
-    1: Decimal('1.00'),
-    2: Decimal('50.00'),
-    3: Decimal('130.00'),
-    4: Decimal('399.00'),
-    5: Decimal('699.00'),
-}
 
-NGN_RATE = 1400  # 1 USDT = 1400 NGN
+def _cooldown_response(last_mined_at, now):
+    remaining = claims.CLAIM_INTERVAL - (now - last_mined_at)
+    hours = int(remaining.total_seconds() // 3600)
+    minutes = int((remaining.total_seconds() % 3600) // 60)
+    return Response({
+        'detail': f'Please wait {hours}h {minutes}m before mining again',
+        'can_mine': False,
+        'remaining_seconds': int(remaining.total_seconds())
+    }, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['POST'])
@@ -32,89 +33,42 @@ def mine(request):
     user = request.user
     now = timezone.now()
     
-    # Check if user can mine
-    if user.last_mined_at:
-        time_since_last_mine = now - user.last_mined_at
-        if time_since_last_mine < timedelta(hours=24):
-            remaining = timedelta(hours=24) - time_since_last_mine
-            hours = int(remaining.total_seconds() // 3600)
-            minutes = int((remaining.total_seconds() % 3600) // 60)
-            return Response({
-                'detail': f'Please wait {hours}h {minutes}m before mining again',
-                'can_mine': False,
-                'remaining_seconds': int(remaining.total_seconds())
-            }, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Check if plan is active
-    if user.tier_expiry and now > user.tier_expiry:
-        # Plan expired - Revert to Tier 1
-        user.tier = 1
-        user.tier_expiry = None
-        user.save(update_fields=['tier', 'tier_expiry'])
-    
-    # Get earnings for current tier
-    earn_amount_usd = EARN_PER_DAY.get(user.tier, Decimal('1.00'))
-    earn_amount_ngn = earn_amount_usd * NGN_RATE
+    # Cheap pre-check on the already-loaded user; the claim itself re-checks atomically
+    if user.last_mined_at and now - user.last_mined_at < claims.CLAIM_INTERVAL:
+        return _cooldown_response(user.last_mined_at, now)
     
-    # Update user balance
-    user.balance_usdt += earn_amount_usd
-    user.balance_ngn += earn_amount_ngn
-    user.total_earned += earn_amount_usd
-    user.last_mined_at = now
-    user.save(update_fields=['balance_usdt', 'balance_ngn', 'total_earned', 'last_mined_at'])
-    
-    # Create earning record
-    MiningEarning.objects.create(
-        user=user,
-        tier=user.tier,
-        amount_usdt=earn_amount_usd,
-        amount_ngn=earn_amount_ngn,
-        mined_at=now
-    )
+    result = claims.claim(user, now)
+    if result is None:
+        # Lost a race with a concurrent tap (or the plan changed) — report the fresh state
+        user.refresh_from_db(fields=['last_mined_at', 'tier', 'tier_expiry'])
+        if user.last_mined_at and now - user.last_mined_at < claims.CLAIM_INTERVAL:
+            return _cooldown_response(user.last_mined_at, now)
+        return Response({'detail': 'Your plan just changed, please try again.'}, status=status.HTTP_409_CONFLICT)
     
     return Response({
         'success': True,
-        'earned_usdt': str(earn_amount_usd),
-        'earned_ngn': str(earn_amount_ngn),
-        'new_balance_usdt': str(user.balance_usdt),
-        'new_balance_ngn': str(user.balance_ngn),
-        'next_mine_at': (now + timedelta(hours=24)).isoformat()
+        'earned_usdt': str(result.earned_usdt),
+        'earned_ngn': str(result.earned_ngn),
+        'new_balance_usdt': str(result.balance_usdt),
+        'new_balance_ngn': str(result.balance_ngn),
+        'next_mine_at': (now + claims.CLAIM_INTERVAL).isoformat()
     })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def mining_status(request):
-    """Get mining status"""
-    user = request.user
-    now = timezone.now()
-    
-    can_mine = True
-    remaining_seconds = 0
-    
-    if user.last_mined_at:
-        time_since_last_mine = now - user.last_mined_at
-        if time_since_last_mine < timedelta(hours=24):
-            can_mine = False
-            remaining = timedelta(hours=24) - time_since_last_mine
-            remaining_seconds = int(remaining.total_seconds())
-    
-    # Check expiry
-    is_expired = False
-    if user.tier_expiry and now > user.tier_expiry:
-        # Plan expired - Revert to Tier 1
-        user.tier = 1
-        user.tier_expiry = None
-        user.save(update_fields=['tier', 'tier_expiry'])
+    """Get mining status (read-only — expired plans are downgraded by the sweeper)"""
+    current = mining_state.describe(mining_state.of(request.user))
     
     return Response({
-        'can_mine': can_mine,
-        'remaining_seconds': remaining_seconds,
-        'last_mined_at': user.last_mined_at.isoformat() if user.last_mined_at else None,
-        'tier': user.tier,
-        'earn_per_day': str(EARN_PER_DAY.get(user.tier, Decimal('1.00'))),
-        'is_expired': is_expired,
-        'tier_expiry': user.tier_expiry.isoformat() if user.tier_expiry else None,
+        'can_mine': current['can_mine'],
+        'remaining_seconds': current['remaining_seconds'],
+        'last_mined_at': current['last_mined_at'].isoformat() if current['last_mined_at'] else None,
+        'tier': current['tier'],
+        'earn_per_day': str(current['earn_per_day']),
+        'is_expired': current['is_expired'],
+        'tier_expiry': current['tier_expiry'].isoformat() if current['tier_expiry'] else None,
     })
 
 
@@ -139,8 +93,6 @@ def mining_earnings(request):
 @permission_classes([IsAuthenticated])
 def get_tiers(request):
     """Get all mining tiers/plans"""
-    tiers = MiningTier.objects.all().order_by('tier_number')
-    
     data = [{
         'tier_number': t.tier_number,
         'name': t.name,
@@ -148,6 +100,6 @@ def get_tiers(request):
         'earn_per_24h_usd': str(t.earn_per_24h_usd),
         'duration_days': t.duration_days,
         'withdrawal_fee_usd': str(t.withdrawal_fee_usd),  # required for transfer fee display
-    } for t in tiers]
+    } for t in get_catalogue()]
     
     return Response({'tiers': data})
\ No newline at end of file
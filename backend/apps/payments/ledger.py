@@ -0,0 +1,266 @@
+"""
+Apex Cloud Mining — Ledger posting API
+
+Every change to a user balance goes through post() (or one of the helpers
+below). A posting writes a balanced journal of LedgerEntry rows and moves the
+matching User projection columns with F() expressions in the same
+transaction, so concurrent postings never lose updates and the balances can
+always be replayed from the journal (see the audit_ledger command).
+
+    ledger.credit(user.pk, Decimal('5'), Kind.COMMISSION, reference=f'deposit:{deposit.pk}')
+    ledger.transfer(user.pk, amount, Account.REFERRAL, Account.MAIN)
+
+Debits are guarded by default: the UPDATE only matches while the balance
+covers the amount, and InsufficientFunds rolls the whole journal back.
+post_each() is the batch form for review queues: many single-leg journals,
+with per-user amounts applied through one CASE UPDATE per chunk of users.
+"""
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, F, Q
+from apex_project.db import case_map, update_returning
+from .models import LedgerEntry
+
+Account = LedgerEntry.Account
+Kind = LedgerEntry.Kind
+
+# Wallet account → User projection column
+PROJECTIONS = {
+    Account.MAIN:     'balance_usdt',
+    Account.REFERRAL: 'referral_balance_usdt',
+    Account.MAIN_NGN: 'balance_ngn',
+}
+CURRENCIES = {
+    Account.MAIN:     'USDT',
+    Account.REFERRAL: 'USDT',
+    Account.MAIN_NGN: 'NGN',
+}
+# USDT legs of these kinds also move User.total_earned
+EARNING_KINDS = {Kind.MINING, Kind.PAYOUT, Kind.COMMISSION, Kind.COMMISSION_REVERSAL}
+# Users per UPDATE in post_each()
+POST_CHUNK = 500
+
+
+class InsufficientFunds(Exception):
+    def __init__(self, user_id, accounts):
+        self.user_id = user_id
+        self.accounts = accounts
+        super().__init__(f'Insufficient {"/".join(accounts)} balance for user {user_id}')
+
+
+def _user_model():
+    from apps.users.models import User
+    return User
+
+
+def _journal(journal_id, kind, legs, reference):
+    """LedgerEntry rows for `legs`, plus one platform contra leg per currency."""
+    entries = []
+    totals = defaultdict(Decimal)
+    for user_id, account, amount in legs:
+        currency = CURRENCIES[account]
+        totals[currency] += amount
+        entries.append(LedgerEntry(
+            journal_id=journal_id, kind=kind, user_id=user_id, account=account,
+            currency=currency, amount=amount, reference=reference,
+        ))
+    for currency, total in totals.items():
+        if total:
+            entries.append(LedgerEntry(
+                journal_id=journal_id, kind=kind, user_id=None, account=Account.PLATFORM,
+                currency=currency, amount=-total, reference=reference,
+            ))
+    return entries
+
+
+def projection_updates(kind, deltas):
+    """The User column updates (F() expressions) for per-account `deltas`."""
+    changes = {PROJECTIONS[account]: F(PROJECTIONS[account]) + amount for account, amount in deltas.items()}
+    if kind in EARNING_KINDS:
+        earned = sum(amount for account, amount in deltas.items() if CURRENCIES[account] == 'USDT')
+        if earned:
+            changes['total_earned'] = F('total_earned') + earned
+    return changes
+
+
+def _project(kind, user_ids, deltas, guard):
+    """Apply per-account `deltas` to every user in `user_ids` with one UPDATE.
+
+    Returns the number of rows updated.
+    """
+    changes = projection_updates(kind, deltas)
+    users = _user_model().objects.filter(pk__in=user_ids)
+    if guard:
+        for account, amount in deltas.items():
+            if amount < 0:
+                users = users.filter(**{f'{PROJECTIONS[account]}__gte': -amount})
+    return users.update(**changes)
+
+
+def post(kind, legs, reference='', guard=True):
+    """Post one journal. `legs` are (user_id, account, amount) wallet movements.
+
+    Amounts are signed (+ credits the wallet). The platform side of the
+    journal is added automatically. Returns the journal id, or None if every
+    leg was zero.
+    """
+    legs = [(user_id, Account(account), Decimal(amount)) for user_id, account, amount in legs if amount]
+    if not legs:
+        return None
+
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    for user_id, account, amount in legs:
+        deltas[user_id][account] += amount
+
+    journal_id = uuid.uuid4()
+    with transaction.atomic():
+        for user_id, user_deltas in deltas.items():
+            if not _project(kind, [user_id], user_deltas, guard):
+                debited = [account for account, amount in user_deltas.items() if amount < 0]
+                if guard and debited:
+                    raise InsufficientFunds(user_id, debited)
+                raise _user_model().DoesNotExist(f'User {user_id} does not exist')
+        LedgerEntry.objects.bulk_create(_journal(journal_id, kind, legs, reference))
+    return journal_id
+
+
+def record(kind, legs, reference=''):
+    """Write the journal for `legs` whose projection_updates() the caller has
+    already applied in the current transaction (e.g. fused into a conditional
+    UPDATE). Prefer post() everywhere else.
+    """
+    legs = [(user_id, Account(account), Decimal(amount)) for user_id, account, amount in legs if amount]
+    if not legs:
+        return None
+    journal_id = uuid.uuid4()
+    LedgerEntry.objects.bulk_create(_journal(journal_id, kind, legs, reference))
+    return journal_id
+
+
+def credit(user_id, amount, kind, account=Account.MAIN, reference=''):
+    return post(kind, [(user_id, account, amount)], reference=reference)
+
+
+def debit(user_id, amount, kind, account=Account.MAIN, reference='', guard=True):
+    return post(kind, [(user_id, account, -Decimal(amount))], reference=reference, guard=guard)
+
+
+def transfer(user_id, amount, from_account, to_account, kind=Kind.TRANSFER, reference=''):
+    """Move `amount` between two wallets of the same user (guarded)."""
+    amount = Decimal(amount)
+    return post(kind, [(user_id, from_account, -amount), (user_id, to_account, amount)], reference=reference)
+
+
+def credit_many(kind, amount, user_ids, account=Account.MAIN, reference=''):
+    """Credit the same `amount` to many users as one journal with one UPDATE.
+
+    Used by the daily payout, which credits a whole chunk per tier at once.
+    """
+    amount = Decimal(amount)
+    user_ids = list(user_ids)
+    if not user_ids or not amount:
+        return None
+
+    journal_id = uuid.uuid4()
+    legs = [(user_id, Account(account), amount) for user_id in user_ids]
+    with transaction.atomic():
+        _project(kind, user_ids, {Account(account): amount}, guard=False)
+        LedgerEntry.objects.bulk_create(_journal(journal_id, kind, legs, reference), batch_size=1000)
+    return journal_id
+
+
+def _project_each(kind, deltas, guard):
+    """Apply per-user, per-account `deltas` ({user_id: {account: amount}}) with
+    one UPDATE. Returns the ids of the users it updated.
+    """
+    amount = DecimalField(max_digits=20, decimal_places=8)
+    users = _user_model().objects.filter(pk__in=list(deltas))
+    changes = {}
+    earned = defaultdict(Decimal)
+    for account in {account for user_deltas in deltas.values() for account in user_deltas}:
+        column = PROJECTIONS[account]
+        amounts = {user_id: user_deltas[account] for user_id, user_deltas in deltas.items() if account in user_deltas}
+        changes[column] = F(column) + case_map('pk', amounts, amount, Decimal('0'))
+        debits = {user_id: -value for user_id, value in amounts.items() if value < 0}
+        if guard and debits:
+            # Users debited on this account need the balance to cover it
+            users = users.filter(~Q(pk__in=list(debits)) | Q(**{f'{column}__gte': case_map('pk', debits, amount)}))
+        if kind in EARNING_KINDS and CURRENCIES[account] == 'USDT':
+            for user_id, value in amounts.items():
+                earned[user_id] += value
+    if earned:
+        changes['total_earned'] = F('total_earned') + case_map('pk', earned, amount, Decimal('0'))
+    return {row['id'] for row in update_returning(users, ['id'], **changes)}
+
+
+def post_each(kind, postings, guard=True):
+    """Post one single-leg journal per (user_id, account, amount, reference).
+
+    The User projections move with one UPDATE per POST_CHUNK users rather
+    than one per posting. With `guard`, a user whose debits (summed over
+    their postings) their balance can't cover is left untouched and none of
+    their postings are written. Returns the postings that were.
+    """
+    postings = [
+        (user_id, Account(account), Decimal(amount), reference)
+        for user_id, account, amount, reference in postings if amount
+    ]
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    for user_id, account, amount, _ in postings:
+        deltas[user_id][account] += amount
+    user_ids = list(deltas)
+
+    applied = set()
+    with transaction.atomic():
+        for start in range(0, len(user_ids), POST_CHUNK):
+            chunk = user_ids[start:start + POST_CHUNK]
+            applied |= _project_each(kind, {user_id: deltas[user_id] for user_id in chunk}, guard)
+        posted = [posting for posting in postings if posting[0] in applied]
+        LedgerEntry.objects.bulk_create(
+            [
+                entry for user_id, account, amount, reference in posted
+                for entry in _journal(uuid.uuid4(), kind, [(user_id, account, amount)], reference)
+            ],
+            batch_size=1000,
+        )
+    return posted
+
+
+def set_balances(user_id, balances, reference=''):
+    """Post an ADJUSTMENT that brings a user's wallets to the given values.
+
+    `balances` maps account → target amount. The user row is locked so the
+    adjustment is computed against the committed balance.
+    """
+    with transaction.atomic():
+        current = (
+            _user_model().objects.select_for_update()
+            .values(*(PROJECTIONS[Account(account)] for account in balances))
+            .get(pk=user_id)
+        )
+        legs = [
+            (user_id, account, Decimal(target) - current[PROJECTIONS[Account(account)]])
+            for account, target in balances.items()
+        ]
+        return post(Kind.ADJUSTMENT, legs, reference=reference, guard=False)
+
+
+def post_withdrawal(withdrawal):
+    """Debit an approved withdrawal from the wallet it was requested against."""
+    reference = f'withdrawal:{withdrawal.pk}'
+    with transaction.atomic():
+        if withdrawal.is_referral:
+            return debit(
+                withdrawal.user_id, withdrawal.amount_usdt, Kind.WITHDRAWAL,
+                account=Account.REFERRAL, reference=reference,
+            )
+        journal_id = debit(withdrawal.user_id, withdrawal.amount_usdt, Kind.WITHDRAWAL, reference=reference)
+        if withdrawal.amount_ngn:
+            # balance_ngn is an indicative figure and was never guarded
+            debit(
+                withdrawal.user_id, withdrawal.amount_ngn, Kind.WITHDRAWAL,
+                account=Account.MAIN_NGN, reference=reference, guard=False,
+            )
+        return journal_id
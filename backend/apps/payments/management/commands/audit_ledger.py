@@ -0,0 +1,82 @@
+"""
+Replay the ledger and compare it with the balance projections on User.
+
+    python manage.py audit_ledger                  # every user, in batches
+    python manage.py audit_ledger --user <uuid>    # one user
+    python manage.py audit_ledger --journals       # also check every journal balances
+
+Per-user sums read the (user, account, id) index, so auditing one user or
+one batch never scans the whole table.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+from apps.payments.ledger import PROJECTIONS
+from apps.payments.models import LedgerEntry
+from apps.users.models import User
+
+# SQLite sums decimals as floats; compare at the precision the ledger stores
+QUANTUM = Decimal(1).scaleb(-LedgerEntry._meta.get_field('amount').decimal_places)
+
+
+class Command(BaseCommand):
+    help = 'Check that User balances match the sum of their ledger entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Audit a single user ID')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--journals', action='store_true', help='Also verify every journal sums to zero')
+
+    def handle(self, *args, **options):
+        mismatches = 0
+
+        users = User.objects.order_by('id').values('id', 'email', *PROJECTIONS.values())
+        if options['user']:
+            users = users.filter(id=options['user'])
+
+        last_id = None
+        while True:
+            page = users.filter(id__gt=last_id) if last_id else users
+            batch = list(page[:options['batch_size']])
+            if not batch:
+                break
+            last_id = batch[-1]['id']
+
+            replayed = defaultdict(Decimal)
+            sums = (
+                LedgerEntry.objects
+                .filter(user_id__in=[row['id'] for row in batch])
+                .values('user_id', 'account')
+                .annotate(total=Sum('amount'))
+            )
+            for row in sums:
+                replayed[row['user_id'], row['account']] = row['total'].quantize(QUANTUM)
+
+            for row in batch:
+                for account, field in PROJECTIONS.items():
+                    expected = replayed[row['id'], account]
+                    if expected != row[field]:
+                        mismatches += 1
+                        self.stdout.write(self.style.ERROR(
+                            f'{row["email"]}: {field}={row[field]} but ledger says {expected}'
+                        ))
+
+        if options['journals']:
+            unbalanced = (
+                LedgerEntry.objects
+                .values('journal_id', 'currency')
+                .annotate(total=Sum('amount'))
+                .exclude(total=0)
+            )
+            for row in unbalanced:
+                if not row['total'].quantize(QUANTUM):
+                    continue
+                mismatches += 1
+                self.stdout.write(self.style.ERROR(
+                    f'Journal {row["journal_id"]} is off by {row["total"]} {row["currency"]}'
+                ))
+
+        if mismatches:
+            raise CommandError(f'{mismatches} ledger mismatch(es) found')
+        self.stdout.write(self.style.SUCCESS('Ledger and balances agree'))
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.9 on 2026-10-17 18:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0010_update_exchange_rate_to_1400'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('journal_id', models.UUIDField(db_index=True)),
+                ('kind', models.CharField(choices=[('mining', 'Mining Claim'), ('payout', 'Daily Payout'), ('referral_bonus', 'Referral Signup Bonus'), ('commission', 'Referral Commission'), ('commission_reversal', 'Commission Reversal'), ('transfer', 'Referral → Main Transfer'), ('withdrawal', 'Withdrawal'), ('adjustment', 'Manual Adjustment'), ('opening_balance', 'Opening Balance')], max_length=24)),
+                ('account', models.CharField(choices=[('main', 'Main Balance (USDT)'), ('referral', 'Referral Balance (USDT)'), ('main_ngn', 'Main Balance (NGN)'), ('platform', 'Platform')], max_length=10)),
+                ('currency', models.CharField(default='USDT', max_length=4)),
+                ('amount', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('reference', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ledger Entry',
+                'verbose_name_plural': 'Ledger Entries',
+                'db_table': 'ledger_entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['user', 'account', 'id'], name='ledger_entr_user_id_90aef8_idx')],
+            },
+        ),
+    ]
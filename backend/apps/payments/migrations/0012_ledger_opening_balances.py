@@ -0,0 +1,59 @@
+import uuid
+from django.db import migrations
+from django.db.models import Q
+
+# Wallet column → (ledger account, currency)
+WALLETS = {
+    'balance_usdt':          ('main', 'USDT'),
+    'referral_balance_usdt': ('referral', 'USDT'),
+    'balance_ngn':           ('main_ngn', 'NGN'),
+}
+
+
+def post_opening_balances(apps, schema_editor):
+    """Open the ledger with one balanced journal per user holding a balance."""
+    User = apps.get_model('users', 'User')
+    LedgerEntry = apps.get_model('payments', 'LedgerEntry')
+
+    holders = User.objects.filter(
+        ~Q(balance_usdt=0) | ~Q(referral_balance_usdt=0) | ~Q(balance_ngn=0)
+    ).values('id', *WALLETS)
+
+    entries = []
+    for row in holders.iterator(chunk_size=2000):
+        journal_id = uuid.uuid4()
+        totals = {}
+        for field, (account, currency) in WALLETS.items():
+            amount = row[field]
+            if amount:
+                entries.append(LedgerEntry(
+                    journal_id=journal_id, kind='opening_balance', user_id=row['id'],
+                    account=account, currency=currency, amount=amount,
+                ))
+                totals[currency] = totals.get(currency, 0) + amount
+        for currency, total in totals.items():
+            if total:
+                entries.append(LedgerEntry(
+                    journal_id=journal_id, kind='opening_balance', user_id=None,
+                    account='platform', currency=currency, amount=-total,
+                ))
+        if len(entries) >= 5000:
+            LedgerEntry.objects.bulk_create(entries)
+            entries = []
+    LedgerEntry.objects.bulk_create(entries)
+
+
+def remove_opening_balances(apps, schema_editor):
+    apps.get_model('payments', 'LedgerEntry').objects.filter(kind='opening_balance').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0011_ledgerentry'),
+        ('users', '0013_user_nearest_agent'),
+    ]
+
+    operations = [
+        migrations.RunPython(post_opening_balances, remove_opening_balances),
+    ]
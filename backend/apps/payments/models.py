@@ -4,6 +4,7 @@ Apex Mining - Payment Models (PRODUCTION READY)
 import uuid
 from django.db import models
 from django.conf import settings
+from apex_project.cache import VersionedCache
 
 
 class Deposit(models.Model):
@@ -22,7 +23,8 @@ class Deposit(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='deposits'
+        related_name='deposits',
+        db_index=False,  # covered by deposits_user_created_idx
     )
     tier_target = models.IntegerField()
     amount_usd = models.DecimalField(max_digits=12, decimal_places=2)
@@ -40,6 +42,13 @@ class Deposit(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Deposit'
         verbose_name_plural = 'Deposits'
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='deposits_user_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='deposits_status_created_idx'),
+            # Day ranges and recently reviewed rows for apps.admin_panel.rollups
+            models.Index(fields=['created_at'], name='deposits_created_idx'),
+            models.Index(fields=['reviewed_at'], name='deposits_reviewed_idx', condition=models.Q(reviewed_at__isnull=False)),
+        ]
 
     def __str__(self):
         return f"Deposit: {self.user.email} - Plan {self.tier_target} - ${self.amount_usd} [{self.status}]"
@@ -48,7 +57,12 @@ class Deposit(models.Model):
 class Withdrawal(models.Model):
     """User withdrawal requests"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='withdrawals')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='withdrawals',
+        db_index=False,  # covered by withdrawals_user_created_idx
+    )
     amount_usdt = models.DecimalField(max_digits=12, decimal_places=8)
     amount_ngn = models.DecimalField(max_digits=16, decimal_places=2, null=True, blank=True)
     
@@ -84,6 +98,13 @@ class Withdrawal(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Withdrawal'
         verbose_name_plural = 'Withdrawals'
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='withdrawals_user_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='withdrawals_status_created_idx'),
+            # Day ranges and recently reviewed rows for apps.admin_panel.rollups
+            models.Index(fields=['created_at'], name='withdrawals_created_idx'),
+            models.Index(fields=['reviewed_at'], name='withdrawals_reviewed_idx', condition=models.Q(reviewed_at__isnull=False)),
+        ]
 
     def __str__(self):
         return f'{self.user.email} - ${self.amount_usdt} ({self.status})'
@@ -120,6 +141,17 @@ class ExchangeRate(models.Model):
 
     def __str__(self):
         return f"1 USD = ₦{self.usd_to_ngn} | GHS {self.usd_to_ghs}"
+
+    @classmethod
+    def get_current(cls):
+        """Current rate (or None), served from the versioned cache — read-only."""
+        return _exchange_rate_cache.get()
+
+    @classmethod
+    def invalidate_cache(cls):
+        _exchange_rate_cache.invalidate()
+
+
 class PaymentSettings(models.Model):
     """Global payment settings (editable by admin)"""
     
@@ -190,10 +222,27 @@ class PaymentSettings(models.Model):
     
     @classmethod
     def get_settings(cls):
-        """Get or create payment settings"""
+        """Payment settings served from the versioned cache — treat as read-only.
+
+        Use load() when you intend to modify and save the settings.
+        """
+        return _settings_cache.get()
+
+    @classmethod
+    def load(cls):
+        """Get or create payment settings straight from the database"""
         obj, created = cls.objects.get_or_create(pk=1)
         return obj
 
+    @classmethod
+    def invalidate_cache(cls):
+        _settings_cache.invalidate()
+
+
+_settings_cache = VersionedCache('payments:settings', PaymentSettings.load)
+_exchange_rate_cache = VersionedCache('payments:exchange-rate', lambda: ExchangeRate.objects.first())
+
+
 class ReferralDeposit(Deposit):
     """Proxy model for monitoring deposits from referred users only"""
     class Meta:
@@ -231,4 +280,61 @@ class WithdrawalFeePayment(models.Model):
         verbose_name_plural = 'Transfer Fee Payments'
 
     def __str__(self):
-        return f'{self.user.email} - ${self.fee_amount_usd} ({self.status})'       
\ No newline at end of file
+        return f'{self.user.email} - ${self.fee_amount_usd} ({self.status})'       
+
+class LedgerEntry(models.Model):
+    """One leg of a balanced journal. Append-only.
+
+    Every change to a user balance is posted through apps.payments.ledger as a
+    journal whose legs sum to zero per currency: the user's wallet leg(s) plus
+    a contra leg on the platform (user=NULL). The balance columns on User are
+    projections of these rows, updated with F() in the same transaction.
+    """
+    class Account(models.TextChoices):
+        MAIN     = 'main',     'Main Balance (USDT)'
+        REFERRAL = 'referral', 'Referral Balance (USDT)'
+        MAIN_NGN = 'main_ngn', 'Main Balance (NGN)'
+        PLATFORM = 'platform', 'Platform'
+
+    class Kind(models.TextChoices):
+        MINING              = 'mining',              'Mining Claim'
+        PAYOUT              = 'payout',              'Daily Payout'
+        REFERRAL_BONUS      = 'referral_bonus',      'Referral Signup Bonus'
+        COMMISSION          = 'commission',          'Referral Commission'
+        COMMISSION_REVERSAL = 'commission_reversal', 'Commission Reversal'
+        TRANSFER            = 'transfer',            'Referral → Main Transfer'
+        WITHDRAWAL          = 'withdrawal',          'Withdrawal'
+        ADJUSTMENT          = 'adjustment',          'Manual Adjustment'
+        OPENING_BALANCE     = 'opening_balance',     'Opening Balance'
+
+    id         = models.BigAutoField(primary_key=True)
+    journal_id = models.UUIDField(db_index=True)
+    kind       = models.CharField(max_length=24, choices=Kind.choices)
+    # Journals outlive deleted users: keep the id, no FK constraint
+    user       = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='ledger_entries'
+    )
+    account    = models.CharField(max_length=10, choices=Account.choices)
+    currency   = models.CharField(max_length=4, default='USDT')
+    amount     = models.DecimalField(max_digits=20, decimal_places=8)  # signed: + credits the account
+    reference  = models.CharField(max_length=64, blank=True, db_index=True)  # e.g. 'withdrawal:<id>'
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'ledger_entries'
+        ordering = ['id']
+        verbose_name = 'Ledger Entry'
+        verbose_name_plural = 'Ledger Entries'
+        indexes = [
+            # Per-user replay / audit is a range scan, never a table scan
+            models.Index(fields=['user', 'account', 'id']),
+        ]
+
+    def __str__(self):
+        who = self.user_id or 'platform'
+        return f'{self.kind} {who}/{self.account} {self.amount:+} {self.currency}'
@@ -0,0 +1,239 @@
+"""
+Apex Cloud Mining — Paystack account resolution
+
+`get_client().resolve_account(account_number, bank_code)` returns the
+account holder's name as Paystack reports it. Around the backend call:
+
+- resolved names are cached in the shared Django cache (Redis in
+  production) for APEX_PAYSTACK_CACHE_TTL, and unknown accounts briefly,
+  so the repeated lookups of a withdrawal setup never leave the process;
+- a circuit breaker shared through the same cache stops calling Paystack
+  for BREAKER_COOLDOWN after BREAKER_THRESHOLD consecutive failures, so an
+  outage costs one fast ServiceUnavailable instead of a worker held for the
+  whole timeout on every request.
+
+Backends take (account_number, bank_code) and return the raw account name,
+or raise AccountNotFound / ServiceUnavailable:
+
+- HttpBackend: Paystack's /bank/resolve over one pooled requests.Session
+  per process, with a short APEX_PAYSTACK_TIMEOUT.
+- MockBackend: realistic, stable names when PAYSTACK_SECRET_KEY is not set.
+- FakeBackend: in-memory accounts for tests.
+
+APEX_PAYSTACK_BACKEND (a dotted path) overrides the choice.
+"""
+import logging
+import zlib
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+API_BASE = 'https://api.paystack.co'
+PLACEHOLDER_KEY = 'YOUR_PAYSTACK_SECRET_KEY'
+NOT_FOUND_TTL = 10 * 60
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 60
+BREAKER_WINDOW = 5 * 60
+
+_NOT_FOUND = ''
+
+MOCK_NAMES = {
+    '0000000001': 'Chioma Okoro',
+    '0000000002': 'Tunde Adeyemi',
+    '0000000003': 'Zainab Hussein',
+    '0000000004': 'Ngozi Ezeoke',
+    '0000000005': 'David Okafor',
+    '0072410373': 'MAHMUD OLASUNKANMI BASHIR',
+    '8072410373': 'MAHMUD OLASUNKANMI BASHIR',
+    '1234567890': 'Grace Nwosu',
+    '9876543210': 'Emeka Chukwu',
+}
+MOCK_FIRST_NAMES = ['Chioma', 'Tunde', 'Zainab', 'Ngozi', 'David', 'Grace', 'Emeka', 'Amara', 'Kayode', 'Blessing']
+MOCK_LAST_NAMES = ['Okoro', 'Adeyemi', 'Hussein', 'Ezeoke', 'Okafor', 'Nwosu', 'Chukwu', 'Iyanda', 'Mwangi', 'Ogunlade']
+
+
+class AccountNotFound(Exception):
+    """Paystack answered, but the account number does not resolve at that bank."""
+
+
+class ServiceUnavailable(Exception):
+    """Paystack could not be asked: network error, rate limit, 5xx or open breaker."""
+
+
+def mock_account_name(account_number):
+    """A realistic name that stays the same for an account number across processes."""
+    if account_number in MOCK_NAMES:
+        return MOCK_NAMES[account_number]
+    hash_val = zlib.crc32(account_number.encode()) % 1000
+    first = MOCK_FIRST_NAMES[hash_val % len(MOCK_FIRST_NAMES)]
+    last = MOCK_LAST_NAMES[(hash_val // len(MOCK_FIRST_NAMES)) % len(MOCK_LAST_NAMES)]
+    return f'{first} {last}'
+
+
+class HttpBackend:
+    is_mock = False
+
+    def __init__(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._requests = requests
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f'Bearer {settings.PAYSTACK_SECRET_KEY}',
+            'Content-Type': 'application/json',
+        })
+        # Keep-alive connections to one host, no urllib3 retries on the request path
+        self.session.mount(API_BASE, HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0))
+
+    def resolve(self, account_number, bank_code):
+        try:
+            response = self.session.get(
+                f'{API_BASE}/bank/resolve',
+                params={'account_number': account_number, 'bank_code': bank_code},
+                timeout=settings.APEX_PAYSTACK_TIMEOUT,
+            )
+        except self._requests.RequestException as e:
+            raise ServiceUnavailable(str(e)) from e
+
+        if response.status_code == 200:
+            data = response.json()
+            if data.get('status'):
+                return data['data'].get('account_name', '')
+        if response.status_code in (200, 400, 404, 422):
+            raise AccountNotFound(f'status {response.status_code}')
+        raise ServiceUnavailable(f'status {response.status_code}')
+
+
+class MockBackend:
+    """Development stand-in used while PAYSTACK_SECRET_KEY is not configured."""
+    is_mock = True
+
+    def resolve(self, account_number, bank_code):
+        return mock_account_name(account_number)
+
+
+class FakeBackend:
+    """In-memory stand-in for Paystack.
+
+    Register accounts in `FakeBackend.accounts` as {(bank_code,
+    account_number): name}; every lookup is appended to `calls`. Set
+    `fail_with` to an exception to make lookups fail. Call `reset()` between
+    tests.
+    """
+    is_mock = False
+    accounts = {}
+    calls = []
+    fail_with = None
+
+    @classmethod
+    def reset(cls):
+        cls.accounts = {}
+        cls.calls = []
+        cls.fail_with = None
+
+    def resolve(self, account_number, bank_code):
+        cls = type(self)
+        cls.calls.append((bank_code, account_number))
+        if cls.fail_with is not None:
+            raise cls.fail_with
+        try:
+            return cls.accounts[(bank_code, account_number)]
+        except KeyError:
+            raise AccountNotFound('unknown account') from None
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker whose state lives in the shared cache."""
+
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, window=BREAKER_WINDOW):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.window = window
+        self._failures_key = f'{name}:breaker:failures'
+        self._open_key = f'{name}:breaker:open'
+
+    def is_open(self):
+        return cache.get(self._open_key) is not None
+
+    def record_success(self):
+        cache.delete(self._failures_key)
+
+    def record_failure(self):
+        cache.add(self._failures_key, 0, self.window)
+        try:
+            failures = cache.incr(self._failures_key)
+        except ValueError:
+            return
+        if failures >= self.threshold:
+            # After the cooldown the next call goes through; one more failure re-opens
+            cache.set(self._open_key, 1, self.cooldown)
+            logger.warning(f'[Paystack] {failures} consecutive failures — pausing lookups for {self.cooldown}s')
+
+
+class PaystackClient:
+    def __init__(self, backend, test_mode=False, cache_ttl=None, breaker=None):
+        self.backend = backend
+        self.test_mode = test_mode
+        self.cache_ttl = settings.APEX_PAYSTACK_CACHE_TTL if cache_ttl is None else cache_ttl
+        self.breaker = breaker or CircuitBreaker('paystack')
+
+    @property
+    def is_mock(self):
+        return self.backend.is_mock
+
+    @staticmethod
+    def _cache_key(account_number, bank_code):
+        return f'paystack:resolve:{bank_code}:{account_number}'
+
+    def resolve_account(self, account_number, bank_code):
+        """Return the raw account name, or raise AccountNotFound / ServiceUnavailable."""
+        if self.is_mock:
+            return self.backend.resolve(account_number, bank_code)
+
+        key = self._cache_key(account_number, bank_code)
+        cached = cache.get(key)
+        if cached == _NOT_FOUND:
+            raise AccountNotFound('cached')
+        if cached is not None:
+            return cached
+
+        if self.breaker.is_open():
+            raise ServiceUnavailable('circuit open')
+        try:
+            name = self.backend.resolve(account_number, bank_code)
+        except AccountNotFound:
+            self.breaker.record_success()
+            cache.set(key, _NOT_FOUND, NOT_FOUND_TTL)
+            raise
+        except ServiceUnavailable:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        cache.set(key, name, self.cache_ttl)
+        return name
+
+
+def _backend():
+    path = getattr(settings, 'APEX_PAYSTACK_BACKEND', None)
+    if path:
+        return import_string(path)()
+    key = getattr(settings, 'PAYSTACK_SECRET_KEY', None)
+    if key and key != PLACEHOLDER_KEY:
+        return HttpBackend()
+    return MockBackend()
+
+
+_clients = {}
+
+
+def get_client():
+    """The process-wide client for the current settings, so its connection pool is reused."""
+    key = getattr(settings, 'PAYSTACK_SECRET_KEY', None)
+    config = (getattr(settings, 'APEX_PAYSTACK_BACKEND', None), key)
+    client = _clients.get(config)
+    if client is None:
+        client = _clients[config] = PaystackClient(_backend(), test_mode=bool(key and key.startswith('sk_test_')))
+    return client
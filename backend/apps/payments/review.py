@@ -0,0 +1,400 @@
+"""
+Apex Cloud Mining — Review queues
+
+Approve or reject pending deposits, withdrawals and withdrawal fee payments
+in batches. Each function takes the ids an admin ticked and applies
+everything the review entails inside one transaction, set-wise:
+
+    SELECT ... FROM deposits WHERE id IN (...) FOR UPDATE
+    UPDATE users ...                  (one per target plan)
+    UPDATE / INSERT user_mining_sessions
+    INSERT referral_commissions, ledger_entries, notifications, audit_logs
+    UPDATE deposits SET status = 'approved' WHERE id IN (...)
+
+so the number of queries follows the number of distinct plans, not the
+number of items. Items that can't be reviewed (unknown, outside the
+reviewer's downline, already reviewed, short of balance) are left alone and
+reported in the per-item results:
+
+    [{'id': '...', 'result': 'approved', 'detail': 'member@example.com → Plan 3'}, ...]
+
+The bulk admin endpoints and the Django admin actions both go through here.
+Balances move through apps.payments.ledger.post_each and the dashboard
+counters through apps.admin_panel.stats.record_each, since the UPDATEs
+bypass the save() signals.
+"""
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, F, IntegerField
+from django.utils import timezone
+from apex_project.db import case_map
+from apps.admin_panel import stats as admin_stats
+from . import ledger
+from .models import Deposit, Withdrawal, WithdrawalFeePayment
+
+APPROVED = 'approved'
+REJECTED = 'rejected'
+NOT_FOUND = 'not_found'
+FORBIDDEN = 'forbidden'
+ALREADY_REVIEWED = 'already_reviewed'
+FAILED = 'failed'
+
+
+def _lock(model, ids, actor, scoped, reviewable, *related):
+    """Lock the rows among `ids` that `actor` may review.
+
+    Returns (rows, outcomes): the reviewable rows in creation order, and an
+    outcome for every id that is not.
+    """
+    rows = list(
+        model.objects.select_for_update(of=('self',))
+        .select_related('user', *related)
+        .filter(pk__in=ids)
+        .order_by('created_at')
+    )
+    outcomes = {pk: (NOT_FOUND, 'No such item.') for pk in ids}
+    allowed = None
+    if scoped and not actor.is_superuser:
+        allowed = set(
+            actor.downline_ids()
+            .filter(descendant_id__in={row.user_id for row in rows})
+            .values_list('descendant_id', flat=True)
+        )
+
+    pending = []
+    for row in rows:
+        if allowed is not None and row.user_id not in allowed:
+            outcomes[row.pk] = (FORBIDDEN, 'Not in your downline.')
+        elif row.status not in reviewable:
+            outcomes[row.pk] = (ALREADY_REVIEWED, f'Already {row.status}.')
+        else:
+            del outcomes[row.pk]
+            pending.append(row)
+    return pending, outcomes
+
+
+def _results(ids, outcomes):
+    return [{'id': str(pk), 'result': outcomes[pk][0], 'detail': outcomes[pk][1]} for pk in ids]
+
+
+def _unique(ids):
+    return list(dict.fromkeys(uuid.UUID(str(pk)) for pk in ids))
+
+
+def _per_user(rows, counters, new_status, amount_field):
+    """Summed stats deltas per user for moving `rows` to `new_status`."""
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    for row in rows:
+        amount = getattr(row, amount_field)
+        for key, delta in admin_stats.diff(counters(row.status, amount), counters(new_status, amount)).items():
+            deltas[row.user_id][key] += delta
+    return deltas
+
+
+def _audit(actor, ip, action, rows, detail):
+    from apps.users.models import AuditLog
+
+    AuditLog.log_many(AuditLog.build(actor, action, detail(row), target=row.user, ip=ip) for row in rows)
+
+
+# ── Deposits ───────────────────────────────────────────────────────────────
+
+def commission_for(referrer, deposit, tier):
+    """(percent, amount) the referrer earns on `deposit` for plan `tier`: the
+    plan's referral reward, else a percentage of the deposit (the agent's own
+    rate for agents).
+    """
+    commission_pct = getattr(referrer, 'agent_commission_percent', Decimal('10.00')) if referrer.is_agent else Decimal('10.00')
+    if tier and tier.referral_reward > 0:
+        return commission_pct, tier.referral_reward
+    return commission_pct, Decimal(str(deposit.amount_usd)) * (commission_pct / 100)
+
+
+def _credit_commissions(deposits, catalogue):
+    """Credit each deposit's referrer once. Returns the referrers' notifications, unsaved."""
+    from apps.referrals.models import AdminCommissionSummary, ReferralCommission
+    from apps.users.notify import build
+
+    referred = [deposit for deposit in deposits if deposit.user.referred_by_id]
+    if not referred:
+        return []
+    # unique_together on (deposit, referrer) also guards against double-crediting
+    credited = set(
+        ReferralCommission.objects.filter(deposit__in=referred).values_list('deposit_id', 'referrer_id')
+    )
+
+    commissions, postings, notifications = [], [], []
+    earned, referrals = defaultdict(Decimal), defaultdict(int)
+    for deposit in referred:
+        user, referrer = deposit.user, deposit.user.referred_by
+        if (deposit.pk, referrer.pk) in credited:
+            continue
+        commission_pct, amount = commission_for(referrer, deposit, catalogue.get(deposit.tier_target))
+        commissions.append(ReferralCommission(
+            referrer=referrer, referee=user, deposit=deposit, tier=deposit.tier_target,
+            commission_pct=commission_pct, amount_usdt=amount, status='credited',
+        ))
+        # Agents and admins are paid into their main balance, everyone else
+        # into the isolated referral balance
+        if referrer.is_admin or referrer.is_staff or referrer.is_agent:
+            account = ledger.Account.MAIN
+        else:
+            account = ledger.Account.REFERRAL
+        postings.append((referrer.pk, account, amount, f'deposit:{deposit.pk}'))
+        earned[referrer.pk] += amount
+        referrals[referrer.pk] += 1
+        notifications.append(build(
+            user=referrer,
+            type='referral',
+            title='💰 Commission Earned!',
+            message=f'You earned ${float(amount):.2f} USDT from {user.email}\'s upgrade to Plan {deposit.tier_target}.',
+            icon='💰',
+        ))
+    if not commissions:
+        return []
+
+    ReferralCommission.objects.bulk_create(commissions)
+    ledger.post_each(ledger.Kind.COMMISSION, postings)
+    AdminCommissionSummary.objects.bulk_create(
+        [AdminCommissionSummary(admin_id=admin_id) for admin_id in earned], ignore_conflicts=True,
+    )
+    AdminCommissionSummary.objects.filter(admin_id__in=list(earned)).update(
+        total_earned=F('total_earned') + case_map('admin_id', earned, DecimalField(), Decimal('0')),
+        total_referrals=F('total_referrals') + case_map('admin_id', referrals, IntegerField(), 0),
+    )
+    return notifications
+
+
+def approve_deposits(ids, actor, ip=None, scoped=True):
+    """Upgrade each depositor to the deposit's plan, open their mining session
+    and credit their referrer. A user with several deposits in the batch ends
+    on the plan of the newest one.
+    """
+    from apps.mining.catalogue import get_catalogue
+    from apps.mining.models import UserMiningSession
+    from apps.users.models import User
+    from apps.users.notify import build, notify_many
+
+    ids = _unique(ids)
+    now = timezone.now()
+    catalogue = get_catalogue()
+    with transaction.atomic():
+        deposits, outcomes = _lock(Deposit, ids, actor, scoped, ('pending',), 'user__referred_by')
+        approved = []
+        for deposit in deposits:
+            if catalogue.get(deposit.tier_target) is None:
+                outcomes[deposit.pk] = (FAILED, f'Plan {deposit.tier_target} does not exist.')
+            else:
+                approved.append(deposit)
+        if not approved:
+            return _results(ids, outcomes)
+
+        newest = {deposit.user_id: deposit for deposit in approved}
+        by_tier = defaultdict(list)
+        for user_id, deposit in newest.items():
+            by_tier[deposit.tier_target].append(user_id)
+
+        sessions, notifications = [], []
+        for tier_number, user_ids in by_tier.items():
+            tier = catalogue.get(tier_number)
+            expiry = now + timedelta(days=tier.duration_days) if tier_number > 1 else None
+            User.objects.filter(pk__in=user_ids).update(tier=tier_number, tier_expiry=expiry, last_mined_at=None)
+            sessions += [
+                UserMiningSession(user_id=user_id, tier=tier_number, expires_at=expiry, is_active=True)
+                for user_id in user_ids
+            ]
+            notifications += [
+                build(
+                    user=newest[user_id].user,
+                    type='tier',
+                    title=f'🎉 Upgraded to {tier.name}!',
+                    message=f'Your {tier.name} is active! Earn ${float(tier.earn_per_24h_usd):.2f} daily.',
+                    icon='✅',
+                )
+                for user_id in user_ids
+            ]
+        UserMiningSession.objects.filter(user_id__in=list(newest), is_active=True).update(is_active=False)
+        UserMiningSession.objects.bulk_create(sessions)
+        Deposit.objects.filter(pk__in=[deposit.pk for deposit in approved]).update(status='approved', reviewed_at=now)
+
+        moves = defaultdict(list)
+        for user_id, deposit in newest.items():
+            if deposit.user.tier != deposit.tier_target:
+                moves[deposit.user.tier, deposit.tier_target].append(user_id)
+        for (old, new), user_ids in moves.items():
+            admin_stats.record_many(user_ids, {admin_stats.tier_key(old): -1, admin_stats.tier_key(new): 1})
+        admin_stats.record_each(_per_user(approved, admin_stats.deposit_counters, 'approved', 'amount_usd'))
+
+        notify_many(notifications + _credit_commissions(approved, catalogue))
+        _audit(actor, ip, 'deposit_approved', approved, lambda deposit: (
+            f'Deposit ${deposit.amount_usd} approved — {deposit.user.email} → Plan {deposit.tier_target}'
+        ))
+    for deposit in approved:
+        outcomes[deposit.pk] = (APPROVED, f'{deposit.user.email} → Plan {deposit.tier_target}')
+    return _results(ids, outcomes)
+
+
+def approve_deposit(deposit_id, actor, ip=None, scoped=True):
+    """Approve a single deposit (the Django admin edit page). Returns its
+    result, e.g. {'result': 'approved', ...}.
+    """
+    return approve_deposits([deposit_id], actor, ip=ip, scoped=scoped)[0]
+
+
+def reject_deposits(ids, actor, ip=None, scoped=True):
+    from apps.users.notify import build, notify_many
+
+    ids = _unique(ids)
+    with transaction.atomic():
+        deposits, outcomes = _lock(Deposit, ids, actor, scoped, ('pending',))
+        if deposits:
+            Deposit.objects.filter(pk__in=[deposit.pk for deposit in deposits]).update(
+                status='rejected', reviewed_at=timezone.now(),
+            )
+            admin_stats.record_each(_per_user(deposits, admin_stats.deposit_counters, 'rejected', 'amount_usd'))
+            notify_many(
+                build(
+                    user=deposit.user, type='deposit', title='❌ Deposit Rejected',
+                    message='Your deposit was rejected. Contact support.', icon='❌',
+                )
+                for deposit in deposits
+            )
+            _audit(actor, ip, 'deposit_rejected', deposits, lambda deposit: (
+                f'Deposit ${deposit.amount_usd} rejected for {deposit.user.email}'
+            ))
+    for deposit in deposits:
+        outcomes[deposit.pk] = (REJECTED, deposit.user.email)
+    return _results(ids, outcomes)
+
+
+# ── Withdrawals ────────────────────────────────────────────────────────────
+
+def approve_withdrawals(ids, actor, ip=None, scoped=True):
+    """Debit each withdrawal from the wallet it was requested against.
+
+    Debits are guarded per user: a user whose balance can't cover all of
+    their withdrawals in the batch keeps every one of them pending.
+    """
+    from apps.users.notify import build, notify_many
+
+    ids = _unique(ids)
+    with transaction.atomic():
+        withdrawals, outcomes = _lock(Withdrawal, ids, actor, scoped, ('pending', 'processing'))
+        posted = ledger.post_each(ledger.Kind.WITHDRAWAL, [
+            (wd.user_id, ledger.Account.REFERRAL if wd.is_referral else ledger.Account.MAIN,
+             -wd.amount_usdt, f'withdrawal:{wd.pk}')
+            for wd in withdrawals
+        ])
+        paid = {reference for *_, reference in posted}
+        approved = []
+        for wd in withdrawals:
+            if f'withdrawal:{wd.pk}' in paid:
+                approved.append(wd)
+            else:
+                source = 'referral' if wd.is_referral else 'mining'
+                outcomes[wd.pk] = (FAILED, f'{wd.user.email} has insufficient {source} balance.')
+        if approved:
+            # balance_ngn is an indicative figure and was never guarded
+            ledger.post_each(ledger.Kind.WITHDRAWAL, [
+                (wd.user_id, ledger.Account.MAIN_NGN, -wd.amount_ngn, f'withdrawal:{wd.pk}')
+                for wd in approved if not wd.is_referral and wd.amount_ngn
+            ], guard=False)
+            Withdrawal.objects.filter(pk__in=[wd.pk for wd in approved]).update(
+                status='approved', reviewed_at=timezone.now(),
+            )
+            admin_stats.record_each(_per_user(approved, admin_stats.withdrawal_counters, 'approved', 'amount_usdt'))
+            notify_many(
+                build(
+                    user=wd.user, type='referral', title='💸 Referral Reward Withdrawn!',
+                    message=f'Your referral reward withdrawal of ${float(wd.amount_usdt):.2f} USDT has been approved.',
+                    icon='✅',
+                ) if wd.is_referral else build(
+                    user=wd.user, type='withdrawal', title='💸 Withdrawal Approved!',
+                    message=f'Your withdrawal of ${float(wd.amount_usdt):.2f} USDT has been approved.',
+                    icon='✅',
+                )
+                for wd in approved
+            )
+            _audit(actor, ip, 'withdrawal_approved', approved, lambda wd: (
+                f'Withdrawal ${wd.amount_usdt} USDT approved for {wd.user.email}'
+            ))
+    for wd in approved:
+        outcomes[wd.pk] = (APPROVED, wd.user.email)
+    return _results(ids, outcomes)
+
+
+def reject_withdrawals(ids, actor, ip=None, scoped=True):
+    """Reject pending withdrawals; nothing was debited yet. Mining withdrawals
+    lock the user's withdrawals again until a new fee is approved.
+    """
+    from apps.users.models import User
+    from apps.users.notify import build, notify_many
+
+    ids = _unique(ids)
+    with transaction.atomic():
+        withdrawals, outcomes = _lock(Withdrawal, ids, actor, scoped, ('pending',))
+        if withdrawals:
+            Withdrawal.objects.filter(pk__in=[wd.pk for wd in withdrawals]).update(
+                status='rejected', reviewed_at=timezone.now(),
+            )
+            User.objects.filter(pk__in={wd.user_id for wd in withdrawals if not wd.is_referral}).update(
+                withdrawal_fee_paid=False,
+            )
+            admin_stats.record_each(_per_user(withdrawals, admin_stats.withdrawal_counters, 'rejected', 'amount_usdt'))
+            notify_many(
+                build(
+                    user=wd.user, type='withdrawal', title='❌ Withdrawal Rejected',
+                    message='Your withdrawal request was rejected. Contact support.', icon='❌',
+                )
+                for wd in withdrawals
+            )
+            _audit(actor, ip, 'withdrawal_rejected', withdrawals, lambda wd: (
+                f'Withdrawal ${wd.amount_usdt} USDT rejected for {wd.user.email}'
+            ))
+    for wd in withdrawals:
+        outcomes[wd.pk] = (REJECTED, wd.user.email)
+    return _results(ids, outcomes)
+
+
+# ── Withdrawal fees ────────────────────────────────────────────────────────
+
+def _review_fees(ids, actor, ip, scoped, approve):
+    from apps.users.models import User
+    from apps.users.notify import build, notify_many
+
+    ids = _unique(ids)
+    with transaction.atomic():
+        payments, outcomes = _lock(WithdrawalFeePayment, ids, actor, scoped, ('pending',))
+        if payments:
+            WithdrawalFeePayment.objects.filter(pk__in=[payment.pk for payment in payments]).update(
+                status='approved' if approve else 'rejected', reviewed_at=timezone.now(),
+            )
+            User.objects.filter(pk__in={payment.user_id for payment in payments}).update(withdrawal_fee_paid=approve)
+            if approve:
+                title, message, icon = '✅ Withdrawal Unlocked!', 'Your transfer fee is approved. You can now withdraw!', '🎉'
+            else:
+                title, message, icon = '❌ Fee Rejected', 'Your transfer fee was rejected. Contact support.', '❌'
+            notify_many(
+                build(user=payment.user, type='withdrawal', title=title, message=message, icon=icon)
+                for payment in payments
+            )
+            verb = 'approved' if approve else 'rejected'
+            _audit(actor, ip, f'fee_{verb}', payments, lambda payment: (
+                f'Withdrawal fee ${payment.fee_amount_usd} {verb} for {payment.user.email}'
+            ))
+    for payment in payments:
+        outcomes[payment.pk] = (APPROVED if approve else REJECTED, payment.user.email)
+    return _results(ids, outcomes)
+
+
+def approve_fees(ids, actor, ip=None, scoped=True):
+    """Approve withdrawal fee payments and unlock the payers' withdrawals."""
+    return _review_fees(ids, actor, ip, scoped, approve=True)
+
+
+def reject_fees(ids, actor, ip=None, scoped=True):
+    """Reject withdrawal fee payments; the payers' withdrawals stay locked."""
+    return _review_fees(ids, actor, ip, scoped, approve=False)
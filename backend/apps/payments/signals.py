@@ -0,0 +1,16 @@
+"""
+Apex Mining - Payment Signals
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import ExchangeRate, PaymentSettings
+
+
+@receiver(post_save, sender=PaymentSettings)
+@receiver(post_delete, sender=PaymentSettings)
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def invalidate_singleton_cache(sender, **kwargs):
+    # update_payment_settings, AdminExchangeRateView and the Django admin
+    # save_model all write through save(), so they all land here
+    sender.invalidate_cache()
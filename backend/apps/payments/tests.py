@@ -1,3 +1,546 @@
-from django.test import TestCase
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from types import SimpleNamespace
+from django.apps import apps as django_apps
+from django.contrib import messages
+from django.contrib.admin import site
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apex_project.testing import QueryPlanMixin
+from apps.admin_panel import stats as admin_stats
+from apps.mining.models import MiningEarning, UserMiningSession
+from apps.referrals.models import ReferralCommission
+from apps.users.models import AuditLog, Notification, User
+from . import ledger, paystack
+from .models import Deposit, ExchangeRate, LedgerEntry, PaymentSettings, Withdrawal, WithdrawalFeePayment
+from .paystack import FakeBackend
 
-# Create your tests here.
+
+class HotQueryIndexTests(QueryPlanMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='payer@example.com', password='x', full_name='Payer')
+
+    def test_user_history_uses_user_created_indexes(self):
+        self.assertUsesIndex(Deposit.objects.filter(user=self.user)[:50], 'deposits_user_created_idx')
+        self.assertUsesIndex(Withdrawal.objects.filter(user=self.user)[:50], 'withdrawals_user_created_idx')
+
+    def test_admin_queue_uses_status_created_indexes(self):
+        self.assertUsesIndex(Deposit.objects.filter(status='pending')[:50], 'deposits_status_created_idx')
+        self.assertUsesIndex(Withdrawal.objects.filter(status='pending')[:50], 'withdrawals_status_created_idx')
+
+
+class LedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='holder@example.com', password='x')
+        cls.other = User.objects.create_user(email='other@example.com', password='x')
+
+    def balances(self, user):
+        return User.objects.values('balance_usdt', 'referral_balance_usdt', 'balance_ngn', 'total_earned').get(pk=user.pk)
+
+    def assertAudits(self):
+        call_command('audit_ledger', '--journals', stdout=StringIO())
+
+    def test_post_writes_a_balanced_journal_and_moves_projections(self):
+        journal = ledger.post(ledger.Kind.PAYOUT, [
+            (self.user.pk, ledger.Account.MAIN, Decimal('5')),
+            (self.other.pk, ledger.Account.MAIN, Decimal('3')),
+            (self.user.pk, ledger.Account.MAIN_NGN, Decimal('7000')),
+        ], reference='run:1')
+
+        entries = LedgerEntry.objects.filter(journal_id=journal)
+        self.assertEqual(entries.count(), 5)  # three legs, a platform leg per currency
+        for currency in ('USDT', 'NGN'):
+            self.assertEqual(sum(e.amount for e in entries if e.currency == currency), 0)
+        self.assertEqual(self.balances(self.user), {
+            'balance_usdt': Decimal('5'), 'referral_balance_usdt': Decimal('0'),
+            'balance_ngn': Decimal('7000'), 'total_earned': Decimal('5'),
+        })
+        self.assertEqual(self.balances(self.other)['total_earned'], Decimal('3'))
+        self.assertIsNone(ledger.post(ledger.Kind.PAYOUT, [(self.user.pk, ledger.Account.MAIN, 0)]))
+        self.assertAudits()
+
+    def test_credit_debit_and_transfer(self):
+        ledger.credit(self.user.pk, Decimal('20'), ledger.Kind.COMMISSION, account=ledger.Account.REFERRAL)
+        ledger.transfer(self.user.pk, Decimal('15'), ledger.Account.REFERRAL, ledger.Account.MAIN)
+        ledger.debit(self.user.pk, Decimal('10'), ledger.Kind.WITHDRAWAL)
+
+        balances = self.balances(self.user)
+        self.assertEqual(balances['referral_balance_usdt'], Decimal('5'))
+        self.assertEqual(balances['balance_usdt'], Decimal('5'))
+        # Only the commission is an earning; moving and spending it are not
+        self.assertEqual(balances['total_earned'], Decimal('20'))
+        self.assertAudits()
+
+    def test_guarded_debit_rolls_back_the_whole_journal(self):
+        ledger.credit(self.user.pk, Decimal('10'), ledger.Kind.OPENING_BALANCE)
+        before = LedgerEntry.objects.count()
+
+        with self.assertRaises(ledger.InsufficientFunds) as raised:
+            ledger.post(ledger.Kind.TRANSFER, [
+                (self.other.pk, ledger.Account.MAIN, Decimal('4')),
+                (self.user.pk, ledger.Account.MAIN, Decimal('-10.01')),
+            ])
+        self.assertEqual(raised.exception.accounts, [ledger.Account.MAIN])
+        self.assertEqual(LedgerEntry.objects.count(), before)
+        self.assertEqual(self.balances(self.other)['balance_usdt'], Decimal('0'))
+
+        # Unguarded debits may overdraw (balance_ngn is never guarded)
+        ledger.debit(self.user.pk, Decimal('50'), ledger.Kind.WITHDRAWAL, account=ledger.Account.MAIN_NGN, guard=False)
+        self.assertEqual(self.balances(self.user)['balance_ngn'], Decimal('-50'))
+        self.assertAudits()
+
+    def test_post_each_skips_users_who_cannot_cover_their_debits(self):
+        ledger.credit(self.user.pk, Decimal('10'), ledger.Kind.OPENING_BALANCE)
+        ledger.credit(self.other.pk, Decimal('10'), ledger.Kind.OPENING_BALANCE)
+
+        posted = ledger.post_each(ledger.Kind.WITHDRAWAL, [
+            (self.user.pk, ledger.Account.MAIN, Decimal('-6'), 'withdrawal:a'),
+            (self.user.pk, ledger.Account.MAIN, Decimal('-4'), 'withdrawal:b'),
+            # 6 + 6 exceeds the other user's 10, so neither of theirs posts
+            (self.other.pk, ledger.Account.MAIN, Decimal('-6'), 'withdrawal:c'),
+            (self.other.pk, ledger.Account.MAIN, Decimal('-6'), 'withdrawal:d'),
+        ])
+
+        self.assertEqual([reference for *_, reference in posted], ['withdrawal:a', 'withdrawal:b'])
+        self.assertEqual(self.balances(self.user)['balance_usdt'], Decimal('0'))
+        self.assertEqual(self.balances(self.other)['balance_usdt'], Decimal('10'))
+        self.assertFalse(LedgerEntry.objects.filter(reference__in=['withdrawal:c', 'withdrawal:d']).exists())
+        self.assertEqual(LedgerEntry.objects.filter(kind=ledger.Kind.WITHDRAWAL).values('journal_id').distinct().count(), 2)
+        self.assertAudits()
+
+    def test_set_balances_posts_the_difference(self):
+        ledger.credit(self.user.pk, Decimal('12.5'), ledger.Kind.OPENING_BALANCE)
+
+        ledger.set_balances(self.user.pk, {ledger.Account.MAIN: Decimal('8'), ledger.Account.REFERRAL: Decimal('3')})
+
+        balances = self.balances(self.user)
+        self.assertEqual((balances['balance_usdt'], balances['referral_balance_usdt']), (Decimal('8'), Decimal('3')))
+        adjustment = LedgerEntry.objects.filter(kind=ledger.Kind.ADJUSTMENT, user=self.user)
+        self.assertEqual(
+            dict(adjustment.values_list('account', 'amount')),
+            {ledger.Account.MAIN: Decimal('-4.5'), ledger.Account.REFERRAL: Decimal('3')},
+        )
+        # Already at the target: nothing to post
+        self.assertIsNone(ledger.set_balances(self.user.pk, {ledger.Account.MAIN: Decimal('8')}))
+        self.assertAudits()
+
+    def test_django_admin_balance_edit_is_an_adjustment(self):
+        admin = User.objects.create_superuser(email='super@example.com', password='x')
+        request = SimpleNamespace(user=admin)
+        user_admin = site._registry[User]
+        ledger.credit(self.user.pk, Decimal('6'), ledger.Kind.PAYOUT)
+        self.assertIn('total_earned', user_admin.get_readonly_fields(request, self.user))
+
+        holder = User.objects.get(pk=self.user.pk)
+        holder.balance_usdt = Decimal('10')
+        form = SimpleNamespace(changed_data=['balance_usdt'], cleaned_data={'balance_usdt': Decimal('10')})
+        user_admin.save_model(request, holder, form, change=True)
+
+        balances = self.balances(self.user)
+        self.assertEqual((balances['balance_usdt'], balances['total_earned']), (Decimal('10'), Decimal('6')))
+        self.assertEqual(LedgerEntry.objects.get(kind=ledger.Kind.ADJUSTMENT, user=self.user).amount, Decimal('4'))
+        self.assertAudits()
+
+    def test_plain_save_leaves_balances_to_the_ledger(self):
+        stale = User.objects.get(pk=self.user.pk)
+        ledger.credit(self.user.pk, Decimal('9'), ledger.Kind.PAYOUT)
+
+        stale.full_name = 'Renamed Holder'
+        stale.balance_usdt = Decimal('1000')
+        stale.save()
+
+        fresh = User.objects.get(pk=self.user.pk)
+        self.assertEqual(fresh.full_name, 'Renamed Holder')
+        self.assertEqual((fresh.balance_usdt, fresh.total_earned), (Decimal('9'), Decimal('9')))
+        self.assertAudits()
+
+    def test_opening_balance_migration_matches_existing_balances(self):
+        migration = import_module('apps.payments.migrations.0012_ledger_opening_balances')
+        User.objects.filter(pk=self.user.pk).update(
+            balance_usdt=Decimal('25'), referral_balance_usdt=Decimal('4'), balance_ngn=Decimal('3500'),
+        )
+
+        migration.post_opening_balances(django_apps, None)
+
+        entries = LedgerEntry.objects.filter(kind=ledger.Kind.OPENING_BALANCE)
+        self.assertEqual(
+            dict(entries.filter(user=self.user).values_list('account', 'amount')),
+            {ledger.Account.MAIN: Decimal('25'), ledger.Account.REFERRAL: Decimal('4'), ledger.Account.MAIN_NGN: Decimal('3500')},
+        )
+        self.assertFalse(entries.filter(user=self.other).exists())  # nothing to open
+        self.assertAudits()
+
+        migration.remove_opening_balances(django_apps, None)
+        self.assertFalse(entries.exists())
+
+
+class TransactionFeedTests(TestCase):
+    URL = '/api/v1/payments/transactions/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='history@example.com', password='x')
+        other = User.objects.create_user(email='other@example.com', password='x')
+        cls.stamp = timezone.now() - timedelta(days=1)
+
+        deposits = [
+            Deposit.objects.create(user=cls.user, tier_target=2, amount_usd=Decimal('16'), method='bank', status=status)
+            for status in ('pending', 'approved', 'rejected')
+        ]
+        withdrawals = [
+            Withdrawal.objects.create(user=cls.user, amount_usdt=Decimal('20'), transaction_id=f'WD-{i}', status=status)
+            for i, status in enumerate(('pending', 'approved'))
+        ]
+        fees = [WithdrawalFeePayment.objects.create(user=cls.user, tier=2, fee_amount_usd=Decimal('10'), method='crypto', status='approved')]
+        earnings = [MiningEarning.objects.create(user=cls.user, tier=1, amount_usdt=Decimal('1')) for _ in range(3)]
+        Deposit.objects.create(user=other, tier_target=2, amount_usd=Decimal('16'), method='bank')
+
+        # Every kind shares one timestamp, so only the id tie-break orders the feed
+        for model in (Deposit, Withdrawal, WithdrawalFeePayment):
+            model.objects.update(created_at=cls.stamp)
+        MiningEarning.objects.update(mined_at=cls.stamp)
+        Deposit.objects.filter(pk=deposits[0].pk).update(created_at=cls.stamp - timedelta(hours=1))
+
+        cls.oldest = str(deposits[0].pk)
+        cls.ids = {
+            'deposit': {str(d.pk) for d in deposits},
+            'withdrawal': {str(w.pk) for w in withdrawals},
+            'withdrawal_fee': {str(f.pk) for f in fees},
+            'earning': {str(e.pk) for e in earnings},
+        }
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, **params):
+        rows, cursor = [], None
+        while True:
+            data = self.client.get(self.URL, {**params, **({'cursor': cursor} if cursor else {})}).data
+            rows += data['results']
+            cursor = data['next_cursor']
+            if cursor is None:
+                return rows
+
+    def test_pages_cover_the_feed_once_across_shared_timestamps(self):
+        rows = self.walk(limit=2)
+
+        ids = [row['id'] for row in rows]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), set().union(*self.ids.values()))
+        keys = [(row['date'], row['id']) for row in rows]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+        self.assertEqual(rows[-1]['id'], self.oldest)
+
+    def test_type_and_status_filters(self):
+        def ids(**params):
+            return {row['id'] for row in self.walk(limit=3, **params)}
+
+        self.assertEqual(ids(type='deposits'), self.ids['deposit'])
+        self.assertEqual(ids(type='mining'), self.ids['earning'])
+        self.assertEqual(ids(type='fee_payments'), self.ids['withdrawal_fee'])
+
+        approved = ids(status='approved')
+        self.assertEqual(
+            {row['type'] for row in self.walk(status='approved')}, {'deposit', 'withdrawal', 'withdrawal_fee'},
+        )
+        self.assertEqual(len(approved), 3)
+        # Earnings are always credited, and nothing else is
+        self.assertEqual(ids(status='credited'), self.ids['earning'])
+        self.assertEqual(ids(type='deposit', status='credited'), set())
+        self.assertEqual(ids(type='mining', status='approved'), set())
+
+        self.assertEqual(self.client.get(self.URL, {'type': 'refunds'}).status_code, 400)
+
+    def test_garbage_cursor_is_rejected(self):
+        for cursor in ('not a cursor', 'bm90LWEtZGF0ZXxub3QtYS11dWlk', '%%%'):
+            response = self.client.get(self.URL, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.data, {'error': 'Invalid cursor'})
+
+    def test_response_shape(self):
+        data = self.client.get(self.URL, {'limit': 4}).data
+
+        self.assertEqual(set(data), {'results', 'count', 'next_cursor'})
+        self.assertEqual(data['count'], 4)
+        self.assertIsNotNone(data['next_cursor'])
+
+        rows = {row['type']: row for row in self.walk()}
+        common = {'id', 'type', 'label', 'amount', 'amount_usdt', 'amount_ngn', 'status', 'date', 'created_at', 'description'}
+        self.assertEqual(set(rows['deposit']), common | {'proof_image', 'tx_hash'})
+        self.assertEqual(set(rows['withdrawal']), common | {'destination', 'tx_id'})
+        self.assertEqual(set(rows['withdrawal_fee']), common | {'proof_image', 'tx_hash'})
+        self.assertEqual(set(rows['earning']), common)
+        self.assertEqual(rows['earning']['status'], 'credited')
+        self.assertEqual(rows['withdrawal']['amount'], -20.0)
+
+
+class SettingsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(email='super@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        ExchangeRate.objects.create(usd_to_ngn=Decimal('1450'), usd_to_ghs=Decimal('15.5'))
+
+    def test_warm_reads_run_no_queries(self):
+        PaymentSettings.get_settings()
+        ExchangeRate.get_current()
+        with self.assertNumQueries(0):
+            self.assertEqual(PaymentSettings.get_settings().pk, 1)
+            self.assertEqual(ExchangeRate.get_current().usd_to_ngn, Decimal('1450'))
+
+    def test_settings_endpoint_makes_changes_visible(self):
+        PaymentSettings.get_settings()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/payments/settings/update/', {'bank_name': 'Kuda Bank'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(PaymentSettings.get_settings().bank_name, 'Kuda Bank')
+
+    def test_exchange_rate_endpoint_makes_changes_visible(self):
+        ExchangeRate.get_current()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/v1/admin/exchange-rate/', {'usd_to_ngn': '1600.00'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(ExchangeRate.get_current().usd_to_ngn, Decimal('1600.00'))
+
+    def test_django_admin_saves_make_changes_visible(self):
+        request = SimpleNamespace(user=self.admin)
+        settings_obj, rate = PaymentSettings.load(), ExchangeRate.objects.get()
+        PaymentSettings.get_settings()
+        ExchangeRate.get_current()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_obj.account_number = '9876543210'
+            site._registry[PaymentSettings].save_model(request, settings_obj, None, change=True)
+            rate.usd_to_ghs = Decimal('16.25')
+            site._registry[ExchangeRate].save_model(request, rate, None, change=True)
+
+        self.assertEqual(PaymentSettings.get_settings().account_number, '9876543210')
+        self.assertEqual(PaymentSettings.get_settings().updated_by_id, self.admin.pk)
+        self.assertEqual(ExchangeRate.get_current().usd_to_ghs, Decimal('16.25'))
+
+
+@override_settings(APEX_PAYSTACK_BACKEND='apps.payments.paystack.FakeBackend', PAYSTACK_SECRET_KEY='sk_live_x')
+class PaystackClientTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='payer@example.com', password='x', full_name='Payer')
+
+    def setUp(self):
+        cache.clear()
+        FakeBackend.reset()
+        self.addCleanup(FakeBackend.reset)
+        FakeBackend.accounts[('058', '0123456789')] = 'GRACE NWOSU'
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def verify(self, account_number='0123456789', bank_code='058'):
+        return self.client.post('/api/v1/payments/verify-account/', {'account_number': account_number, 'bank_code': bank_code})
+
+    def test_repeat_lookups_are_served_from_cache(self):
+        for _ in range(2):
+            response = self.verify()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['account_name'], 'Grace Nwosu')
+            self.assertEqual(response.data['raw_account_name'], 'GRACE NWOSU')
+        # The 11-digit phone form normalizes to the same cached account
+        self.assertEqual(self.verify('00123456789').status_code, 200)
+        self.assertEqual(FakeBackend.calls, [('058', '0123456789')])
+
+        self.assertEqual(self.verify('0000000009').status_code, 400)
+        self.assertEqual(self.verify('0000000009').status_code, 400)
+        self.assertEqual(len(FakeBackend.calls), 2)
+
+    def test_breaker_opens_after_consecutive_failures(self):
+        FakeBackend.fail_with = paystack.ServiceUnavailable('timeout')
+        for n in range(paystack.BREAKER_THRESHOLD):
+            self.assertEqual(self.verify(f'000000001{n}').status_code, 503)
+        self.assertEqual(len(FakeBackend.calls), paystack.BREAKER_THRESHOLD)
+
+        FakeBackend.fail_with = None
+        self.assertEqual(self.verify().status_code, 503)
+        self.assertEqual(len(FakeBackend.calls), paystack.BREAKER_THRESHOLD)
+
+    @override_settings(PAYSTACK_SECRET_KEY='sk_test_x')
+    def test_test_mode_falls_back_to_a_stable_mock_name(self):
+        FakeBackend.fail_with = paystack.ServiceUnavailable('daily limit')
+        response = self.verify('5550001234')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['account_name'], paystack.mock_account_name('5550001234'))
+        self.assertIn('_debug_mode', response.data)
+
+
+class ReviewQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.super = User.objects.create_superuser(email='super@example.com', password='x')
+        cls.admin = User.objects.create_user(email='admin@example.com', password='x', referred_by=cls.super, is_admin=True)
+        cls.referrer = User.objects.create_user(email='referrer@example.com', password='x', referred_by=cls.admin)
+        cls.first = User.objects.create_user(email='first@example.com', password='x', referred_by=cls.referrer)
+        cls.second = User.objects.create_user(email='second@example.com', password='x', referred_by=cls.referrer)
+        cls.outsider = User.objects.create_user(email='outsider@example.com', password='x', referred_by=cls.super)
+        for user in (cls.first, cls.second, cls.outsider):
+            ledger.credit(user.pk, Decimal('150'), ledger.Kind.OPENING_BALANCE)
+        ledger.credit(cls.second.pk, Decimal('20'), ledger.Kind.OPENING_BALANCE, account=ledger.Account.REFERRAL)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def bulk(self, queue, action, ids):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/v1/admin/{queue}/bulk/', {'action': action, 'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return {item['id']: item['result'] for item in response.data['results']}
+
+    def assertLedgerAgrees(self):
+        call_command('audit_ledger', '--journals', stdout=StringIO())
+        # The dashboard counters moved exactly as a recount would have
+        for scope in (admin_stats.PLATFORM, self.admin.pk):
+            counters = {key: value for key, value in admin_stats.snapshot(scope).items() if value}
+            self.assertEqual(counters, {key: value for key, value in admin_stats.reconcile_scope(scope).items() if value})
+
+    def deposit(self, user, tier, **fields):
+        return Deposit.objects.create(user=user, tier_target=tier, amount_usd=Decimal('100'), method='crypto', **fields)
+
+    def test_deposits_upgrade_users_and_credit_referrers_once(self):
+        first, second = self.deposit(self.first, 2), self.deposit(self.second, 3)
+        outsider, reviewed = self.deposit(self.outsider, 2), self.deposit(self.first, 4, status='approved')
+        ids = [str(d.pk) for d in (first, second, outsider, reviewed)]
+        admin_stats.reconcile()
+
+        results = self.bulk('deposits', 'approve', ids)
+        self.assertEqual(list(results.values()), ['approved', 'approved', 'forbidden', 'already_reviewed'])
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.tier, 2)
+        self.assertIsNotNone(self.first.tier_expiry)
+        self.assertEqual(UserMiningSession.objects.filter(user__in=[self.first, self.second], is_active=True).count(), 2)
+        self.referrer.refresh_from_db()
+        self.assertEqual(ReferralCommission.objects.filter(referrer=self.referrer).count(), 2)
+        self.assertEqual(self.referrer.referral_balance_usdt, Decimal('20'))
+        self.assertEqual(AuditLog.objects.filter(action='deposit_approved').count(), 2)
+        self.assertEqual(Notification.objects.filter(user=self.referrer, type='referral').count(), 2)
+        self.assertLedgerAgrees()
+
+        # A second pass finds nothing left to do
+        results = self.bulk('deposits', 'approve', ids[:2])
+        self.assertEqual(set(results.values()), {'already_reviewed'})
+        self.assertEqual(ReferralCommission.objects.count(), 2)
+
+    def test_single_approve_goes_through_the_review_service(self):
+        deposit, outsider = self.deposit(self.first, 2), self.deposit(self.outsider, 2)
+        admin_stats.reconcile()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/v1/admin/deposits/{deposit.pk}/approve/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(UserMiningSession.objects.filter(user=self.first, tier=2, is_active=True).exists())
+        self.assertEqual(ReferralCommission.objects.filter(deposit=deposit, referrer=self.referrer).count(), 1)
+        self.assertLedgerAgrees()
+
+        self.assertEqual(self.client.post(f'/api/v1/admin/deposits/{deposit.pk}/approve/').status_code, 400)
+        self.assertEqual(self.client.post(f'/api/v1/admin/deposits/{outsider.pk}/approve/').status_code, 403)
+        self.assertEqual(self.client.post(f'/api/v1/admin/deposits/{uuid.uuid4()}/approve/').status_code, 404)
+        self.assertEqual(ReferralCommission.objects.count(), 1)
+
+    def test_single_withdrawal_review_matches_the_bulk_path(self):
+        User.objects.filter(pk=self.first.pk).update(withdrawal_fee_paid=True)
+        too_big = Withdrawal.objects.create(user=self.first, amount_usdt=Decimal('500'))
+        rejected = Withdrawal.objects.create(user=self.first, amount_usdt=Decimal('50'))
+        admin_stats.reconcile()
+
+        response = self.client.post(f'/api/v1/admin/withdrawals/{too_big.pk}/approve/')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('insufficient', response.data['detail'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/v1/admin/withdrawals/{rejected.pk}/reject/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.first.refresh_from_db()
+        self.assertFalse(self.first.withdrawal_fee_paid)  # relocked until a new fee is approved
+        self.assertTrue(Notification.objects.filter(user=self.first, type='withdrawal').exists())
+        self.assertEqual(AuditLog.objects.filter(action='withdrawal_rejected').count(), 1)
+        self.assertEqual(self.client.post(f'/api/v1/admin/withdrawals/{rejected.pk}/reject/').status_code, 400)
+        self.assertLedgerAgrees()
+
+    def test_withdrawal_debits_are_guarded_per_user(self):
+        short = [Withdrawal.objects.create(user=self.first, amount_usdt=Decimal('100')) for _ in range(2)]
+        covered = Withdrawal.objects.create(user=self.second, amount_usdt=Decimal('100'), amount_ngn=Decimal('145000'))
+        referral = Withdrawal.objects.create(user=self.second, amount_usdt=Decimal('20'), is_referral=True)
+        admin_stats.reconcile()
+
+        results = self.bulk('withdrawals', 'approve', [str(wd.pk) for wd in (*short, covered, referral)])
+        self.assertEqual(list(results.values()), ['failed', 'failed', 'approved', 'approved'])
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.first.balance_usdt, Decimal('150'))
+        self.assertEqual(self.second.balance_usdt, Decimal('50'))
+        self.assertEqual(self.second.referral_balance_usdt, Decimal('0'))
+        self.assertLedgerAgrees()
+
+        User.objects.filter(pk=self.first.pk).update(withdrawal_fee_paid=True)
+        self.assertEqual(set(self.bulk('withdrawals', 'reject', [str(short[0].pk)]).values()), {'rejected'})
+        self.first.refresh_from_db()
+        self.assertFalse(self.first.withdrawal_fee_paid)
+        self.assertLedgerAgrees()
+
+    def test_fee_reviews_lock_and_unlock_withdrawals(self):
+        fees = [
+            WithdrawalFeePayment.objects.create(user=user, tier=2, fee_amount_usd=Decimal('10'), method='crypto')
+            for user in (self.first, self.second)
+        ]
+        self.bulk('fees', 'approve', [str(fees[0].pk)])
+        self.bulk('fees', 'reject', [str(fees[1].pk)])
+        self.assertEqual(
+            dict(User.objects.filter(pk__in=[self.first.pk, self.second.pk]).values_list('email', 'withdrawal_fee_paid')),
+            {'first@example.com': True, 'second@example.com': False},
+        )
+        self.assertEqual(AuditLog.objects.filter(action__in=['fee_approved', 'fee_rejected']).count(), 2)
+
+    def test_batch_size_is_capped(self):
+        with self.settings(APEX_REVIEW_MAX_ITEMS=1):
+            response = self.client.post(
+                '/api/v1/admin/fees/bulk/', {'action': 'approve', 'ids': [str(uuid.uuid4())] * 2}, format='json',
+            )
+        self.assertEqual(response.status_code, 400)
+
+    def admin_reject(self, obj, settled_as=None):
+        """Reject `obj` from its Django admin edit page; returns the message levels shown."""
+        model_admin = type(site._registry[type(obj)])(type(obj), site)
+        levels = []
+        model_admin.message_user = lambda request, message, level: levels.append(level)
+        if settled_as:
+            review_now = model_admin._review
+
+            def review_later(request, ids, review_fn):
+                # Another reviewer got there between the page load and this save
+                type(obj).objects.filter(pk__in=ids).update(status=settled_as)
+                return review_now(request, ids, review_fn)
+            model_admin._review = review_later
+        form = SimpleNamespace(changed_data=['status'], cleaned_data={'status': 'rejected'})
+        model_admin.save_model(SimpleNamespace(user=self.super, META={}), obj, form, change=True)
+        obj.refresh_from_db()
+        return levels
+
+    def test_django_admin_reject_reports_only_what_it_rejected(self):
+        deposit = self.deposit(self.first, 2)
+        withdrawal = Withdrawal.objects.create(user=self.first, amount_usdt=Decimal('50'))
+
+        self.assertEqual(self.admin_reject(deposit, settled_as='approved'), [messages.ERROR])
+        self.assertEqual(self.admin_reject(withdrawal, settled_as='processing'), [messages.ERROR])
+        self.assertEqual((deposit.status, withdrawal.status), ('approved', 'processing'))
+
+        Deposit.objects.filter(pk=deposit.pk).update(status='pending')
+        Withdrawal.objects.filter(pk=withdrawal.pk).update(status='pending')
+        self.assertEqual(self.admin_reject(deposit), [messages.WARNING])
+        self.assertEqual(self.admin_reject(withdrawal), [messages.WARNING])
+        self.assertEqual((deposit.status, withdrawal.status), ('rejected', 'rejected'))
@@ -0,0 +1,162 @@
+"""
+Apex Cloud Mining — Unified transaction feed
+
+Deposits, withdrawals, fee payments and mining earnings live in four tables.
+The feed pages through all of them at once: a UNION ALL of (kind, id, date)
+keys ordered by (date, id) DESC picks the page, then each kind on the page is
+loaded with a single primary-key lookup. The cursor is the (date, id) of the
+last row, so every page costs the same no matter how much history a user has.
+"""
+import base64
+import binascii
+import datetime
+import uuid
+from django.db.models import CharField, F, Q, Value
+from apps.mining.models import MiningEarning
+from .models import Deposit, Withdrawal, WithdrawalFeePayment
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# ?type= values the frontend sends, mapped to feed kinds
+TYPE_ALIASES = {
+    'all':            ('deposit', 'withdrawal', 'earning', 'withdrawal_fee'),
+    'deposit':        ('deposit',),
+    'deposits':       ('deposit',),
+    'withdrawal':     ('withdrawal',),
+    'withdrawals':    ('withdrawal',),
+    'mining':         ('earning',),
+    'earning':        ('earning',),
+    'earnings':       ('earning',),
+    'withdrawal_fee': ('withdrawal_fee',),
+    'fee_payments':   ('withdrawal_fee',),
+}
+
+# kind → (model, date column); earnings have no status column and are always 'credited'
+SOURCES = {
+    'deposit':        (Deposit, 'created_at'),
+    'withdrawal':     (Withdrawal, 'created_at'),
+    'earning':        (MiningEarning, 'mined_at'),
+    'withdrawal_fee': (WithdrawalFeePayment, 'created_at'),
+}
+EARNING_STATUS = 'credited'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(date, pk):
+    raw = f'{date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        date, pk = raw.split('|')
+        return datetime.datetime.fromisoformat(date), uuid.UUID(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def _keys(user, kind, status, after):
+    model, date_field = SOURCES[kind]
+    qs = model.objects.filter(user=user)
+    if status and kind != 'earning':
+        qs = qs.filter(status=status)
+    if after:
+        date, pk = after
+        qs = qs.filter(Q(**{f'{date_field}__lt': date}) | Q(**{date_field: date, 'id__lt': pk}))
+    return (
+        qs.order_by()
+        .annotate(kind=Value(kind, output_field=CharField()), date=F(date_field))
+        .values_list('kind', 'id', 'date')
+    )
+
+
+def page(user, kinds, status=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """One page of the feed: (rows as (kind, obj) in feed order, next cursor or None)."""
+    after = decode_cursor(cursor) if cursor else None
+    if status and status != EARNING_STATUS:
+        kinds = [kind for kind in kinds if kind != 'earning']
+    elif status == EARNING_STATUS:
+        kinds = [kind for kind in kinds if kind == 'earning']
+    if not kinds:
+        return [], None
+
+    branches = [_keys(user, kind, status, after) for kind in kinds]
+    keys = branches[0].union(*branches[1:], all=True) if len(branches) > 1 else branches[0]
+    keys = list(keys.order_by('-date', '-id')[:limit + 1])
+
+    next_cursor = None
+    if len(keys) > limit:
+        keys = keys[:limit]
+        next_cursor = encode_cursor(keys[-1][2], keys[-1][1])
+
+    objects = {}
+    for kind in {kind for kind, _, _ in keys}:
+        model, _ = SOURCES[kind]
+        objects[kind] = model.objects.in_bulk([pk for k, pk, _ in keys if k == kind])
+    return [(kind, objects[kind][pk]) for kind, pk, _ in keys], next_cursor
+
+
+def serialize(kind, obj, request):
+    """The feed row shape the history page renders."""
+    if kind == 'deposit':
+        return {
+            'id': str(obj.id),
+            'type': 'deposit',
+            'label': f'Plan {obj.tier_target} Upgrade',
+            'amount': float(obj.amount_usd),
+            'amount_usdt': float(obj.amount_usd),
+            'amount_ngn': float(obj.amount_ngn) if obj.amount_ngn else 0,
+            'status': obj.status,
+            'date': obj.created_at.isoformat(),
+            'created_at': obj.created_at.isoformat(),
+            'description': f'Plan {obj.tier_target} Upgrade via {obj.get_method_display()}',
+            'proof_image': request.build_absolute_uri(obj.proof_image.url) if obj.proof_image else None,
+            'tx_hash': obj.tx_hash,
+        }
+    if kind == 'withdrawal':
+        return {
+            'id': str(obj.id),
+            'type': 'withdrawal',
+            'label': 'Withdrawal Request',
+            'amount': -float(obj.amount_usdt),
+            'amount_usdt': float(obj.amount_usdt),
+            'amount_ngn': float(obj.amount_ngn) if obj.amount_ngn else 0,
+            'status': obj.status,
+            'date': obj.created_at.isoformat(),
+            'created_at': obj.created_at.isoformat(),
+            'description': 'Withdrawal Request',
+            'destination': obj.wallet_address if obj.method == 'crypto' else f"{obj.bank_name} - {obj.account_number}",
+            'tx_id': obj.transaction_id,
+        }
+    if kind == 'earning':
+        return {
+            'id': str(obj.id),
+            'type': 'earning',
+            'label': 'Mining Reward',
+            'amount': float(obj.amount_usdt),
+            'amount_usdt': float(obj.amount_usdt),
+            'amount_ngn': 0,
+            'status': EARNING_STATUS,
+            'date': obj.mined_at.isoformat(),
+            'created_at': obj.mined_at.isoformat(),
+            'description': 'Daily Mining Reward',
+        }
+    return {
+        'id': str(obj.id),
+        'type': 'withdrawal_fee',
+        'label': 'Withdrawal Fee Payment',
+        'amount': -float(obj.fee_amount_usd),
+        'amount_usdt': float(obj.fee_amount_usd),
+        'amount_ngn': 0,
+        'status': obj.status,
+        'date': obj.created_at.isoformat(),
+        'created_at': obj.created_at.isoformat(),
+        'description': f'One-time withdrawal fee payment via {obj.get_method_display()}',
+        'proof_image': request.build_absolute_uri(obj.proof_image.url) if obj.proof_image else None,
+        'tx_hash': obj.tx_hash,
+    }
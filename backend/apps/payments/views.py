@@ -5,12 +5,15 @@ from rest_framework.decorators import api_view, permission_classes, throttle_cla
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
+from apps.users.agents import get_agent_details
 from apps.users.throttles import AccountVerificationThrottle
 import logging
 
 logger = logging.getLogger(__name__)
 from django.utils import timezone
 from decimal import Decimal
+from . import ledger, paystack, transactions
+from .ledger import Account
 from .models import Deposit, Withdrawal, ExchangeRate, PaymentSettings, WithdrawalFeePayment
 
 
@@ -79,11 +82,8 @@ def create_withdrawal(request):
         )
     
     # Get exchange rate for NGN conversion
-    try:
-        rate = ExchangeRate.objects.first()
-        amount_ngn = amount_usdt * Decimal(str(rate.usd_to_ngn)) if rate else None
-    except:
-        amount_ngn = None
+    rate = ExchangeRate.get_current()
+    amount_ngn = amount_usdt * Decimal(str(rate.usd_to_ngn)) if rate else None
     
     # Create withdrawal
     withdrawal = Withdrawal.objects.create(
@@ -138,24 +138,22 @@ def transfer_referral_to_main(request):
     
     # Perform the transfer
     try:
-        user.referral_balance_usdt -= amount_usdt
-        user.balance_usdt += amount_usdt
-        user.save()
-        
-        return Response({
-            'message': 'Transfer successful! Amount added to your main account.',
-            'amount_transferred': float(amount_usdt),
-            'referral_balance_remaining': float(user.referral_balance_usdt),
-            'main_balance': float(user.balance_usdt),
-        }, status=status.HTTP_200_OK)
-    
-    except Exception as e:
-        print(f'❌ Transfer referral error: {str(e)}')
+        ledger.transfer(user.pk, amount_usdt, Account.REFERRAL, Account.MAIN)
+    except ledger.InsufficientFunds:
+        user.refresh_from_db(fields=['referral_balance_usdt'])
         return Response(
-            {'detail': 'Transfer failed. Please try again.'},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            {'detail': f'Insufficient referral balance. Available: ${float(user.referral_balance_usdt):.2f} USDT'},
+            status=status.HTTP_400_BAD_REQUEST
         )
 
+    user.refresh_from_db(fields=['referral_balance_usdt', 'balance_usdt'])
+    return Response({
+        'message': 'Transfer successful! Amount added to your main account.',
+        'amount_transferred': float(amount_usdt),
+        'referral_balance_remaining': float(user.referral_balance_usdt),
+        'main_balance': float(user.balance_usdt),
+    }, status=status.HTTP_200_OK)
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -224,27 +222,18 @@ def get_payment_settings(request):
 
     # Override with agent details if user is authenticated and referred by an agent/admin upline
     if request.user.is_authenticated:
-        current = request.user.referred_by
-        visited = set()
-        agent = None
-        while current and current.id not in visited:
-            visited.add(current.id)
-            if current.is_agent or current.is_admin or current.is_superuser:
-                agent = current
-                break
-            current = current.referred_by
-
+        agent = get_agent_details(request.user.nearest_agent_id)
         if agent:
-            if agent.agent_wallet_usdt:
-                usdt_wallet = agent.agent_wallet_usdt
-            if agent.agent_bank_name:
-                bank_name = agent.agent_bank_name
-            if agent.agent_account_name:
-                account_name = agent.agent_account_name
-            if agent.agent_account_number:
-                account_number = agent.agent_account_number
-            if agent.agent_telegram_link:
-                telegram_url = agent.agent_telegram_link
+            if agent['agent_wallet_usdt']:
+                usdt_wallet = agent['agent_wallet_usdt']
+            if agent['agent_bank_name']:
+                bank_name = agent['agent_bank_name']
+            if agent['agent_account_name']:
+                account_name = agent['agent_account_name']
+            if agent['agent_account_number']:
+                account_number = agent['agent_account_number']
+            if agent['agent_telegram_link']:
+                telegram_url = agent['agent_telegram_link']
 
     return Response({
         'usdt_wallet': usdt_wallet,
@@ -267,7 +256,7 @@ def update_payment_settings(request):
     if not (user.is_superuser or getattr(user, 'is_super_admin', False)):
         return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
 
-    settings_obj = PaymentSettings.get_settings()
+    settings_obj = PaymentSettings.load()
 
     allowed_fields = [
         'usdt_wallet', 'bank_name', 'account_name', 'account_number',
@@ -288,29 +277,15 @@ def update_payment_settings(request):
 @permission_classes([AllowAny])
 def get_withdrawal_fees(request):
     """Get withdrawal fees for all tiers (admin-configurable)"""
-    try:
-        from apps.mining.models import MiningTier
-        tiers = MiningTier.objects.all().order_by('tier_number')
-        fees = {
-            tier.tier_number: {
-                'plan_name': tier.name,
-                'withdrawal_fee_usd': float(tier.withdrawal_fee_usd),
-            }
-            for tier in tiers
+    from apps.mining.catalogue import get_catalogue
+    fees = {
+        tier.tier_number: {
+            'plan_name': tier.name,
+            'withdrawal_fee_usd': float(tier.withdrawal_fee_usd),
         }
-        return Response({'fees': fees})
-    except Exception as e:
-        print(f'❌ Withdrawal fees error: {str(e)}')
-        # Fallback to default fees if DB query fails
-        return Response({
-            'fees': {
-                1: {'plan_name': 'Plan 1', 'withdrawal_fee_usd': 10.0},
-                2: {'plan_name': 'Plan 2', 'withdrawal_fee_usd': 8.0},
-                3: {'plan_name': 'Plan 3', 'withdrawal_fee_usd': 5.0},
-                4: {'plan_name': 'Plan 4', 'withdrawal_fee_usd': 3.0},
-                5: {'plan_name': 'Plan 5', 'withdrawal_fee_usd': 0.0},
-            }
-        })
+        for tier in get_catalogue()
+    }
+    return Response({'fees': fees})
 
 
 @api_view(['POST'])
@@ -333,13 +308,9 @@ def pay_withdrawal_fee(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Get tier's withdrawal fee
-    try:
-        from apps.mining.models import MiningTier
-        tier = MiningTier.objects.get(tier_number=user.tier)
-        fee_amount = tier.withdrawal_fee_usd
-    except MiningTier.DoesNotExist:
-        fee_amount = Decimal('10.00')  # Default
+    # Get tier's withdrawal fee (defaults to $10 for an unknown plan)
+    from apps.mining.catalogue import get_catalogue
+    fee_amount = get_catalogue().withdrawal_fee(user.tier)
     
     # Create withdrawal fee payment
     payment = WithdrawalFeePayment.objects.create(
@@ -361,7 +332,6 @@ def pay_withdrawal_fee(request):
 @throttle_classes([AccountVerificationThrottle])
 def verify_account_number(request):
     """Verify Nigerian bank account number using Paystack or mock for testing"""
-    from django.conf import settings
     account_number = request.data.get('account_number')
     bank_code = request.data.get('bank_code')
     
@@ -380,6 +350,10 @@ def verify_account_number(request):
     if len(account_number) == 11 and account_number.startswith('0'):
         account_number = account_number[1:]
     
+    bank_code = str(bank_code).strip()
+    if not bank_code.isdigit():
+        return Response({'detail': 'Invalid bank code.'}, status=status.HTTP_400_BAD_REQUEST)
+
     if not account_number.isdigit() or len(account_number) != 10:
         logger.warning(
             f"Failed account lookup verification: Invalid account number format '{account_number}' requested by User ID: {request.user.id}"
@@ -389,151 +363,54 @@ def verify_account_number(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Check if Paystack API is configured
-    paystack_key = getattr(settings, 'PAYSTACK_SECRET_KEY', None)
-    is_test_mode = paystack_key and paystack_key.startswith('sk_test_')
-    
-    if paystack_key and paystack_key != 'YOUR_PAYSTACK_SECRET_KEY':
-        # Use real Paystack API
-        try:
-            import requests
-            
-            headers = {
-                'Authorization': f'Bearer {paystack_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.get(
-                f'https://api.paystack.co/bank/resolve?account_number={account_number}&bank_code={bank_code}',
-                headers=headers,
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('status'):
-                    raw_name = data['data'].get('account_name', '')
-                    # Provide a nicely formatted display name while keeping raw result for debugging
-                    display_name = raw_name.title() if isinstance(raw_name, str) else raw_name
-                    return Response({
-                        'account_name': display_name,
-                        'raw_account_name': raw_name,
-                        'account_number': account_number,
-                    })
-            
-            # If in Paystack Test Mode and lookup fails (e.g. daily lookup limit exceeded),
-            # fall back to returning a realistic mock name so verification works during testing.
-            if is_test_mode:
-                logger.warning(
-                    f"Paystack resolve failed in test mode (Status {response.status_code}). Falling back to mock name resolution."
-                )
-                mock_names = {
-                    '0000000001': 'Chioma Okoro',
-                    '0000000002': 'Tunde Adeyemi',
-                    '0000000003': 'Zainab Hussein',
-                    '0000000004': 'Ngozi Ezeoke',
-                    '0000000005': 'David Okafor',
-                    '0072410373': 'MAHMUD OLASUNKANMI BASHIR',
-                    '8072410373': 'MAHMUD OLASUNKANMI BASHIR',
-                    '08072410373': 'MAHMUD OLASUNKANMI BASHIR',
-                    '1234567890': 'Grace Nwosu',
-                    '9876543210': 'Emeka Chukwu',
-                }
-                
-                if account_number in mock_names:
-                    account_name = mock_names[account_number]
-                else:
-                    hash_val = abs(hash(account_number)) % 1000
-                    first_names = ['Chioma', 'Tunde', 'Zainab', 'Ngozi', 'David', 'Grace', 'Emeka', 'Amara', 'Kayode', 'Blessing']
-                    last_names = ['Okoro', 'Adeyemi', 'Hussein', 'Ezeoke', 'Okafor', 'Nwosu', 'Chukwu', 'Iyanda', 'Mwangi', 'Ogunlade']
-                    first = first_names[hash_val % len(first_names)]
-                    last = last_names[(hash_val // len(first_names)) % len(last_names)]
-                    account_name = f'{first} {last}'
-                
-                return Response({
-                    'account_name': account_name,
-                    'account_number': account_number,
-                    '_debug_mode': 'Paystack test limit exceeded. Fallback mock name returned.'
-                })
-            
-            logger.warning(
-                f"Failed account lookup verification: Paystack API could not resolve '{account_number}' with bank '{bank_code}' for User ID: {request.user.id}"
-            )
-            return Response(
-                {'detail': 'Account verification failed. Check account number and bank code.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-            
-        except Exception as e:
-            logger.error(f'⚠️ Paystack verification error: {str(e)}')
-            if is_test_mode:
-                mock_names = {
-                    '0000000001': 'Chioma Okoro',
-                    '0000000002': 'Tunde Adeyemi',
-                    '0000000003': 'Zainab Hussein',
-                    '0000000004': 'Ngozi Ezeoke',
-                    '0000000005': 'David Okafor',
-                    '0072410373': 'MAHMUD OLASUNKANMI BASHIR',
-                    '8072410373': 'MAHMUD OLASUNKANMI BASHIR',
-                    '08072410373': 'MAHMUD OLASUNKANMI BASHIR',
-                    '1234567890': 'Grace Nwosu',
-                    '9876543210': 'Emeka Chukwu',
-                }
-                if account_number in mock_names:
-                    account_name = mock_names[account_number]
-                else:
-                    hash_val = abs(hash(account_number)) % 1000
-                    first_names = ['Chioma', 'Tunde', 'Zainab', 'Ngozi', 'David', 'Grace', 'Emeka', 'Amara', 'Kayode', 'Blessing']
-                    last_names = ['Okoro', 'Adeyemi', 'Hussein', 'Ezeoke', 'Okafor', 'Nwosu', 'Chukwu', 'Iyanda', 'Mwangi', 'Ogunlade']
-                    first = first_names[hash_val % len(first_names)]
-                    last = last_names[(hash_val // len(first_names)) % len(last_names)]
-                    account_name = f'{first} {last}'
-                return Response({
-                    'account_name': account_name,
-                    'account_number': account_number,
-                    '_debug_mode': 'Paystack connection error. Fallback mock name returned.'
-                })
-            return Response(
-                {'detail': 'Account verification service unavailable. Please try again.'},
-                status=status.HTTP_533_SERVICE_UNAVAILABLE
-            )
-    
+    client = paystack.get_client()
+    try:
+        raw_name = client.resolve_account(account_number, bank_code)
+    except paystack.AccountNotFound as e:
+        failure = e
+        unavailable = False
+    except paystack.ServiceUnavailable as e:
+        failure = e
+        unavailable = True
+        logger.error(f'⚠️ Paystack verification error: {str(e)}')
     else:
-        # Development mode: Generate realistic mock names for testing
-        # In production, configure PAYSTACK_SECRET_KEY in settings
-        import random
-
-        mock_names = {
-            '0000000001': 'Chioma Okoro',
-            '0000000002': 'Tunde Adeyemi',
-            '0000000003': 'Zainab Hussein',
-            '0000000004': 'Ngozi Ezeoke',
-            '0000000005': 'David Okafor',
-            '0072410373': 'MAHMUD OLASUNKANMI BASHIR',
-            '8072410373': 'MAHMUD OLASUNKANMI BASHIR',
-            '08072410373': 'MAHMUD OLASUNKANMI BASHIR',
-            '1234567890': 'Grace Nwosu',
-            '9876543210': 'Emeka Chukwu',
-        }
-
-        # Return specific name if in mock list, otherwise generate based on account number
-        if account_number in mock_names:
-            account_name = mock_names[account_number]
-        else:
-            # Hash account number to generate consistent but realistic name
-            hash_val = abs(hash(account_number)) % 1000
-            first_names = ['Chioma', 'Tunde', 'Zainab', 'Ngozi', 'David', 'Grace', 'Emeka', 'Amara', 'Kayode', 'Blessing']
-            last_names = ['Okoro', 'Adeyemi', 'Hussein', 'Ezeoke', 'Okafor', 'Nwosu', 'Chukwu', 'Iyanda', 'Mwangi', 'Ogunlade']
-            first = first_names[hash_val % len(first_names)]
-            last = last_names[(hash_val // len(first_names)) % len(last_names)]
-            account_name = f'{first} {last}'
+        if client.is_mock:
+            # Development mode: configure PAYSTACK_SECRET_KEY for real verification
+            return Response({
+                'account_name': raw_name,
+                'account_number': account_number,
+                '_debug_mode': 'This is a test response. Configure PAYSTACK_SECRET_KEY for real verification.'
+            })
+        # Provide a nicely formatted display name while keeping raw result for debugging
+        return Response({
+            'account_name': raw_name.title() if isinstance(raw_name, str) else raw_name,
+            'raw_account_name': raw_name,
+            'account_number': account_number,
+        })
 
+    # If in Paystack Test Mode and lookup fails (e.g. daily lookup limit exceeded),
+    # fall back to returning a realistic mock name so verification works during testing.
+    if client.test_mode:
+        logger.warning(f'Paystack resolve failed in test mode ({failure}). Falling back to mock name resolution.')
         return Response({
-            'account_name': account_name,
+            'account_name': paystack.mock_account_name(account_number),
             'account_number': account_number,
-            '_debug_mode': 'This is a test response. Configure PAYSTACK_SECRET_KEY for real verification.'
+            '_debug_mode': f'Paystack lookup failed ({failure}). Fallback mock name returned.'
         })
 
+    if unavailable:
+        return Response(
+            {'detail': 'Account verification service unavailable. Please try again.'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    logger.warning(
+        f"Failed account lookup verification: Paystack API could not resolve '{account_number}' with bank '{bank_code}' for User ID: {request.user.id}"
+    )
+    return Response(
+        {'detail': 'Account verification failed. Check account number and bank code.'},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -569,116 +446,50 @@ def get_nigerian_banks(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_transactions(request):
-    """Get user transactions"""
-    user = request.user
-    trans_type = request.GET.get('type', 'all')
-    
-    transactions = []
-    
+    """Get user transactions, newest first.
+
+    Query params: type (all/deposit/withdrawal/mining/withdrawal_fee),
+    status, limit (max 100) and cursor (the previous page's next_cursor).
+    """
+    kinds = transactions.TYPE_ALIASES.get(request.GET.get('type', 'all'))
+    if kinds is None:
+        return Response({'error': 'Unknown transaction type'}, status=status.HTTP_400_BAD_REQUEST)
+
     try:
-        # Deposits
-        if trans_type in ['all', 'deposit', 'deposits']:
-            deposits = Deposit.objects.filter(user=user).order_by('-created_at')
-            for d in deposits:
-                transactions.append({
-                    'id': str(d.id),
-                    'type': 'deposit',
-                    'label': f'Plan {d.tier_target} Upgrade',
-                    'amount': float(d.amount_usd),
-                    'amount_usdt': float(d.amount_usd),
-                    'amount_ngn': float(d.amount_ngn) if d.amount_ngn else 0,
-                    'status': d.status,
-                    'date': d.created_at.isoformat(),
-                    'created_at': d.created_at.isoformat(),
-                    'description': f'Plan {d.tier_target} Upgrade via {d.get_method_display()}',
-                    'proof_image': request.build_absolute_uri(d.proof_image.url) if d.proof_image else None,
-                    'tx_hash': d.tx_hash,
-                })
-        
-        # Withdrawals
-        if trans_type in ['all', 'withdrawal', 'withdrawals']:
-            withdrawals = Withdrawal.objects.filter(user=user).order_by('-created_at')
-            for w in withdrawals:
-                transactions.append({
-                    'id': str(w.id),
-                    'type': 'withdrawal',
-                    'label': 'Withdrawal Request',
-                    'amount': -float(w.amount_usdt),
-                    'amount_usdt': float(w.amount_usdt),
-                    'amount_ngn': float(w.amount_ngn) if w.amount_ngn else 0,
-                    'status': w.status,
-                    'date': w.created_at.isoformat(),
-                    'created_at': w.created_at.isoformat(),
-                    'description': 'Withdrawal Request',
-                    'destination': w.wallet_address if w.method == 'crypto' else f"{w.bank_name} - {w.account_number}",
-                    'tx_id': w.transaction_id,
-                })
-        
-        # Mining (Earnings)
-        if trans_type in ['all', 'mining', 'earnings']:
-            from apps.mining.models import MiningEarning
-            earnings = MiningEarning.objects.filter(user=user).order_by('-mined_at')[:50]
-            for e in earnings:
-                transactions.append({
-                    'id': str(e.id),
-                    'type': 'earning',
-                    'label': 'Mining Reward',
-                    'amount': float(e.amount_usdt),
-                    'amount_usdt': float(e.amount_usdt),
-                    'amount_ngn': 0,
-                    'status': 'credited',
-                    'date': e.mined_at.isoformat(),
-                    'created_at': e.mined_at.isoformat(),
-                    'description': 'Daily Mining Reward'
-                })
-
-        # Withdrawal Fee Payments
-        if trans_type in ['all', 'withdrawal_fee', 'fee_payments']:
-            fees = WithdrawalFeePayment.objects.filter(user=user).order_by('-created_at')
-            for f in fees:
-                transactions.append({
-                    'id': str(f.id),
-                    'type': 'withdrawal_fee',
-                    'label': 'Withdrawal Fee Payment',
-                    'amount': -float(f.fee_amount_usd),
-                    'amount_usdt': float(f.fee_amount_usd),
-                    'amount_ngn': 0,
-                    'status': f.status,
-                    'date': f.created_at.isoformat(),
-                    'created_at': f.created_at.isoformat(),
-                    'description': f'One-time withdrawal fee payment via {f.get_method_display()}',
-                    'proof_image': request.build_absolute_uri(f.proof_image.url) if f.proof_image else None,
-                    'tx_hash': f.tx_hash,
-                })
-        
-        # Sort by date
-        transactions.sort(key=lambda x: x['date'], reverse=True)
-        
-        return Response({
-            'results': transactions,
-            'count': len(transactions)
-        })
-        
-    except Exception as e:
-        print(f'❌ Transaction error: {str(e)}')
-        import traceback
-        traceback.print_exc()
-        return Response({'results': [], 'count': 0}, status=status.HTTP_200_OK)
+        limit = min(int(request.GET.get('limit', transactions.DEFAULT_PAGE_SIZE)), transactions.MAX_PAGE_SIZE)
+    except ValueError:
+        limit = transactions.DEFAULT_PAGE_SIZE
+    limit = max(limit, 1)
+
+    try:
+        rows, next_cursor = transactions.page(
+            request.user,
+            kinds,
+            status=request.GET.get('status') or None,
+            cursor=request.GET.get('cursor') or None,
+            limit=limit,
+        )
+    except transactions.InvalidCursor:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = [transactions.serialize(kind, obj, request) for kind, obj in rows]
+    return Response({
+        'results': results,
+        'count': len(results),
+        'next_cursor': next_cursor,
+    })
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_exchange_rate(request):
     """Get current USD to NGN exchange rate (admin-controlled)"""
-    try:
-        rate = ExchangeRate.objects.first()
-        if rate:
-            return Response({
-                'usd_to_ngn': float(rate.usd_to_ngn),
-                'usd_to_ghs': float(rate.usd_to_ghs),
-                'updated_at': rate.updated_at.isoformat(),
-            })
-    except Exception:
-        pass
+    rate = ExchangeRate.get_current()
+    if rate:
+        return Response({
+            'usd_to_ngn': float(rate.usd_to_ngn),
+            'usd_to_ghs': float(rate.usd_to_ghs),
+            'updated_at': rate.updated_at.isoformat(),
+        })
     # Fallback default
     return Response({'usd_to_ngn': 1400, 'usd_to_ghs': 15.5})
\ No newline at end of file
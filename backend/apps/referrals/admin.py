@@ -5,6 +5,7 @@ from .models import ReferralCommission # Matches your models.py
 class ReferralCommissionAdmin(admin.ModelAdmin):
     # Updated list_display to match the fields actually in your model
     list_display = ('referrer', 'referee', 'amount_usdt', 'commission_pct', 'created_at')
+    list_select_related = ('referrer', 'referee')
     list_filter = ('created_at', 'commission_pct')
     search_fields = ('referrer__email', 'referee__email')
     ordering = ('-created_at',)
\ No newline at end of file
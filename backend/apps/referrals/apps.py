@@ -5,3 +5,6 @@ class PaymentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.referrals'  # <-- this must match your folder path
 
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,152 @@
+"""
+Apex Cloud Mining — Referral closure maintenance
+
+Keeps ReferralClosure in step with User.referred_by. A user's subtree is
+every row with ancestor=user (including the user's own depth-0 row), so
+moving or removing a user only touches the rows that connect that subtree
+to its old and new uplines.
+"""
+import logging
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+
+logger = logging.getLogger(__name__)
+
+
+def _closure():
+    from .models import ReferralClosure
+    return ReferralClosure
+
+
+def add_user(user_id, parent_id=None):
+    """Register a new user (and link them under `parent_id`, if any).
+
+    A new user has no subtree yet, so this is one read of the parent's
+    uplines and one INSERT.
+    """
+    ReferralClosure = _closure()
+    rows = [ReferralClosure(ancestor_id=user_id, descendant_id=user_id, depth=0)]
+    if parent_id:
+        uplines = list(ReferralClosure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth'))
+        rows.extend(
+            ReferralClosure(ancestor_id=ancestor_id, descendant_id=user_id, depth=depth + 1)
+            for ancestor_id, depth in uplines or [(parent_id, 0)]
+        )
+    ReferralClosure.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+@transaction.atomic
+def move_user(user_id, parent_id):
+    """Re-hang `user_id`'s whole subtree under `parent_id` (None = make it a root)."""
+    ReferralClosure = _closure()
+
+    subtree = ReferralClosure.objects.filter(ancestor_id=user_id)
+    if parent_id and subtree.filter(descendant_id=parent_id).exists():
+        # User.save() refuses such a referrer; keep the tree as it was
+        logger.warning(f'[Referrals] Ignoring referral cycle: {parent_id} is already below {user_id}')
+        return
+    if not subtree.exists():
+        ReferralClosure.objects.create(ancestor_id=user_id, descendant_id=user_id, depth=0)
+
+    # Cut the subtree loose from its old upline
+    subtree_ids = subtree.values('descendant_id')
+    ReferralClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+
+    if not parent_id:
+        recompute_nearest_agent(user_id)
+        return
+
+    uplines     = list(ReferralClosure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth'))
+    descendants = list(subtree.values_list('descendant_id', 'depth'))
+    if not uplines:
+        # Parent predates the closure table — give it its self row
+        uplines = [(parent_id, 0)]
+        ReferralClosure.objects.get_or_create(ancestor_id=parent_id, descendant_id=parent_id, defaults={'depth': 0})
+
+    ReferralClosure.objects.bulk_create(
+        [
+            ReferralClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+            for ancestor_id, up in uplines
+            for descendant_id, down in descendants
+        ],
+        batch_size=1000,
+    )
+    recompute_nearest_agent(user_id)
+
+
+def recompute_nearest_agent(*root_ids):
+    """Refresh User.nearest_agent for every user in the given subtrees
+    (every user, if no roots are given).
+
+    One UPDATE: each user takes the agent-like ancestor with the smallest
+    depth, or NULL if there is none. Returns the number of users touched.
+    """
+    from apps.users.models import User
+    ReferralClosure = _closure()
+
+    nearest = (
+        ReferralClosure.objects
+        .filter(descendant_id=OuterRef('pk'), depth__gt=0)
+        .filter(Q(ancestor__is_agent=True) | Q(ancestor__is_admin=True) | Q(ancestor__is_superuser=True))
+        .order_by('depth')
+        .values('ancestor_id')[:1]
+    )
+    users = User.objects.all()
+    if root_ids:
+        users = users.filter(id__in=ReferralClosure.objects.filter(ancestor_id__in=root_ids).values('descendant_id'))
+    return users.update(nearest_agent=Subquery(nearest))
+
+
+def remove_user(user_id):
+    """Detach a user's subtree before the user row is deleted.
+
+    The user's own rows go with the CASCADE; their children become roots
+    because referred_by is SET_NULL, and need recompute_nearest_agent()
+    once the delete has gone through.
+    """
+    ReferralClosure = _closure()
+    subtree_ids = ReferralClosure.objects.filter(ancestor_id=user_id).values('descendant_id')
+    ReferralClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+
+
+def build_closure(User, ReferralClosure, batch_size=5000, log=None):
+    """(Re)build the whole closure table level by level.
+
+    Takes the model classes as arguments so the data migration can pass its
+    historical models. Depth-0 rows are written first; each pass then derives
+    depth d+1 rows from depth d rows by following the ancestor's referred_by.
+    Conflicting pairs (referral cycles) are skipped.
+    """
+    ReferralClosure.objects.all().delete()
+
+    def flush(rows):
+        ReferralClosure.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+        rows.clear()
+
+    rows = []
+    for user_id in User.objects.values_list('id', flat=True).iterator(chunk_size=batch_size):
+        rows.append(ReferralClosure(ancestor_id=user_id, descendant_id=user_id, depth=0))
+        if len(rows) >= batch_size:
+            flush(rows)
+    flush(rows)
+
+    depth = 0
+    while True:
+        level = (
+            ReferralClosure.objects
+            .filter(depth=depth, ancestor__referred_by__isnull=False)
+            .values_list('ancestor__referred_by_id', 'descendant_id')
+        )
+        for ancestor_id, descendant_id in level.iterator(chunk_size=batch_size):
+            rows.append(ReferralClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth + 1))
+            if len(rows) >= batch_size:
+                flush(rows)
+        flush(rows)
+
+        depth += 1
+        if not ReferralClosure.objects.filter(depth=depth).exists():
+            break
+        if log:
+            log(f'Built depth {depth}')
+
+    return ReferralClosure.objects.count()
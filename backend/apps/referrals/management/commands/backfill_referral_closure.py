@@ -0,0 +1,29 @@
+"""
+Rebuild the referral closure table from User.referred_by.
+
+    python manage.py backfill_referral_closure
+
+The table is normally kept in step by apps.referrals.signals; run this after
+bulk imports or raw SQL edits to referred_by.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.referrals.closure import build_closure
+from apps.referrals.models import ReferralClosure
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the referral closure table from User.referred_by'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows = build_closure(
+                User, ReferralClosure,
+                batch_size=options['batch_size'],
+                log=self.stdout.write,
+            )
+        self.stdout.write(self.style.SUCCESS(f'Referral closure rebuilt: {rows} rows'))
@@ -0,0 +1,22 @@
+"""
+Recompute User.nearest_agent from the referral closure table.
+
+    python manage.py recompute_nearest_agent                 # everyone
+    python manage.py recompute_nearest_agent --root <uuid>   # one subtree
+
+Signals keep the column current; run this after bulk edits to is_agent /
+is_admin / referred_by that bypass save().
+"""
+from django.core.management.base import BaseCommand
+from apps.referrals.closure import recompute_nearest_agent
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized nearest agent for a referral subtree (or everyone)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', action='append', default=[], help='User ID whose subtree to recompute (repeatable)')
+
+    def handle(self, *args, **options):
+        updated = recompute_nearest_agent(*options['root'])
+        self.stdout.write(self.style.SUCCESS(f'nearest_agent recomputed for {updated} users'))
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.9 on 2026-10-17 18:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_closure(apps, schema_editor):
+    from apps.referrals.closure import build_closure
+    build_closure(apps.get_model('users', 'User'), apps.get_model('referrals', 'ReferralClosure'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('referrals', '0005_alter_referralcommission_deposit'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferralClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='referral_descendants', to=settings.AUTH_USER_MODEL)),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='referral_ancestors', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'referral_closure',
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='referral_cl_descend_4f0744_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(backfill_closure, migrations.RunPython.noop),
+    ]
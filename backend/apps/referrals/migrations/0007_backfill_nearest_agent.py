@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models import OuterRef, Q, Subquery
+
+
+def backfill_nearest_agent(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    ReferralClosure = apps.get_model('referrals', 'ReferralClosure')
+    nearest = (
+        ReferralClosure.objects
+        .filter(descendant_id=OuterRef('pk'), depth__gt=0)
+        .filter(Q(ancestor__is_agent=True) | Q(ancestor__is_admin=True) | Q(ancestor__is_superuser=True))
+        .order_by('depth')
+        .values('ancestor_id')[:1]
+    )
+    User.objects.update(nearest_agent=Subquery(nearest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('referrals', '0006_referralclosure'),
+        ('users', '0013_user_nearest_agent'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_nearest_agent, migrations.RunPython.noop),
+    ]
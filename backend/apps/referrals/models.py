@@ -80,4 +80,30 @@ class AdminCommissionSummary(models.Model):
         verbose_name_plural = 'Admin Commission Summaries'
 
     def __str__(self):
-        return f"{self.admin.email} — ${self.total_earned} total"
\ No newline at end of file
+        return f"{self.admin.email} — ${self.total_earned} total"
+
+class ReferralClosure(models.Model):
+    """Transitive closure of the `referred_by` tree.
+
+    One row per (ancestor, descendant) pair, including a depth-0 row linking
+    every user to themself. "Everyone below X" is then a single indexed lookup
+    on ancestor=X instead of one query per tree level. Maintained by
+    apps.referrals.closure on registration, referred_by changes and deletes.
+    """
+    ancestor   = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='referral_descendants'
+    )
+    descendant = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='referral_ancestors'
+    )
+    depth      = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = 'referral_closure'
+        unique_together = [('ancestor', 'descendant')]
+        indexes = [
+            models.Index(fields=['descendant', 'depth']),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} → {self.descendant_id} (depth {self.depth})"
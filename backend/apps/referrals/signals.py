@@ -0,0 +1,45 @@
+"""
+Apex Mining - Referral Signals
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from . import closure
+
+AGENT_FLAGS = ('is_agent', 'is_admin', 'is_superuser')
+
+
+def _saved(update_fields, *names):
+    return update_fields is None or bool(set(names) & set(update_fields))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_referral_closure(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        # nearest_agent was derived from the referrer in User.save()
+        closure.add_user(instance.pk, instance.referred_by_id)
+        return
+
+    if _saved(update_fields, 'referred_by', 'referred_by_id') and instance.field_changed('referred_by_id'):
+        closure.move_user(instance.pk, instance.referred_by_id)
+        # Keep the in-memory copy current so a later full save() can't undo it
+        instance.nearest_agent_id = (
+            sender.objects.filter(pk=instance.pk).values_list('nearest_agent_id', flat=True).first()
+        )
+
+    if any(_saved(update_fields, flag) and instance.field_changed(flag) for flag in AGENT_FLAGS):
+        # Becoming (or ceasing to be) an agent changes who the downline pays
+        closure.recompute_nearest_agent(instance.pk)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def detach_referral_closure(sender, instance, **kwargs):
+    instance._referral_children = list(instance.referrals.values_list('id', flat=True))
+    closure.remove_user(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def reassign_orphaned_downline(sender, instance, **kwargs):
+    children = getattr(instance, '_referral_children', None)
+    if children:
+        closure.recompute_nearest_agent(*children)
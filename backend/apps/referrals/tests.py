@@ -1,3 +1,79 @@
+from django.core.exceptions import ValidationError
 from django.test import TestCase
+from apps.users.models import User
+from . import closure
+from .models import ReferralClosure
 
-# Create your tests here.
+
+class ReferralClosureTests(TestCase):
+    def setUp(self):
+        # agent → a → b → c, and a second root `other`
+        self.agent = User.objects.create_user(email='agent@example.com', password='x', is_agent=True)
+        self.a = User.objects.create_user(email='a@example.com', password='x', referred_by=self.agent)
+        self.b = User.objects.create_user(email='b@example.com', password='x', referred_by=self.a)
+        self.c = User.objects.create_user(email='c@example.com', password='x', referred_by=self.b)
+        self.other = User.objects.create_user(email='other@example.com', password='x')
+
+    def uplines(self, user):
+        return dict(ReferralClosure.objects.filter(descendant=user).values_list('ancestor_id', 'depth'))
+
+    def nearest_agent(self, user):
+        return User.objects.values_list('nearest_agent_id', flat=True).get(pk=user.pk)
+
+    def test_new_users_inherit_their_uplines(self):
+        self.assertEqual(self.uplines(self.c), {self.c.pk: 0, self.b.pk: 1, self.a.pk: 2, self.agent.pk: 3})
+        self.assertEqual(self.nearest_agent(self.c), self.agent.pk)
+
+    def test_move_rehangs_the_whole_subtree(self):
+        self.b.referred_by = self.other
+        self.b.save()
+
+        self.assertEqual(self.uplines(self.b), {self.b.pk: 0, self.other.pk: 1})
+        self.assertEqual(self.uplines(self.c), {self.c.pk: 0, self.b.pk: 1, self.other.pk: 2})
+        self.assertFalse(ReferralClosure.objects.filter(ancestor=self.a, depth__gt=0).exists())
+        # The new upline has no agent, so nobody collects for the subtree
+        self.assertIsNone(self.nearest_agent(self.c))
+
+        closure.move_user(self.b.pk, None)
+        self.assertEqual(self.uplines(self.c), {self.c.pk: 0, self.b.pk: 1})
+
+    def test_move_below_own_descendant_is_rejected(self):
+        before = set(ReferralClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+        self.a.referred_by = self.c
+        with self.assertRaises(ValidationError):
+            self.a.save()
+        with self.assertRaises(ValidationError):
+            self.a.clean()
+        self.a.referred_by = self.a
+        with self.assertRaises(ValidationError):
+            self.a.clean()
+        self.assertEqual(User.objects.values_list('referred_by_id', flat=True).get(pk=self.a.pk), self.agent.pk)
+
+        # A direct call leaves the closure untouched rather than cutting `a` loose
+        with self.assertLogs('apps.referrals.closure', 'WARNING'):
+            closure.move_user(self.a.pk, self.c.pk)
+        self.assertEqual(set(ReferralClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth')), before)
+        self.assertEqual(self.nearest_agent(self.c), self.agent.pk)
+
+    def test_removing_a_user_makes_their_children_roots(self):
+        self.b.delete()
+
+        self.assertEqual(self.uplines(self.c), {self.c.pk: 0})
+        self.assertFalse(ReferralClosure.objects.filter(ancestor_id=self.b.pk).exists())
+        self.assertEqual(set(self.uplines(self.a)), {self.a.pk, self.agent.pk})
+        self.assertIsNone(self.nearest_agent(self.c))
+
+    def test_agent_flag_changes_reroute_the_downline(self):
+        self.b.is_agent = True
+        self.b.save()
+        self.assertEqual(self.nearest_agent(self.c), self.b.pk)
+        self.assertEqual(self.nearest_agent(self.b), self.agent.pk)
+
+        self.b.is_agent = False
+        self.b.save()
+        self.assertEqual(self.nearest_agent(self.c), self.agent.pk)
+
+        User.objects.filter(pk=self.agent.pk).update(is_agent=False)
+        self.assertEqual(closure.recompute_nearest_agent(), 5)
+        self.assertIsNone(self.nearest_agent(self.c))
@@ -6,7 +6,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status as http_status
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Sum
+from apex_project.db import for_serializer
+from apps.payments import ledger
 from .models import ReferralCommission, AdminCommissionSummary
 
 User = get_user_model()
@@ -60,7 +63,9 @@ class ReferralDashboardView(APIView):
             'total_earned':     total_earned,
             'referral_balance': float(user.referral_balance_usdt),
             'referred_users':   ReferredUserSerializer(referred_users, many=True).data,
-            'commission_log':   ReferralCommissionSerializer(commissions[:50], many=True).data,
+            'commission_log':   ReferralCommissionSerializer(
+                for_serializer(commissions, ReferralCommissionSerializer)[:50], many=True,
+            ).data,
         })
 
 
@@ -74,11 +79,11 @@ def admin_referral_activity(request):
     if not (request.user.is_superuser or request.user.is_admin):
         return Response({'detail': '⛔ Admin access required.'}, status=http_status.HTTP_403_FORBIDDEN)
 
-    commissions = ReferralCommission.objects.select_related('referrer', 'referee').order_by('-created_at')
-    
+    commissions = ReferralCommission.objects.order_by('-created_at')
+
     # Simple pagination/limit
     limit = int(request.GET.get('limit', 100))
-    serializer = ReferralCommissionSerializer(commissions[:limit], many=True)
+    serializer = ReferralCommissionSerializer(for_serializer(commissions, ReferralCommissionSerializer)[:limit], many=True)
     
     return Response({
         'count': commissions.count(),
@@ -101,28 +106,35 @@ def admin_referral_action(request):
         referrer = comm.referrer
         # Logic: Agents use balance_usdt, Standard users use referral_balance_usdt
         is_agent_like = referrer.is_admin or referrer.is_staff or getattr(referrer, 'is_agent', False)
-        balance_field = 'balance_usdt' if is_agent_like else 'referral_balance_usdt'
+        account = ledger.Account.MAIN if is_agent_like else ledger.Account.REFERRAL
+        balance_field = ledger.PROJECTIONS[account]
         
         if action == 'reject' and comm.status == 'credited':
             # REVERSE balancing
-            from django.db.models import F
-            User.objects.filter(pk=referrer.pk).update(
-                **{balance_field: F(balance_field) - comm.amount_usdt},
-                total_earned=F('total_earned') - comm.amount_usdt,
-            )
-            comm.status = 'reversed'
-            comm.save()
+            try:
+                with transaction.atomic():
+                    ledger.debit(
+                        referrer.pk, comm.amount_usdt, ledger.Kind.COMMISSION_REVERSAL,
+                        account=account, reference=f'commission:{comm.pk}',
+                    )
+                    comm.status = 'reversed'
+                    comm.save()
+            except ledger.InsufficientFunds:
+                return Response(
+                    {'detail': f'❌ Referrer no longer has ${comm.amount_usdt} in {balance_field} to reverse.'},
+                    status=http_status.HTTP_400_BAD_REQUEST,
+                )
             return Response({'detail': f'✅ Commission reversed successfully (from {balance_field}).'})
         
         elif action == 'approve' and comm.status != 'credited':
             # Manual credit correction
-            from django.db.models import F
-            User.objects.filter(pk=referrer.pk).update(
-                **{balance_field: F(balance_field) + comm.amount_usdt},
-                total_earned=F('total_earned') + comm.amount_usdt,
-            )
-            comm.status = 'credited'
-            comm.save()
+            with transaction.atomic():
+                ledger.credit(
+                    referrer.pk, comm.amount_usdt, ledger.Kind.COMMISSION,
+                    account=account, reference=f'commission:{comm.pk}',
+                )
+                comm.status = 'credited'
+                comm.save()
             return Response({'detail': f'✅ Commission credited successfully (to {balance_field}).'})
 
     except ReferralCommission.DoesNotExist:
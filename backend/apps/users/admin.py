@@ -11,7 +11,8 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.db import models
 from django.contrib import messages
-from .models import User, Notification
+from .models import AuditLog, Broadcast, EmailOutbox, User, Notification
+from .notify import build, notify, notify_many
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -62,21 +63,28 @@ class PendingAdminApplicationAdmin(admin.ModelAdmin):
         if not request.user.is_superuser:
             self.message_user(request, '⛔ Only Super Admins can approve.', level=messages.ERROR)
             return
-        updated = 0
+        approved = []
         for user in queryset.filter(admin_status='pending'):
             user.admin_status = 'approved'
             user.is_admin = True
             user.is_staff = True
             user.save()
-            # Notify the user
-            Notification.objects.create(
+            approved.append(build(
                 user=user,
                 type='system',
                 title='✅ Admin Access Granted!',
                 message='Your admin application has been approved. You can now log into the admin panel.',
                 icon='✅',
+            ))
+        # Notify the users
+        updated = notify_many(approved)
+        AuditLog.log_many(
+            AuditLog.build(
+                request.user, 'admin_approved', target=note.user, ip=request.META.get('REMOTE_ADDR'),
+                detail=f'Super Admin approved Junior Admin application for {note.user.email}',
             )
-            updated += 1
+            for note in approved
+        )
         self.message_user(request, f'✅ {updated} admin(s) approved.', level=messages.SUCCESS)
     approve_admins.short_description = '✅ Approve selected admin applications'
 
@@ -85,20 +93,27 @@ class PendingAdminApplicationAdmin(admin.ModelAdmin):
         if not request.user.is_superuser:
             self.message_user(request, '⛔ Only Super Admins can reject.', level=messages.ERROR)
             return
-        updated = 0
+        rejected = []
         for user in queryset.filter(admin_status='pending'):
             user.admin_status = 'rejected'
             user.is_admin = False
             user.is_staff = False
             user.save()
-            Notification.objects.create(
+            rejected.append(build(
                 user=user,
                 type='system',
                 title='❌ Admin Application Rejected',
                 message='Your admin application was rejected. Please contact support.',
                 icon='❌',
+            ))
+        updated = notify_many(rejected)
+        AuditLog.log_many(
+            AuditLog.build(
+                request.user, 'admin_rejected', target=note.user, ip=request.META.get('REMOTE_ADDR'),
+                detail=f'Super Admin rejected Junior Admin application for {note.user.email}',
             )
-            updated += 1
+            for note in rejected
+        )
         self.message_user(request, f'❌ {updated} application(s) rejected.', level=messages.WARNING)
     reject_admins.short_description = '❌ Reject selected admin applications'
 
@@ -111,7 +126,7 @@ class PendingAdminApplicationAdmin(admin.ModelAdmin):
             if obj.admin_status == 'approved':
                 obj.is_admin = True
                 obj.is_staff = True
-                Notification.objects.create(
+                notify(
                     user=obj,
                     type='system',
                     title='✅ Admin Access Granted!',
@@ -121,7 +136,7 @@ class PendingAdminApplicationAdmin(admin.ModelAdmin):
             elif obj.admin_status == 'rejected':
                 obj.is_admin = False
                 obj.is_staff = obj.is_agent  # Keep staff if still agent
-                Notification.objects.create(
+                notify(
                     user=obj,
                     type='system',
                     title='❌ Admin Application Rejected',
@@ -179,16 +194,35 @@ class UserAdmin(BaseUserAdmin):
         return qs.none()
 
     def get_readonly_fields(self, request, obj=None):
-        readonly = list(super().get_readonly_fields(request, obj) or [])
+        # Lifetime earnings only move with earning journals in apps.payments.ledger
+        readonly = [*(super().get_readonly_fields(request, obj) or []), 'total_earned']
         if not request.user.is_superuser:
             # Junior Admins can't touch any permission flags or financial balances
             readonly.extend([
                 'is_staff', 'is_superuser', 'is_admin', 'is_agent',
-                'admin_status', 'balance_usdt', 'balance_ngn', 'total_earned',
+                'admin_status', 'balance_usdt', 'balance_ngn',
                 'referral_code', 'referred_by', 'agent_commission_percent',
             ])
         return readonly
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            return
+        if {'tier', 'tier_expiry'} & set(form.changed_data):
+            # A hand-set plan gets an end date and a session, like an approved deposit
+            from apps.mining import plans
+            plans.grant(obj, form.cleaned_data.get('tier_expiry') if 'tier_expiry' in form.changed_data else None)
+        # Balances are ledger projections: a manual edit is posted as an adjustment
+        from apps.payments import ledger
+        targets = {
+            account: form.cleaned_data[field]
+            for account, field in ledger.PROJECTIONS.items()
+            if field in form.changed_data
+        }
+        if targets:
+            ledger.set_balances(obj.pk, targets, reference=f'admin:{request.user.pk}')
+
     def has_delete_permission(self, request, obj=None):
         # Only Super Admins can delete users
         return request.user.is_superuser
@@ -204,6 +238,7 @@ class UserAdmin(BaseUserAdmin):
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ['user_email', 'type', 'title', 'is_read', 'created_at']
+    list_select_related = ['user']
     list_filter = ['type', 'is_read', 'created_at']
     search_fields = ['user__email', 'title', 'message']
     readonly_fields = ['user', 'type', 'title', 'message', 'icon', 'created_at']
@@ -214,4 +249,67 @@ class NotificationAdmin(admin.ModelAdmin):
     user_email.short_description = 'User'
 
     def has_delete_permission(self, request, obj=None):
-        return request.user.is_superuser
\ No newline at end of file
+        return request.user.is_superuser
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Email Outbox (Super Admin only — queued messages contain live codes)
+# ─────────────────────────────────────────────────────────────────────────────
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['to_email', 'purpose', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['purpose', 'status', 'created_at']
+    search_fields = ['to_email', 'provider_id']
+    readonly_fields = [
+        'user', 'purpose', 'to_email', 'subject', 'status', 'generation', 'attempts',
+        'next_attempt_at', 'last_error', 'provider_id', 'created_at', 'sent_at',
+    ]
+    exclude = ['html', 'text']
+    ordering = ['-created_at']
+
+    def has_module_permission(self, request):
+        return request.user.is_superuser
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ['title', 'type', 'created_by', 'created_at', 'read_count']
+    list_filter = ['type', 'created_at']
+    search_fields = ['title', 'message']
+    fields = ['type', 'title', 'message', 'icon']
+    ordering = ['-created_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('created_by').annotate(read_count=models.Count('receipts'))
+
+    def read_count(self, obj):
+        return obj.read_count
+    read_count.short_description = 'Read by'
+
+    def has_module_permission(self, request):
+        return request.user.is_superuser
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def has_add_permission(self, request):
+        return request.user.is_superuser
+
+    def has_change_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
@@ -0,0 +1,38 @@
+"""
+Apex Mining - Agent payment details
+
+Deposit instructions for a user come from their nearest agent (see
+User.nearest_agent). The handful of fields involved are cached per agent so
+resolving them costs no queries on a warm cache.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+AGENT_DETAIL_FIELDS = (
+    'id', 'email', 'full_name',
+    'agent_wallet_usdt', 'agent_bank_name', 'agent_account_name',
+    'agent_account_number', 'agent_telegram_link',
+)
+_TIMEOUT = 60 * 60
+
+
+def _key(agent_id):
+    return f'users:agent-details:{agent_id}'
+
+
+def get_agent_details(agent_id):
+    """Payment details of an agent as a dict, or None if there is no agent."""
+    if agent_id is None:
+        return None
+    details = cache.get(_key(agent_id))
+    if details is None:
+        from .models import User
+        details = User.objects.filter(pk=agent_id).values(*AGENT_DETAIL_FIELDS).first()
+        if details is None:
+            return None
+        cache.set(_key(agent_id), details, _TIMEOUT)
+    return details
+
+
+def invalidate_agent_details(agent_id):
+    transaction.on_commit(lambda: cache.delete(_key(agent_id)))
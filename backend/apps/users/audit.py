@@ -0,0 +1,137 @@
+"""
+Apex Cloud Mining — Audit log hash chain
+
+Every AuditLog entry stores the previous entry's content_hash and the
+SHA-256 of its own content plus that hash. `append()` is the only writer:
+
+    SELECT ... FROM audit_chain_head WHERE id = 1 FOR UPDATE
+    INSERT INTO audit_logs ... (one row per entry, hashes already computed)
+    UPDATE audit_chain_head SET last_hash = ..., last_at = ...
+
+The head row serializes writers, so two requests can never chain onto the
+same predecessor. created_at is assigned here rather than by the database,
+strictly increasing along the chain (a microsecond apart within a batch),
+so the hash can be computed before the INSERT and created_at order is
+chain order.
+
+The head lock is held until the surrounding transaction commits; log as
+late as possible inside long transactions.
+
+`verify()` walks the chain in created_at order with a streaming cursor,
+starting from the latest AuditChainCheckpoint rather than the first entry,
+and stops at the first entry whose prev_hash or content_hash is wrong.
+"""
+from datetime import timedelta
+from typing import NamedTuple
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import AuditChainCheckpoint, AuditChainHead, AuditLog
+
+HEAD = 1
+TICK = timedelta(microseconds=1)
+VERIFY_CHUNK = 2000
+CHECKPOINT_EVERY = 10000
+
+# Everything _compute_hash() reads, plus the stored hashes
+_HASHED = ('actor_id_raw', 'actor_email', 'action', 'target_id', 'detail', 'created_at', 'prev_hash', 'content_hash')
+
+
+class Break(NamedTuple):
+    entry_id: object
+    created_at: object
+    reason: str
+
+
+class Verification(NamedTuple):
+    verified: int
+    checkpoint: object
+    broken: object
+
+
+def _lock_head():
+    head = AuditChainHead.objects.select_for_update().filter(pk=HEAD).first()
+    if head is not None:
+        return head
+    # First write (or the row was lost): continue from the newest entry
+    last = AuditLog.objects.order_by('-created_at').values('content_hash', 'created_at').first() or {}
+    try:
+        with transaction.atomic():
+            AuditChainHead.objects.create(
+                pk=HEAD, last_hash=last.get('content_hash', ''), last_at=last.get('created_at'),
+            )
+    except IntegrityError:
+        pass
+    return AuditChainHead.objects.select_for_update().get(pk=HEAD)
+
+
+def append(entries):
+    """Chain and insert unsaved AuditLog `entries`, in order. Returns them."""
+    if not entries:
+        return entries
+    with transaction.atomic(savepoint=False):
+        head = _lock_head()
+        moment = timezone.now()
+        if head.last_at and moment <= head.last_at:
+            moment = head.last_at + TICK
+
+        prev_hash = head.last_hash
+        for entry in entries:
+            entry.created_at = moment
+            entry.prev_hash = prev_hash
+            entry.content_hash = prev_hash = entry._compute_hash()
+            moment += TICK
+
+        AuditLog.objects.bulk_create(entries)
+        AuditChainHead.objects.filter(pk=HEAD).update(last_hash=prev_hash, last_at=entries[-1].created_at)
+    return entries
+
+
+def _checkpoint(run, entry, verified):
+    run = run or AuditChainCheckpoint()
+    run.last_id, run.last_at, run.last_hash = entry.pk, entry.created_at, entry.content_hash
+    run.verified = verified
+    run.save()
+    return run
+
+
+def verify(full=False, chunk_size=VERIFY_CHUNK):
+    """Check the chain past the latest checkpoint (or from the start if `full`).
+
+    Returns a Verification with the number of entries checked, the checkpoint
+    now in force and the first Break found, if any. Progress up to a break is
+    still checkpointed, so later runs report the same break until it is dealt with.
+    """
+    head = AuditChainHead.objects.filter(pk=HEAD).first()
+    checkpoint = None if full else AuditChainCheckpoint.objects.first()
+    entries = AuditLog.objects.order_by('created_at', 'id').only(*_HASHED)
+    prev_hash = ''
+
+    if checkpoint is not None:
+        anchor = entries.filter(pk=checkpoint.last_id).first()
+        if anchor is None or not checkpoint.last_hash == anchor.content_hash == anchor._compute_hash():
+            reason = 'checkpointed entry was removed' if anchor is None else 'checkpointed entry was altered'
+            return Verification(0, checkpoint, Break(checkpoint.last_id, checkpoint.last_at, reason))
+        prev_hash = checkpoint.last_hash
+        entries = entries.filter(created_at__gt=checkpoint.last_at)
+    if head is not None and head.last_at is not None:
+        # Entries up to the head are committed; anything newer waits for the next run
+        entries = entries.filter(created_at__lte=head.last_at)
+
+    run, last, verified, broken = None, None, 0, None
+    for entry in entries.iterator(chunk_size=chunk_size):
+        if entry.prev_hash != prev_hash:
+            broken = Break(entry.pk, entry.created_at, 'prev_hash does not match the previous entry')
+            break
+        if entry.content_hash != entry._compute_hash():
+            broken = Break(entry.pk, entry.created_at, 'content does not match content_hash')
+            break
+        prev_hash, last = entry.content_hash, entry
+        verified += 1
+        if verified % CHECKPOINT_EVERY == 0:
+            run = _checkpoint(run, last, verified)
+
+    if last is not None:
+        run = _checkpoint(run, last, verified)
+    if broken is None and head is not None and prev_hash != head.last_hash:
+        broken = Break(None, head.last_at, 'chain head is ahead of the newest entry; entries were removed')
+    return Verification(verified, run or checkpoint, broken)
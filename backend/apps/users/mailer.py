@@ -0,0 +1,91 @@
+"""
+Apex Cloud Mining — Email transports
+
+The outbox sender (apps.users.outbox) hands each batch of messages to a
+transport. Every transport takes a list of message dicts
+({'from', 'to', 'subject', 'html', 'text'}) and returns one provider id per
+message, or raises to have the whole batch retried.
+
+- ResendTransport: Resend's batch endpoint, up to 100 messages per call.
+- LogTransport: writes the messages to the server log. Used when
+  RESEND_API_KEY is not set, so codes can still be read from the logs.
+- FakeTransport: keeps messages in memory for tests and local runs.
+
+APEX_EMAIL_TRANSPORT (a dotted path) overrides the choice.
+"""
+import logging
+import uuid
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+RESEND_BATCH_LIMIT = 100
+
+
+class ResendTransport:
+    delivers = True
+    batch_limit = RESEND_BATCH_LIMIT
+
+    def __init__(self):
+        import resend
+
+        resend.api_key = settings.RESEND_API_KEY
+        self._resend = resend
+
+    def send_batch(self, messages, idempotency_key=None):
+        options = {'idempotency_key': idempotency_key} if idempotency_key else None
+        response = self._resend.Batch.send(messages, options)
+        return [item['id'] for item in response['data']]
+
+
+class LogTransport:
+    """Nothing is sent — the messages only reach the server log."""
+    delivers = False
+    batch_limit = RESEND_BATCH_LIMIT
+
+    def send_batch(self, messages, idempotency_key=None):
+        for message in messages:
+            logger.warning(
+                f"[NO-EMAIL-API] {message['subject']} for {', '.join(message['to'])} — NOT sent "
+                f"(RESEND_API_KEY not configured)\n{message['text']}"
+            )
+        return ['' for _ in messages]
+
+
+class FakeTransport:
+    """In-memory stand-in for Resend.
+
+    Sent messages accumulate in `FakeTransport.sent`; set `fail_with` to an
+    exception to make the next batches fail. Call `reset()` between tests.
+    """
+    delivers = True
+    batch_limit = RESEND_BATCH_LIMIT
+    sent = []
+    batches = []
+    fail_with = None
+
+    @classmethod
+    def reset(cls):
+        cls.sent = []
+        cls.batches = []
+        cls.fail_with = None
+
+    def send_batch(self, messages, idempotency_key=None):
+        if type(self).fail_with is not None:
+            raise type(self).fail_with
+        type(self).batches.append((idempotency_key, list(messages)))
+        type(self).sent.extend(messages)
+        return [f'fake-{uuid.uuid4()}' for _ in messages]
+
+
+def get_transport():
+    path = getattr(settings, 'APEX_EMAIL_TRANSPORT', None)
+    if path:
+        return import_string(path)()
+    if getattr(settings, 'RESEND_API_KEY', None):
+        try:
+            return ResendTransport()
+        except ImportError:
+            logger.error("❌ 'resend' package is not installed. Run: pip install resend")
+    return LogTransport()
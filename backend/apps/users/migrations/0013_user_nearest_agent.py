@@ -0,0 +1,20 @@
+# Generated by Django 5.1.9 on 2026-10-17 18:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_user_joined_telegram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='nearest_agent',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
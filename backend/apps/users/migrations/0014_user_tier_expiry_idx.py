@@ -0,0 +1,18 @@
+# Generated by Django 5.1.9 on 2026-10-17 18:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0013_user_nearest_agent'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('tier_expiry__isnull', False)), fields=['tier_expiry'], name='users_tier_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.9 on 2026-10-17 18:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def seed_chain_head(apps, schema_editor):
+    """Point the chain head at the newest existing entry."""
+    AuditLog = apps.get_model('users', 'AuditLog')
+    AuditChainHead = apps.get_model('users', 'AuditChainHead')
+    last = AuditLog.objects.order_by('-created_at').values('content_hash', 'created_at').first() or {}
+    AuditChainHead.objects.update_or_create(
+        pk=1, defaults={'last_hash': last.get('content_hash', ''), 'last_at': last.get('created_at')},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0017_broadcasts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditChainHead',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('last_hash', models.CharField(blank=True, max_length=64)),
+                ('last_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'audit_chain_head',
+            },
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(seed_chain_head, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.9 on 2026-10-17 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0018_audit_chain_head'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditChainCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_id', models.UUIDField()),
+                ('last_at', models.DateTimeField()),
+                ('last_hash', models.CharField(max_length=64)),
+                ('verified', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'audit_chain_checkpoints',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
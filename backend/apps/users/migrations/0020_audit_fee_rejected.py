@@ -0,0 +1,18 @@
+# Generated by Django 5.1.9 on 2026-10-17 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0019_audit_chain_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='action',
+            field=models.CharField(choices=[('admin_approved', 'Admin Application Approved'), ('admin_rejected', 'Admin Application Rejected'), ('admin_deactivated', 'Admin Deactivated'), ('admin_reactivated', 'Admin Reactivated'), ('admin_deleted', 'Admin Deleted'), ('commission_credited', 'Commission Credited'), ('commission_reversed', 'Commission Reversed'), ('referral_created', 'Referral Registered'), ('deposit_approved', 'Deposit Approved'), ('deposit_rejected', 'Deposit Rejected'), ('withdrawal_approved', 'Withdrawal Approved'), ('withdrawal_rejected', 'Withdrawal Rejected'), ('fee_approved', 'Withdrawal Fee Approved'), ('fee_rejected', 'Withdrawal Fee Rejected'), ('settings_changed', 'Global Settings Changed'), ('login', 'Admin Login')], max_length=30),
+        ),
+    ]
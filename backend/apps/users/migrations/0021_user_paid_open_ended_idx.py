@@ -0,0 +1,18 @@
+# Generated by Django 5.1.9 on 2026-10-17 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0020_audit_fee_rejected'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('tier__gt', 1), ('tier_expiry__isnull', True)), fields=['id'], name='users_paid_open_ended_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.9 on 2026-10-17 19:45
+
+from collections import defaultdict
+from datetime import timedelta
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+DEFAULT_DURATION_DAYS = 14
+
+
+def end_open_ended_plans(apps, schema_editor):
+    """Give every paid plan without a tier_expiry an end date the expiry sweep can act on."""
+    User = apps.get_model('users', 'User')
+    MiningTier = apps.get_model('mining', 'MiningTier')
+    UserMiningSession = apps.get_model('mining', 'UserMiningSession')
+
+    open_ended = User.objects.filter(tier__gt=1, tier_expiry__isnull=True)
+
+    # A running session already knows when the plan ends
+    session_end = UserMiningSession.objects.filter(
+        user=OuterRef('pk'), is_active=True, expires_at__isnull=False,
+    ).order_by('-expires_at').values('expires_at')[:1]
+    open_ended.update(tier_expiry=Subquery(session_end))
+
+    # The rest (admin grants, pre-review approvals) start a full plan from today
+    by_tier = defaultdict(list)
+    for user_id, tier in open_ended.values_list('id', 'tier'):
+        by_tier[tier].append(user_id)
+    durations = dict(MiningTier.objects.values_list('tier_number', 'duration_days'))
+    now = timezone.now()
+    for tier, user_ids in by_tier.items():
+        expiry = now + timedelta(days=durations.get(tier, DEFAULT_DURATION_DAYS))
+        User.objects.filter(id__in=user_ids).update(tier_expiry=expiry)
+        UserMiningSession.objects.filter(user_id__in=user_ids, is_active=True).update(is_active=False)
+        UserMiningSession.objects.bulk_create(
+            UserMiningSession(user_id=user_id, tier=tier, expires_at=expiry, is_active=True)
+            for user_id in user_ids
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mining', '0010_rollup_indexes'),
+        ('users', '0021_user_paid_open_ended_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='users_paid_open_ended_idx',
+        ),
+        migrations.RunPython(end_open_ended_plans, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,7 @@ Apex Mining - User Model (COMPLETE & FIXED)
 import uuid
 import random
 import string
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils import timezone
@@ -64,6 +65,17 @@ class User(AbstractBaseUser, PermissionsMixin):
         blank=True,
         related_name='referrals'
     )
+    # Closest agent/admin/superuser above this user in the referral tree —
+    # whose payment details the user deposits to. Denormalized from the
+    # referral closure; see apps.referrals.closure.recompute_nearest_agent.
+    nearest_agent = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+'
+    )
 
     # Agent/Admin System
     is_agent = models.BooleanField(default=False, verbose_name='Is Agent')
@@ -108,10 +120,43 @@ class User(AbstractBaseUser, PermissionsMixin):
         db_table = 'users'
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # Expiry queue walked by apps.mining.expiry — only rows with a plan end
+            models.Index(
+                fields=['tier_expiry'], name='users_tier_expiry_idx',
+                condition=models.Q(tier_expiry__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.email
 
+    # Projections of the payments ledger — written only by apps.payments.ledger
+    LEDGER_FIELDS = ('balance_usdt', 'referral_balance_usdt', 'balance_ngn', 'total_earned')
+
+    # Fields whose changes post_save receivers react to (referral closure etc.)
+    TRACKED_FIELDS = ('referred_by_id', 'is_agent', 'is_admin', 'is_superuser', 'tier')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def _snapshot_tracked_fields(self, update_fields=None):
+        # Deferred fields are absent from __dict__ and are not tracked
+        loaded = getattr(self, '_loaded_values', {}) if update_fields is not None else {}
+        for name in self.TRACKED_FIELDS:
+            field = name[:-3] if name.endswith('_id') else name
+            if name in self.__dict__ and (update_fields is None or {field, name} & set(update_fields)):
+                loaded[name] = self.__dict__[name]
+        self._loaded_values = loaded
+
+    def field_changed(self, name):
+        """True if `name` differs from the value loaded from (or last saved to) the DB."""
+        loaded = getattr(self, '_loaded_values', {})
+        return name in loaded and loaded[name] != getattr(self, name)
+
     def save(self, *args, **kwargs):
         if self.email:
             self.email = self.email.lower()
@@ -134,7 +179,39 @@ class User(AbstractBaseUser, PermissionsMixin):
             # have set it manually. Only the approval flow sets it automatically.
             pass
 
+        if not self._state.adding and self.field_changed('referred_by_id'):
+            self._check_referrer()
+
+        # A new user inherits their payment agent from the referrer directly;
+        # later tree or role changes are recomputed by apps.referrals.signals
+        if self._state.adding and self.referred_by_id:
+            referrer = self.referred_by
+            self.nearest_agent_id = referrer.pk if referrer.acts_as_agent else referrer.nearest_agent_id
+
+        # A plain save() of a loaded user must never write back a stale copy
+        # of a balance the ledger has moved since; balances only change
+        # through apps.payments.ledger (or an explicit update_fields).
+        if not self._state.adding and kwargs.get('update_fields') is None and not args:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.LEDGER_FIELDS and field.attname not in deferred
+            ]
+
         super().save(*args, **kwargs)
+        self._snapshot_tracked_fields(kwargs.get('update_fields'))
+
+    def clean(self):
+        super().clean()
+        if not self._state.adding:
+            self._check_referrer()
+
+    def _check_referrer(self):
+        """Refuse a referrer that would make the referral tree a cycle."""
+        if self.referred_by_id and (
+            self.referred_by_id == self.pk or self.downline_ids().filter(descendant_id=self.referred_by_id).exists()
+        ):
+            raise ValidationError({'referred_by': 'A user cannot be referred by themselves or by their own downline.'})
 
     def has_perm(self, perm, obj=None):
         if self.is_admin or self.is_staff:
@@ -148,6 +225,11 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     # ==================== PROPERTIES ====================
 
+    @property
+    def acts_as_agent(self):
+        """Agents, admins and superusers receive deposits from their downline."""
+        return self.is_agent or self.is_admin or self.is_superuser
+
     @property
     def can_withdraw_mining(self):
         """Standard mining balance withdrawal rules"""
@@ -167,24 +249,24 @@ class User(AbstractBaseUser, PermissionsMixin):
         """Referral balance withdrawal rules (no fee, but maybe a minimum)"""
         return self.referral_balance_usdt >= Decimal('10.00')
 
+    def downline_ids(self):
+        """
+        Lazy subquery of every user ID below this user in the referral tree.
+        Use as `filter(user_id__in=admin.downline_ids())` — it stays in SQL
+        as one indexed join on the referral closure table.
+        """
+        from apps.referrals.models import ReferralClosure
+        return ReferralClosure.objects.filter(ancestor_id=self.id, depth__gt=0).values('descendant_id')
+
     def get_downline_user_ids(self):
         """
         Get all user IDs in the downline tree of this user.
         """
-        downline_ids = []
-        queue = [self.id]
-        visited = {self.id}
-        
-        while queue:
-            referrals = User.objects.filter(referred_by_id__in=queue).exclude(id__in=visited)
-            if not referrals.exists():
-                break
-            curr_ids = list(referrals.values_list('id', flat=True))
-            downline_ids.extend(curr_ids)
-            visited.update(curr_ids)
-            queue = curr_ids
-            
-        return downline_ids
+        return list(self.downline_ids().values_list('descendant_id', flat=True))
+
+    def has_in_downline(self, user_id):
+        """True if `user_id` sits anywhere below this user in the referral tree."""
+        return self.downline_ids().filter(descendant_id=user_id).exists()
 
     @property
     def can_pay_withdrawal_fee(self):
@@ -258,7 +340,10 @@ class Notification(models.Model):
     ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='notifications',
+        db_index=False,  # covered by notif_user_created_idx
+    )
     type = models.CharField(max_length=50, choices=TYPES, default='system')
     title = models.CharField(max_length=200)
     message = models.TextField()
@@ -271,11 +356,58 @@ class Notification(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notif_user_created_idx'),
+            # Unread badge / mark-all-read — only the unread rows are indexed
+            models.Index(fields=['user'], name='notif_user_unread_idx', condition=models.Q(is_read=False)),
+        ]
 
     def __str__(self):
         return f'{self.user.email} - {self.title}'
 
 
+class Broadcast(models.Model):
+    """A notification for every user, stored once — see apps.users.notify.
+
+    Users see the broadcasts sent since they joined next to their own
+    notifications; reading one writes a BroadcastReceipt, so unread is the
+    absence of a receipt and nothing is written per user up front.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    type = models.CharField(max_length=50, choices=Notification.TYPES, default='system')
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    icon = models.CharField(max_length=10, default='📢')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'broadcasts'
+        ordering = ['-created_at']
+        verbose_name = 'Broadcast'
+        verbose_name_plural = 'Broadcasts'
+
+    def __str__(self):
+        return self.title
+
+
+class BroadcastReceipt(models.Model):
+    """One user has read one broadcast."""
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name='receipts')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='broadcast_receipts', db_index=False)
+    read_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'broadcast_receipts'
+        constraints = [
+            # Leads with user, so it also serves the inbox's per-user lookup
+            models.UniqueConstraint(fields=['user', 'broadcast'], name='broadcast_receipt_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} read {self.broadcast_id}'
+
+
 class EmailVerificationCode(models.Model):
     """Store 6-digit email verification codes"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='verification_codes')
@@ -287,6 +419,13 @@ class EmailVerificationCode(models.Model):
     class Meta:
         db_table = 'email_verification_codes'
         ordering = ['-created_at']
+        indexes = [
+            # OTP checks only ever look at a user's unused codes
+            models.Index(
+                fields=['user', '-created_at'], name='email_code_user_unused_idx',
+                condition=models.Q(is_used=False),
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user.email} - {self.code}'
@@ -313,6 +452,12 @@ class PasswordResetCode(models.Model):
     class Meta:
         db_table = 'password_reset_codes'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['user', '-created_at'], name='reset_code_user_unused_idx',
+                condition=models.Q(is_used=False),
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user.email} - {self.code}'
@@ -328,6 +473,63 @@ class PasswordResetCode(models.Model):
         return timezone.now() > self.expires_at
 
 
+class EmailOutbox(models.Model):
+    """Transactional email waiting for (or done with) delivery — see apps.users.outbox.
+
+    The request path only writes rows; the deliver_email_outbox task sends
+    them. At most one row per (user, purpose) is pending: a newer code
+    replaces the queued message and bumps `generation`, so a send that was
+    already in flight cannot mark the replacement as delivered.
+    """
+
+    class Purpose(models.TextChoices):
+        VERIFICATION   = 'verification',   'Email Verification'
+        PASSWORD_RESET = 'password_reset', 'Password Reset'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        SENT    = 'sent',    'Sent'
+        FAILED  = 'failed',  'Failed'
+
+    id              = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user            = models.ForeignKey(User, on_delete=models.CASCADE, related_name='email_outbox')
+    purpose         = models.CharField(max_length=20, choices=Purpose.choices)
+    to_email        = models.EmailField()
+    subject         = models.CharField(max_length=200)
+    html            = models.TextField()
+    text            = models.TextField(blank=True)
+    status          = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    generation      = models.PositiveIntegerField(default=1)
+    attempts        = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error      = models.TextField(blank=True)
+    provider_id     = models.CharField(max_length=100, blank=True)
+    created_at      = models.DateTimeField(auto_now_add=True)
+    sent_at         = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'email_outbox'
+        ordering = ['-created_at']
+        verbose_name = 'Outgoing Email'
+        verbose_name_plural = 'Email Outbox'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'purpose'], name='email_outbox_one_pending',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+        indexes = [
+            # The sender's queue: due pending rows only
+            models.Index(
+                fields=['next_attempt_at'], name='email_outbox_due_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.get_purpose_display()} → {self.to_email} [{self.status}]'
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Audit Log — Tamper-resistant, append-only activity trail
 # ─────────────────────────────────────────────────────────────────────────────
@@ -337,7 +539,8 @@ class AuditLog(models.Model):
     Security guarantees:
     - save() raises PermissionError if the record already exists (no updates)
     - delete() always raises PermissionError (no deletions)
-    - SHA-256 hash chain: each entry hashes its content + previous entry's hash
+    - SHA-256 hash chain: each entry hashes its content + previous entry's hash,
+      appended one writer at a time under the AuditChainHead lock (apps.users.audit)
     - Actor details are stored denormalized so deleting the actor doesn't erase history
     """
     ACTION_CHOICES = [
@@ -354,6 +557,7 @@ class AuditLog(models.Model):
         ('withdrawal_approved', 'Withdrawal Approved'),
         ('withdrawal_rejected', 'Withdrawal Rejected'),
         ('fee_approved',        'Withdrawal Fee Approved'),
+        ('fee_rejected',        'Withdrawal Fee Rejected'),
         ('settings_changed',    'Global Settings Changed'),
         ('login',               'Admin Login'),
     ]
@@ -376,7 +580,8 @@ class AuditLog(models.Model):
     content_hash = models.CharField(max_length=64, blank=True)
     prev_hash    = models.CharField(max_length=64, blank=True)
 
-    created_at   = models.DateTimeField(auto_now_add=True)
+    # Assigned by the chain writer before the INSERT, since it is part of the hash
+    created_at   = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = 'audit_logs'
@@ -405,30 +610,27 @@ class AuditLog(models.Model):
 
     def save(self, *args, **kwargs):
         # Immutability: block updates to existing records
-        if self.pk and AuditLog.objects.filter(pk=self.pk).exists():
+        if not self._state.adding:
             raise PermissionError("AuditLog entries are immutable.")
-        # Chain previous hash
-        last = AuditLog.objects.order_by('-created_at').first()
-        self.prev_hash = last.content_hash if last else ''
-        super().save(*args, **kwargs)
-        # Compute and store hash after save (so created_at is set)
-        self.content_hash = self._compute_hash()
-        AuditLog.objects.filter(pk=self.pk).update(content_hash=self.content_hash)
+        from .audit import append
+        append([self])
 
     def delete(self, *args, **kwargs):
         raise PermissionError("AuditLog entries cannot be deleted.")
 
-    @classmethod
-    def log(cls, actor, action, detail='', target=None, ip=None):
-        """Convenience factory. Thread-safe. Call from any view or admin action."""
+    @staticmethod
+    def _actor_role(actor):
         if actor and hasattr(actor, 'is_superuser'):
-            role = 'super_admin' if actor.is_superuser else ('junior_admin' if actor.is_admin else 'agent')
-        else:
-            role = 'system'
-        cls.objects.create(
+            return 'super_admin' if actor.is_superuser else ('junior_admin' if actor.is_admin else 'agent')
+        return 'system'
+
+    @classmethod
+    def build(cls, actor, action, detail='', target=None, ip=None):
+        """An unsaved entry for log_many()."""
+        return cls(
             actor_id_raw=actor.id if actor else None,
             actor_email=actor.email if actor else 'system',
-            actor_role=role,
+            actor_role=cls._actor_role(actor),
             target_id=getattr(target, 'id', None),
             target_email=getattr(target, 'email', ''),
             action=action,
@@ -436,6 +638,55 @@ class AuditLog(models.Model):
             ip_address=ip,
         )
 
+    @classmethod
+    def log(cls, actor, action, detail='', target=None, ip=None):
+        """Convenience factory. Thread-safe. Call from any view or admin action."""
+        from .audit import append
+        return append([cls.build(actor, action, detail, target, ip)])[0]
+
+    @classmethod
+    def log_many(cls, entries):
+        """Chain a batch of build() entries with one lock, one INSERT and one head update."""
+        from .audit import append
+        return append(list(entries))
+
+
+class AuditChainHead(models.Model):
+    """Hash and timestamp of the newest AuditLog entry — a single row.
+
+    apps.users.audit locks it (SELECT ... FOR UPDATE) to append entries, so
+    concurrent writers chain one after another instead of forking.
+    """
+    id        = models.PositiveSmallIntegerField(primary_key=True, default=1)
+    last_hash = models.CharField(max_length=64, blank=True)
+    last_at   = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'audit_chain_head'
+
+    def __str__(self):
+        return f'audit chain head {self.last_hash[:12]}'
+
+
+class AuditChainCheckpoint(models.Model):
+    """The newest AuditLog entry a verify_audit_chain run has checked.
+
+    Each run resumes from the latest checkpoint instead of rehashing the
+    whole log, and moves its own checkpoint forward as it streams.
+    """
+    last_id    = models.UUIDField()
+    last_at    = models.DateTimeField()
+    last_hash  = models.CharField(max_length=64)
+    verified   = models.PositiveIntegerField(default=0)  # entries checked by the run
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'audit_chain_checkpoints'
+        ordering = ['-id']
+
+    def __str__(self):
+        return f'verified through {self.last_at:%Y-%m-%d %H:%M:%S} ({self.last_hash[:12]})'
+
 
 class AdminInvitation(models.Model):
     """
@@ -0,0 +1,120 @@
+"""
+Apex Cloud Mining — Notification fan-out
+
+Every in-app notification goes through this module:
+
+- notify(user, ...) for a single row;
+- notify_many(notifications) bulk-inserts prepared rows (different text per
+  user), and notify_users(user_ids, ...) sends one text to many users.
+  Both take defer=True to hand the INSERTs to the `create_notifications`
+  Celery task after the transaction commits, in NOTIFY_CHUNK-row tasks.
+- broadcast(...) stores an announcement for every user once; there is no
+  per-user row until someone reads it (a BroadcastReceipt).
+
+inbox() and mark_read() serve the notification endpoints over both kinds.
+"""
+from itertools import islice
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from .models import Broadcast, BroadcastReceipt, Notification, User
+
+NOTIFY_CHUNK = 1000
+_FIELDS = ('user_id', 'type', 'title', 'message', 'icon')
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _defer(rows, text=None):
+    from .tasks import create_notifications
+
+    for chunk in _chunks(rows, NOTIFY_CHUNK):
+        transaction.on_commit(lambda chunk=chunk: create_notifications.delay(chunk, text))
+
+
+def build(user, type, title, message, icon='🔔'):
+    """An unsaved notification for notify_many(). `user` may be a User or its id."""
+    owner = {'user': user} if isinstance(user, User) else {'user_id': user}
+    return Notification(**owner, type=type, title=title, message=message, icon=icon)
+
+
+def notify(user, type, title, message, icon='🔔'):
+    """Notify one user now."""
+    return Notification.objects.create(user_id=getattr(user, 'pk', user), type=type, title=title, message=message, icon=icon)
+
+
+def notify_many(notifications, defer=False):
+    """Insert prepared notifications with bulk_create. Returns the number queued or written."""
+    notifications = list(notifications)
+    if defer:
+        _defer([{field: str(getattr(n, field)) for field in _FIELDS} for n in notifications])
+    else:
+        Notification.objects.bulk_create(notifications, batch_size=NOTIFY_CHUNK)
+    return len(notifications)
+
+
+def notify_users(user_ids, type, title, message, icon='🔔', defer=False):
+    """Send the same notification to every user in `user_ids`. Returns the number of users."""
+    text = {'type': type, 'title': title, 'message': message, 'icon': icon}
+    if defer:
+        rows = [{'user_id': str(user_id)} for user_id in user_ids]
+        _defer(rows, text)
+        return len(rows)
+    count = 0
+    for chunk in _chunks(user_ids, NOTIFY_CHUNK):
+        Notification.objects.bulk_create([Notification(user_id=user_id, **text) for user_id in chunk])
+        count += len(chunk)
+    return count
+
+
+def create_rows(rows, text=None):
+    """Insert notifications given as field dicts, each completed by `text` (the deferred half)."""
+    text = text or {}
+    Notification.objects.bulk_create([Notification(**text, **row) for row in rows], batch_size=NOTIFY_CHUNK)
+    return len(rows)
+
+
+def broadcast(title, message, type='system', icon='📢', created_by=None):
+    """Announce to every user with a single row."""
+    return Broadcast.objects.create(type=type, title=title, message=message, icon=icon, created_by=created_by)
+
+
+def _as_item(obj, is_read):
+    return {
+        'id': str(obj.id),
+        'type': obj.type,
+        'title': obj.title,
+        'message': obj.message,
+        'icon': obj.icon,
+        'is_read': is_read,
+        'created_at': obj.created_at.isoformat(),
+    }
+
+
+def inbox(user, limit=20):
+    """The user's latest notifications and broadcasts, newest first."""
+    personal = Notification.objects.filter(user=user)[:limit]
+    broadcasts = (
+        Broadcast.objects.filter(created_at__gte=user.date_joined)
+        .annotate(is_read=Exists(BroadcastReceipt.objects.filter(user=user, broadcast=OuterRef('pk'))))
+        [:limit]
+    )
+    items = [(n.created_at, _as_item(n, n.is_read)) for n in personal]
+    items += [(b.created_at, _as_item(b, b.is_read)) for b in broadcasts]
+    items.sort(key=lambda item: item[0], reverse=True)
+    return [item for _, item in items[:limit]]
+
+
+def mark_read(user, notification_id):
+    """Mark a notification or broadcast read for `user`. Returns False if neither exists."""
+    if Notification.objects.filter(id=notification_id, user=user).update(is_read=True):
+        return True
+    if not Broadcast.objects.filter(id=notification_id, created_at__gte=user.date_joined).exists():
+        return False
+    BroadcastReceipt.objects.bulk_create(
+        [BroadcastReceipt(broadcast_id=notification_id, user=user)], ignore_conflicts=True,
+    )
+    return True
@@ -0,0 +1,161 @@
+"""
+Apex Cloud Mining — Transactional email outbox
+
+Request handlers never talk to the email provider. `enqueue()` writes (or
+rewrites) the user's pending EmailOutbox row for that purpose and, once the
+transaction commits, nudges the `deliver_email_outbox` task; the same task
+also runs every minute from beat, so a lost nudge only delays a message.
+
+`deliver()` works through due rows in batches:
+
+1. claim a batch in a short transaction (SELECT ... FOR UPDATE SKIP LOCKED),
+   counting the attempt and pushing next_attempt_at out by LEASE so a
+   concurrent sender skips the rows while they are in flight;
+2. send the batch with no transaction open, under an idempotency key
+   derived from the rows' ids and generations;
+3. mark the rows sent — only if their generation is unchanged, since a
+   newer code may have replaced the message meanwhile — or reschedule them
+   with exponential backoff, giving up after APEX_EMAIL_MAX_ATTEMPTS.
+
+A failed multi-message batch is retried one message at a time before any
+row is charged a failure, so one bad address cannot hold back the rest.
+"""
+from datetime import timedelta
+import hashlib
+import logging
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from . import mailer
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+LEASE = timedelta(minutes=5)
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=1)
+RETENTION = timedelta(days=30)
+
+
+def _nudge():
+    from .tasks import deliver_email_outbox
+
+    try:
+        deliver_email_outbox.apply_async(retry=False)
+    except Exception as e:
+        # The beat schedule picks the message up within a minute
+        logger.warning(f'[Email] Could not queue outbox delivery: {e}')
+
+
+def enqueue(user, purpose, subject, html, text=''):
+    """Queue an email to `user`, replacing any message for `purpose` not yet sent."""
+    message = {
+        'to_email': user.email, 'subject': subject, 'html': html, 'text': text,
+        'attempts': 0, 'next_attempt_at': timezone.now(), 'last_error': '',
+    }
+    pending = EmailOutbox.objects.filter(user=user, purpose=purpose, status=EmailOutbox.Status.PENDING)
+    if not pending.update(generation=F('generation') + 1, **message):
+        try:
+            with transaction.atomic():
+                EmailOutbox.objects.create(user=user, purpose=purpose, **message)
+        except IntegrityError:
+            # A concurrent request queued one first
+            pending.update(generation=F('generation') + 1, **message)
+    transaction.on_commit(_nudge)
+
+
+def backoff(attempt):
+    """Delay before retrying a message that has failed `attempt` times."""
+    return min(BACKOFF_BASE * 2 ** (attempt - 1), BACKOFF_MAX)
+
+
+def _claim(now, limit):
+    with transaction.atomic():
+        rows = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailOutbox.Status.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:limit]
+        )
+        if rows:
+            EmailOutbox.objects.filter(pk__in=[row.pk for row in rows]).update(
+                attempts=F('attempts') + 1, next_attempt_at=now + LEASE,
+            )
+    for row in rows:
+        row.attempts += 1
+    return rows
+
+
+def _message(row):
+    return {
+        'from': settings.EMAIL_FROM,
+        'to': [row.to_email],
+        'subject': row.subject,
+        'html': row.html,
+        'text': row.text,
+    }
+
+
+def _idempotency_key(rows):
+    digest = hashlib.sha256(','.join(f'{row.pk}:{row.generation}' for row in rows).encode())
+    return f'outbox-{digest.hexdigest()[:48]}'
+
+
+def _current(rows):
+    """Match the claimed rows only while they still hold the message that was sent."""
+    match = Q()
+    for row in rows:
+        match |= Q(pk=row.pk, generation=row.generation)
+    return EmailOutbox.objects.filter(match, status=EmailOutbox.Status.PENDING)
+
+
+def _mark_sent(rows, provider_ids, now):
+    _current(rows).update(
+        status=EmailOutbox.Status.SENT, sent_at=now, last_error='',
+        provider_id=Case(*[When(pk=row.pk, then=Value(pid)) for row, pid in zip(rows, provider_ids)], default=Value('')),
+    )
+
+
+def _mark_failed(row, error, now):
+    if row.attempts >= settings.APEX_EMAIL_MAX_ATTEMPTS:
+        changes = {'status': EmailOutbox.Status.FAILED}
+        logger.error(f'[Email] Giving up on {row.purpose} email to {row.to_email} after {row.attempts} attempts: {error}')
+    else:
+        changes = {'next_attempt_at': now + backoff(row.attempts)}
+    _current([row]).update(last_error=str(error)[:1000], **changes)
+
+
+def _send(transport, rows, now):
+    """Send `rows` as one batch. Returns the number delivered."""
+    try:
+        provider_ids = transport.send_batch([_message(row) for row in rows], idempotency_key=_idempotency_key(rows))
+    except Exception as e:
+        if len(rows) > 1:
+            logger.warning(f'[Email] Batch of {len(rows)} failed ({e}) — retrying one by one')
+            return sum(_send(transport, [row], now) for row in rows)
+        _mark_failed(rows[0], e, now)
+        return 0
+    _mark_sent(rows, provider_ids, now)
+    return len(rows)
+
+
+def deliver(batch_size=None, now=None):
+    """Send every message due at `now`. Returns the number sent."""
+    now = now or timezone.now()
+    transport = mailer.get_transport()
+    limit = min(batch_size or settings.APEX_EMAIL_BATCH_SIZE, transport.batch_limit)
+
+    sent = 0
+    while True:
+        rows = _claim(now, limit)
+        if rows:
+            sent += _send(transport, rows, now)
+        if len(rows) < limit:
+            return sent
+
+
+def prune(now=None):
+    """Delete sent and abandoned messages older than RETENTION. Returns the number deleted."""
+    cutoff = (now or timezone.now()) - RETENTION
+    deleted, _ = EmailOutbox.objects.exclude(status=EmailOutbox.Status.PENDING).filter(created_at__lt=cutoff).delete()
+    return deleted
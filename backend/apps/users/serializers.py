@@ -34,13 +34,20 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class DashboardSerializer(serializers.ModelSerializer):
-    """Dashboard data with computed properties"""
+    """Dashboard data with computed properties.
+
+    Mining fields are derived from the loaded user by apps.mining.state, the
+    same way mining_status reports them, so an expired-but-unswept plan shows
+    as Tier 1 here too.
+    """
     can_withdraw = serializers.ReadOnlyField(source='can_withdraw_mining')
     can_withdraw_mining = serializers.ReadOnlyField()
     can_withdraw_referral = serializers.ReadOnlyField()
-    can_mine = serializers.ReadOnlyField()
-    mining_cooldown_remaining = serializers.ReadOnlyField()
-    tier_expiry_countdown = serializers.ReadOnlyField()
+    tier = serializers.SerializerMethodField()
+    tier_expiry = serializers.SerializerMethodField()
+    can_mine = serializers.SerializerMethodField()
+    mining_cooldown_remaining = serializers.SerializerMethodField()
+    tier_expiry_countdown = serializers.SerializerMethodField()
     
     class Meta:
         model = User
@@ -52,6 +59,29 @@ class DashboardSerializer(serializers.ModelSerializer):
             'can_mine', 'mining_cooldown_remaining', 'tier_expiry_countdown', 'joined_telegram'
         ]
 
+    def _mining(self, obj):
+        from apps.mining import state as mining_state
+        described = self.__dict__.setdefault('_mining_states', {})
+        if obj.pk not in described:
+            described[obj.pk] = mining_state.describe(mining_state.of(obj))
+        return described[obj.pk]
+
+    def get_tier(self, obj):
+        return self._mining(obj)['tier']
+
+    def get_tier_expiry(self, obj):
+        tier_expiry = self._mining(obj)['tier_expiry']
+        return serializers.DateTimeField().to_representation(tier_expiry) if tier_expiry else None
+
+    def get_can_mine(self, obj):
+        return self._mining(obj)['can_mine']
+
+    def get_mining_cooldown_remaining(self, obj):
+        return self._mining(obj)['remaining_seconds']
+
+    def get_tier_expiry_countdown(self, obj):
+        return self._mining(obj)['tier_expiry_countdown']
+
 
 class RegisterSerializer(serializers.Serializer):
     """Registration serializer"""
@@ -76,21 +106,19 @@ class RegisterSerializer(serializers.Serializer):
         validated_data.pop('confirm_password')
         referral_code = validated_data.pop('referral_code', None)
         
+        # Resolve the referrer up front so the user (and their referral
+        # closure rows) are written in a single save
+        referrer = None
+        if referral_code:
+            referrer = User.objects.filter(referral_code=referral_code).first()
+
         user = User.objects.create_user(
             email=validated_data['email'],
             password=validated_data['password'],
             full_name=validated_data.get('full_name', ''),
             phone=validated_data.get('phone', ''),
-            country=validated_data.get('country', 'NG')
+            country=validated_data.get('country', 'NG'),
+            referred_by=referrer,
         )
         
-        # Handle referral
-        if referral_code:
-            try:
-                referrer = User.objects.get(referral_code=referral_code)
-                user.referred_by = referrer
-                user.save()
-            except User.DoesNotExist:
-                pass
-        
         return user
\ No newline at end of file
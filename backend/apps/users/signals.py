@@ -0,0 +1,22 @@
+"""
+Apex Mining - User Signals
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .agents import AGENT_DETAIL_FIELDS, invalidate_agent_details
+
+AGENT_FLAGS = ('is_agent', 'is_admin', 'is_superuser')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_agent_details(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(AGENT_DETAIL_FIELDS + AGENT_FLAGS) & set(update_fields):
+        return
+    if instance.acts_as_agent or any(instance.field_changed(flag) for flag in AGENT_FLAGS):
+        invalidate_agent_details(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def drop_cached_agent_details(sender, instance, **kwargs):
+    invalidate_agent_details(instance.pk)
@@ -0,0 +1,63 @@
+"""
+Apex Cloud Mining — User background tasks
+
+`deliver_email_outbox` sends the verification and password reset emails
+queued by apps.users.outbox. It is nudged after every enqueue and also runs
+every minute from beat, which picks up retries once their backoff has passed
+and any message whose nudge never reached the broker.
+
+`create_notifications` writes notification fan-outs that apps.users.notify
+deferred out of the request, one chunk per task.
+
+`verify_audit_chain` checks the audit log hash chain nightly, picking up
+from the previous run's checkpoint.
+"""
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='deliver_email_outbox', ignore_result=True)
+def deliver_email_outbox():
+    """Send every due outbox message, in provider-sized batches."""
+    from apps.users import outbox
+
+    sent = outbox.deliver()
+    if sent:
+        logger.info(f'[Email] Delivered {sent} queued email(s)')
+    return sent
+
+
+@shared_task(name='prune_email_outbox')
+def prune_email_outbox():
+    """Drop delivered and abandoned outbox rows past their retention."""
+    from apps.users import outbox
+
+    deleted = outbox.prune()
+    logger.info(f'[Email] Pruned {deleted} old outbox row(s)')
+    return deleted
+
+
+@shared_task(name='create_notifications', ignore_result=True)
+def create_notifications(rows, text=None):
+    """Bulk-insert one chunk of notifications deferred by apps.users.notify."""
+    from apps.users import notify
+
+    return notify.create_rows(rows, text)
+
+
+@shared_task(name='verify_audit_chain')
+def verify_audit_chain():
+    """Verify audit log entries written since the last checkpoint."""
+    from apps.users import audit
+
+    result = audit.verify()
+    if result.broken:
+        logger.error(
+            f'[Audit] Hash chain broken at {result.broken.entry_id} '
+            f'({result.broken.created_at}): {result.broken.reason}'
+        )
+    else:
+        logger.info(f'[Audit] Verified {result.verified} new audit log entries')
+    return result.verified
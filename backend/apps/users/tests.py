@@ -1,3 +1,373 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apex_project.testing import QueryPlanMixin
+from apps.payments.models import PaymentSettings
+from . import agents, audit, notify, outbox
+from .mailer import FakeTransport
+from .models import AuditChainCheckpoint, AuditChainHead, AuditLog, Broadcast, BroadcastReceipt, EmailOutbox, EmailVerificationCode, Notification, PasswordResetCode, User
 
-# Create your tests here.
+
+class HotQueryIndexTests(QueryPlanMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='reader@example.com', password='x', full_name='Reader')
+
+    def test_notification_list_uses_user_created_index(self):
+        self.assertUsesIndex(Notification.objects.filter(user=self.user)[:20], 'notif_user_created_idx')
+
+    def test_unread_count_uses_partial_unread_index(self):
+        qs = Notification.objects.filter(user=self.user, is_read=False).order_by()
+        self.assertUsesIndex(qs, 'notif_user_unread_idx')
+
+    def test_otp_checks_use_partial_unused_indexes(self):
+        for model, index_name in (
+            (EmailVerificationCode, 'email_code_user_unused_idx'),
+            (PasswordResetCode, 'reset_code_user_unused_idx'),
+        ):
+            with self.subTest(model=model.__name__):
+                qs = model.objects.filter(user=self.user, code='123456', is_used=False).order_by('-created_at')[:1]
+                self.assertUsesIndex(qs, index_name)
+
+
+@override_settings(APEX_EMAIL_TRANSPORT='apps.users.mailer.FakeTransport', APEX_EMAIL_MAX_ATTEMPTS=2)
+class EmailOutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='reader@example.com', password='x', full_name='Reader')
+
+    def setUp(self):
+        FakeTransport.reset()
+        self.addCleanup(FakeTransport.reset)
+
+    def queue(self, user=None, purpose=EmailOutbox.Purpose.VERIFICATION, subject='Code 111111'):
+        outbox.enqueue(user or self.user, purpose, subject, f'<p>{subject}</p>', subject)
+
+    def test_request_only_enqueues(self):
+        response = APIClient().post('/api/v1/auth/request-password-reset/', {'email': self.user.email})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(FakeTransport.sent, [])
+        row = EmailOutbox.objects.get()
+        self.assertEqual((row.purpose, row.status, row.to_email), ('password_reset', 'pending', self.user.email))
+
+        self.assertEqual(outbox.deliver(), 1)
+        self.assertEqual(FakeTransport.sent[0]['to'], [self.user.email])
+        self.assertIn(PasswordResetCode.objects.get().code, FakeTransport.sent[0]['text'])
+
+    def test_new_code_replaces_pending_message(self):
+        self.queue(subject='Code 111111')
+        self.queue(subject='Code 222222')
+        self.queue(purpose=EmailOutbox.Purpose.PASSWORD_RESET)
+        self.assertEqual(EmailOutbox.objects.count(), 2)
+
+        outbox.deliver()
+        self.assertEqual(sorted(m['subject'] for m in FakeTransport.sent), ['Code 111111', 'Code 222222'])
+        self.assertEqual(len(FakeTransport.batches), 1)
+
+        # Once sent, the next code gets a fresh message
+        self.queue(subject='Code 333333')
+        self.assertEqual(EmailOutbox.objects.filter(status='pending').count(), 1)
+
+    def test_message_replaced_in_flight_is_sent_again(self):
+        self.queue(subject='Code 111111')
+        now = timezone.now()
+        claimed = outbox._claim(now, 10)
+        self.queue(subject='Code 222222')
+        outbox._send(FakeTransport(), claimed, now)
+
+        row = EmailOutbox.objects.get()
+        self.assertEqual((row.status, row.subject), ('pending', 'Code 222222'))
+        outbox.deliver()
+        self.assertEqual([m['subject'] for m in FakeTransport.sent], ['Code 111111', 'Code 222222'])
+
+    def test_failures_back_off_then_give_up(self):
+        self.queue()
+        FakeTransport.fail_with = ConnectionError('provider down')
+        now = timezone.now()
+
+        self.assertEqual(outbox.deliver(now=now), 0)
+        row = EmailOutbox.objects.get()
+        self.assertEqual((row.status, row.attempts, row.last_error), ('pending', 1, 'provider down'))
+        self.assertEqual(row.next_attempt_at, now + outbox.backoff(1))
+
+        self.assertEqual(outbox.deliver(now=now + timedelta(seconds=10)), 0)
+        self.assertEqual(EmailOutbox.objects.get().attempts, 1)
+
+        outbox.deliver(now=row.next_attempt_at)
+        self.assertEqual(EmailOutbox.objects.get().status, 'failed')
+
+    def test_bad_message_does_not_hold_back_the_batch(self):
+        other = User.objects.create_user(email='other@example.com', password='x')
+        self.queue()
+        self.queue(user=other)
+
+        class RejectsOther(FakeTransport):
+            def send_batch(self, messages, idempotency_key=None):
+                if any(m['to'] == [other.email] for m in messages):
+                    raise ValueError('invalid recipient')
+                return super().send_batch(messages, idempotency_key)
+
+        now = timezone.now()
+        self.assertEqual(outbox._send(RejectsOther(), outbox._claim(now, 10), now), 1)
+        self.assertEqual(EmailOutbox.objects.get(user=self.user).status, 'sent')
+        self.assertEqual(EmailOutbox.objects.get(user=other).attempts, 1)
+
+
+class NotifyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='reader@example.com', password='x', full_name='Reader')
+        cls.others = [User.objects.create_user(email=f'user{n}@example.com', password='x') for n in range(3)]
+
+    def test_fan_out_is_one_insert_per_chunk(self):
+        user_ids = [u.pk for u in self.others]
+        with self.assertNumQueries(1):
+            notify.notify_users(user_ids, 'system', 'Payout sent', 'Your earnings were credited.')
+        with self.assertNumQueries(1):
+            notify.notify_many(notify.build(u, 'tier', f'Hi {u.email}', 'Personal.') for u in self.others)
+        self.assertEqual(Notification.objects.filter(user__in=user_ids).count(), 6)
+
+    def test_deferred_fan_out_waits_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            notify.notify_users([u.pk for u in self.others], 'system', 'Later', 'Deferred.', defer=True)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(len(callbacks), 1)
+
+        # What the worker runs for that chunk
+        notify.create_rows([{'user_id': str(u.pk)} for u in self.others], {'type': 'system', 'title': 'Later', 'message': 'Deferred.', 'icon': '🔔'})
+        self.assertEqual(Notification.objects.filter(title='Later').count(), 3)
+
+    def test_broadcast_is_stored_once_and_read_per_user(self):
+        notify.notify(self.user, 'system', 'Personal', 'Just for you.')
+        announcement = notify.broadcast('Maintenance', 'Back in an hour.')
+        self.assertEqual(Broadcast.objects.count(), 1)
+        self.assertFalse(BroadcastReceipt.objects.exists())
+
+        items = notify.inbox(self.user)
+        self.assertEqual([(i['title'], i['is_read']) for i in items], [('Maintenance', False), ('Personal', False)])
+
+        self.assertTrue(notify.mark_read(self.user, announcement.pk))
+        self.assertTrue(notify.mark_read(self.user, announcement.pk))
+        self.assertEqual(notify.inbox(self.user)[0]['is_read'], True)
+        self.assertEqual(notify.inbox(self.others[0])[0]['is_read'], False)
+
+        # Users who join later do not inherit old announcements
+        newcomer = User.objects.create_user(email='late@example.com', password='x')
+        self.assertEqual(notify.inbox(newcomer), [])
+        self.assertFalse(notify.mark_read(newcomer, announcement.pk))
+
+
+class AuditChainTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email='super@example.com', password='x')
+        cls.user = User.objects.create_user(email='reader@example.com', password='x')
+
+    def assertChained(self):
+        prev_hash = ''
+        for entry in AuditLog.objects.order_by('created_at'):
+            self.assertEqual(entry.prev_hash, prev_hash)
+            self.assertEqual(entry.content_hash, entry._compute_hash())
+            prev_hash = entry.content_hash
+        self.assertEqual(AuditChainHead.objects.get().last_hash, prev_hash)
+
+    def test_one_entry_is_lock_insert_and_head_update(self):
+        with self.assertNumQueries(3):
+            AuditLog.log(self.admin, 'settings_changed', 'Rate updated')
+        AuditLog.log(None, 'login', target=self.user)
+        self.assertChained()
+
+    def test_log_many_chains_a_batch_in_one_insert(self):
+        AuditLog.log(self.admin, 'settings_changed', 'First')
+        with self.assertNumQueries(3):
+            entries = AuditLog.log_many(
+                AuditLog.build(self.admin, 'deposit_approved', f'Deposit {n}', target=self.user) for n in range(5)
+            )
+        self.assertEqual(len(entries), 5)
+        self.assertEqual(len({entry.created_at for entry in entries}), 5)
+        self.assertChained()
+
+    def test_entries_are_immutable(self):
+        entry = AuditLog.log(self.admin, 'settings_changed', 'Rate updated')
+        entry = AuditLog.objects.get(pk=entry.pk)
+        entry.detail = 'Edited'
+        with self.assertRaises(PermissionError):
+            entry.save()
+        with self.assertRaises(PermissionError):
+            entry.delete()
+
+    def test_missing_head_resumes_from_newest_entry(self):
+        AuditLog.log(self.admin, 'settings_changed', 'Before')
+        AuditChainHead.objects.all().delete()
+        AuditLog.log(self.admin, 'settings_changed', 'After')
+        self.assertChained()
+
+
+class AuditChainVerifyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email='super@example.com', password='x')
+
+    def log(self, count, label='Entry'):
+        return AuditLog.log_many(
+            AuditLog.build(self.admin, 'settings_changed', f'{label} {n}') for n in range(count)
+        )
+
+    def test_runs_resume_from_the_checkpoint(self):
+        entries = self.log(3)
+        result = audit.verify()
+        self.assertEqual((result.verified, result.broken), (3, None))
+        self.assertEqual(result.checkpoint.last_hash, entries[-1].content_hash)
+
+        self.assertEqual(audit.verify().verified, 0)
+        self.log(2, 'Later')
+        result = audit.verify()
+        self.assertEqual((result.verified, result.broken), (2, None))
+        self.assertEqual(AuditChainCheckpoint.objects.count(), 2)
+        self.assertEqual(audit.verify(full=True).verified, 5)
+
+    def test_reports_the_first_altered_entry(self):
+        entries = self.log(4)
+        AuditLog.objects.filter(pk=entries[1].pk).update(detail='Rewritten')
+        AuditLog.objects.filter(pk=entries[3].pk).update(detail='Also rewritten')
+
+        result = audit.verify()
+        self.assertEqual(result.verified, 1)
+        self.assertEqual(result.broken.entry_id, entries[1].pk)
+        self.assertEqual(result.checkpoint.last_id, entries[0].pk)
+        # The break is reported again until someone deals with it
+        self.assertEqual(audit.verify().broken.entry_id, entries[1].pk)
+
+    def test_detects_removed_entries(self):
+        entries = self.log(3)
+        AuditLog.objects.filter(pk=entries[1].pk).delete()
+        self.assertEqual(audit.verify().broken.entry_id, entries[2].pk)
+
+    def test_detects_entries_removed_from_the_end(self):
+        entries = self.log(3)
+        AuditLog.objects.filter(pk=entries[-1].pk).delete()
+        result = audit.verify()
+        self.assertEqual(result.verified, 2)
+        self.assertIsNone(result.broken.entry_id)
+
+    def test_detects_tampering_with_the_checkpointed_entry(self):
+        entries = self.log(2)
+        audit.verify()
+        AuditLog.objects.filter(pk=entries[-1].pk).update(detail='Rewritten')
+        with self.assertRaises(CommandError):
+            call_command('verify_audit_chain', stdout=StringIO())
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='member@example.com', password='x')
+        self.client = APIClient()
+
+    def dashboard(self):
+        # Authentication loads the user afresh on every request
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+        return self.client.get('/api/v1/auth/dashboard/').data
+
+    def test_reflects_writes_that_bypass_save(self):
+        self.assertEqual(self.dashboard()['tier'], 1)
+        expiry = timezone.now() + timedelta(days=30)
+        User.objects.filter(pk=self.user.pk).update(tier=3, tier_expiry=expiry, last_mined_at=timezone.now())
+
+        data = self.dashboard()
+        self.assertEqual(data['tier'], 3)
+        self.assertFalse(data['can_mine'])
+        self.assertFalse(data['tier_expiry_countdown']['expired'])
+
+    def test_unswept_expired_plan_shows_as_tier_one(self):
+        User.objects.filter(pk=self.user.pk).update(tier=3, tier_expiry=timezone.now() - timedelta(minutes=1))
+        data = self.dashboard()
+        self.assertEqual(data['tier'], 1)
+        self.assertIsNone(data['tier_expiry'])
+        self.assertTrue(data['tier_expiry_countdown']['expired'])
+
+
+class AgentPaymentDetailsTests(TestCase):
+    CHAIN_DEPTH = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.super = User.objects.create_user(email='super@example.com', password='x', is_superuser=True, is_staff=True)
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', password='x', referred_by=cls.super,
+            is_admin=True, admin_status='approved', agent_bank_name='Admin Bank',
+        )
+        cls.agent = User.objects.create_user(
+            email='agent@example.com', password='x', referred_by=cls.admin, is_agent=True,
+            agent_bank_name='Agent Bank', agent_wallet_usdt='T' + 'A' * 33,
+        )
+        parent = cls.agent
+        for depth in range(cls.CHAIN_DEPTH):
+            parent = User.objects.create_user(email=f'chain{depth}@example.com', password='x', referred_by=parent)
+        cls.member = User.objects.create_user(email='member@example.com', password='x', referred_by=parent)
+
+    def setUp(self):
+        cache.clear()
+        self.defaults = PaymentSettings.get_settings()
+        self.client = APIClient()
+
+    def get(self, url, user=None):
+        # Authentication loads the user afresh on every request
+        self.client.force_authenticate(User.objects.get(pk=(user or self.member).pk))
+        return self.client.get(url).data
+
+    def payment_info(self):
+        return self.get('/api/v1/auth/agent-payment-info/')
+
+    def test_deep_downline_pays_its_nearest_agent(self):
+        user = User.objects.get(pk=self.member.pk)
+        self.assertEqual(user.nearest_agent_id, self.agent.pk)
+        self.client.force_authenticate(user)
+
+        with self.assertNumQueries(1):
+            info = self.client.get('/api/v1/auth/agent-payment-info/').data
+        with self.assertNumQueries(0):
+            settings = self.client.get('/api/v1/payments/settings/').data
+
+        self.assertTrue(info['has_agent'])
+        self.assertEqual(info['agent_name'], 'agent')
+        for data in (info, settings):
+            self.assertEqual(data['bank_name'], 'Agent Bank')
+            self.assertEqual(data['usdt_wallet'], 'T' + 'A' * 33)
+            self.assertEqual(data['account_number'], self.defaults.account_number)
+
+    def test_agent_detail_change_reaches_the_downline(self):
+        self.assertEqual(self.payment_info()['bank_name'], 'Agent Bank')
+
+        self.client.force_authenticate(User.objects.get(pk=self.agent.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/v1/auth/me/', {'agent_bank_name': 'New Bank'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.payment_info()['bank_name'], 'New Bank')
+        self.assertEqual(self.get('/api/v1/payments/settings/')['bank_name'], 'New Bank')
+
+    def test_flag_change_drops_the_cached_details(self):
+        self.assertEqual(self.payment_info()['bank_name'], 'Agent Bank')
+        self.assertEqual(self.get('/api/v1/auth/agent-payment-info/', self.agent)['bank_name'], 'Admin Bank')
+        self.assertIsNotNone(cache.get(agents._key(self.admin.pk)))
+
+        agent = User.objects.get(pk=self.agent.pk)
+        agent.is_agent = False
+        with self.captureOnCommitCallbacks(execute=True):
+            agent.save(update_fields=['is_agent'])
+        self.assertIsNone(cache.get(agents._key(self.agent.pk)))
+        self.assertEqual(self.payment_info()['bank_name'], 'Admin Bank')
+
+        self.client.force_authenticate(User.objects.get(pk=self.super.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/v1/admin/reject-admin/{self.admin.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(agents._key(self.admin.pk)))
+
+        info = self.payment_info()
+        self.assertEqual(info['agent_name'], 'super')
+        self.assertEqual(info['bank_name'], self.defaults.bank_name)
@@ -10,9 +10,11 @@ from rest_framework_simplejwt.tokens import RefreshToken
 import random
 import string
 from django.utils import timezone
-from .models import User, Notification, EmailVerificationCode, PasswordResetCode
+from .agents import get_agent_details
+from .models import User, EmailVerificationCode, PasswordResetCode
+from .notify import inbox, mark_read, notify
 from .serializers import UserSerializer, RegisterSerializer, DashboardSerializer
-from .utils import send_verification_email, send_password_reset_email
+from .utils import queue_verification_email, queue_password_reset_email
 
 
 @api_view(['POST'])
@@ -34,8 +36,8 @@ def register(request):
     code = ''.join(random.choices(string.digits, k=6))
     EmailVerificationCode.objects.create(user=user, code=code)
     
-    # Send email
-    email_sent = send_verification_email(user.email, code)
+    # Queue email
+    email_sent = queue_verification_email(user, code)
     
     msg = 'Verification code sent to email' if email_sent else (
         'Account created but email could not be sent. '
@@ -146,11 +148,14 @@ def verify_email(request):
             )
             
             # Credit to referrer's referral balance
-            user.referred_by.referral_balance_usdt += bonus_amount
-            user.referred_by.save(update_fields=['referral_balance_usdt'])
+            from apps.payments import ledger
+            ledger.credit(
+                user.referred_by_id, bonus_amount, ledger.Kind.REFERRAL_BONUS,
+                account=ledger.Account.REFERRAL, reference=f'signup:{user.pk}',
+            )
             
             # Notify referrer
-            Notification.objects.create(
+            notify(
                 user=user.referred_by,
                 type='referral',
                 title='🎉 Referral Signup Bonus!',
@@ -193,7 +198,7 @@ def resend_verification(request):
         code = ''.join(random.choices(string.digits, k=6))
         EmailVerificationCode.objects.create(user=user, code=code)
         
-        email_sent = send_verification_email(user.email, code)
+        email_sent = queue_verification_email(user, code)
         
         if email_sent:
             return Response({'detail': 'New verification code sent to your email.'})
@@ -228,7 +233,7 @@ def request_password_reset(request):
         code = ''.join(random.choices(string.digits, k=6))
         PasswordResetCode.objects.create(user=user, code=code)
         
-        email_sent = send_password_reset_email(user.email, code)
+        email_sent = queue_password_reset_email(user, code)
         
         if email_sent:
             return Response({'detail': 'Password reset code sent to your email.'})
@@ -362,36 +367,20 @@ def change_password(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_notifications(request):
-    """Get user notifications"""
-    notifications = Notification.objects.filter(user=request.user)[:20]
-    
-    data = [{
-        'id': str(n.id),
-        'type': n.type,
-        'title': n.title,
-        'message': n.message,
-        'icon': n.icon,
-        'is_read': n.is_read,
-        'created_at': n.created_at.isoformat()
-    } for n in notifications]
-    
-    return Response(data)
+    """Get user notifications (own notifications and broadcasts)"""
+    return Response(inbox(request.user))
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def mark_notification_read(request, notification_id):
     """Mark notification as read"""
-    try:
-        notif = Notification.objects.get(id=notification_id, user=request.user)
-        notif.is_read = True
-        notif.save(update_fields=['is_read'])
+    if mark_read(request.user, notification_id):
         return Response({'detail': 'Marked as read'})
-    except Notification.DoesNotExist:
-        return Response(
-            {'detail': 'Notification not found'},
-            status=status.HTTP_404_NOT_FOUND
-        )
+    return Response(
+        {'detail': 'Notification not found'},
+        status=status.HTTP_404_NOT_FOUND
+    )
 
 
 @api_view(['GET'])
@@ -414,29 +403,21 @@ def agent_payment_info(request):
     }
 
     # Override with referrer details if they are an agent or admin in the upline chain
-    current = user.referred_by
-    visited = set()
-    referrer = None
-    while current and current.id not in visited:
-        visited.add(current.id)
-        if current.is_agent or current.is_admin or current.is_superuser:
-            referrer = current
-            break
-        current = current.referred_by
+    referrer = get_agent_details(user.nearest_agent_id)
 
     if referrer:
         info['has_agent'] = True
-        info['agent_name'] = referrer.full_name or referrer.email.split('@')[0]
+        info['agent_name'] = referrer['full_name'] or referrer['email'].split('@')[0]
         
         # Individual field fallbacks — if admin didn't set it, use system default
-        if referrer.agent_wallet_usdt:
-            info['usdt_wallet'] = referrer.agent_wallet_usdt
-        if referrer.agent_bank_name:
-            info['bank_name'] = referrer.agent_bank_name
-        if referrer.agent_account_name:
-            info['account_name'] = referrer.agent_account_name
-        if referrer.agent_account_number:
-            info['account_number'] = referrer.agent_account_number
+        if referrer['agent_wallet_usdt']:
+            info['usdt_wallet'] = referrer['agent_wallet_usdt']
+        if referrer['agent_bank_name']:
+            info['bank_name'] = referrer['agent_bank_name']
+        if referrer['agent_account_name']:
+            info['account_name'] = referrer['agent_account_name']
+        if referrer['agent_account_number']:
+            info['account_number'] = referrer['agent_account_number']
 
     return Response(info)
 
@@ -489,7 +470,7 @@ def apply_for_admin(request):
     invite.used_by = user
     invite.save()
 
-    Notification.objects.create(
+    notify(
         user=user,
         type='system',
         title='📩 Admin Application Submitted',
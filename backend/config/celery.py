@@ -1,7 +1,48 @@
 import os
 from celery import Celery
+from celery.schedules import crontab
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apex_project.settings')
 app = Celery('apex_project')
 app.config_from_object('django.conf:settings', namespace='CELERY')
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+# Periodic tasks (synced into django_celery_beat's DatabaseScheduler on start).
+# `distribute_daily_earnings` fans the payout out to the workers as a
+# group of `payout_shard` tasks chorded into `finalize_payout_run`.
+# `sweep_expired_plans` keeps tier downgrades out of the request path.
+# `reconcile_admin_stats` corrects any drift in the admin dashboard counters
+# and `refresh_daily_volume` keeps the volume chart rollups current.
+# `deliver_email_outbox` retries queued emails that are due again and
+# `prune_email_outbox` drops old delivered ones. `verify_audit_chain`
+# checks the audit log entries written since its last checkpoint.
+app.conf.beat_schedule = {
+    'distribute-daily-earnings': {
+        'task': 'distribute_daily_earnings',
+        'schedule': crontab(hour=0, minute=0),
+    },
+    'sweep-expired-plans': {
+        'task': 'sweep_expired_plans',
+        'schedule': crontab(minute='*/10'),
+    },
+    'reconcile-admin-stats': {
+        'task': 'reconcile_admin_stats',
+        'schedule': crontab(minute=5),
+    },
+    'refresh-daily-volume': {
+        'task': 'refresh_daily_volume',
+        'schedule': crontab(minute='*/15'),
+    },
+    'deliver-email-outbox': {
+        'task': 'deliver_email_outbox',
+        'schedule': crontab(),
+    },
+    'prune-email-outbox': {
+        'task': 'prune_email_outbox',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'verify-audit-chain': {
+        'task': 'verify_audit_chain',
+        'schedule': crontab(hour=2, minute=15),
+    },
+}
@@ -1,7 +1,7 @@
 /**
  * Apex Cloud Mining — History & Referral Pages
  */
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router';
 import { AppLayout } from '../../components/layout';
 import { PageHeader, Card, SectionTitle, EmptyState } from '../../components/ui';
@@ -139,16 +139,39 @@ export const HistoryPage = () => {
   const [activeTab, setActiveTab] = useState('all');
   const [txs, setTxs] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedTx, setSelectedTx] = useState(null);
+  const tabRef = useRef(activeTab);
 
   useEffect(() => {
+    let current = true;
+    tabRef.current = activeTab;
     setLoading(true);
+    setNextCursor(null);
     paymentsAPI.transactions(activeTab).then(({ data }) => {
+      if (!current) return;
       setTxs(data.results || []);
+      setNextCursor(data.next_cursor || null);
       setLoading(false);
     });
+    return () => { current = false; };
   }, [activeTab]);
 
+  // The endpoint returns one page at a time; older rows follow next_cursor
+  const loadMore = () => {
+    const tab = activeTab;
+    setLoadingMore(true);
+    paymentsAPI.transactions(tab, nextCursor)
+      .then(({ data }) => {
+        if (tab !== tabRef.current) return;
+        setTxs((prev) => [...prev, ...(data.results || [])]);
+        setNextCursor(data.next_cursor || null);
+      })
+      .catch(() => toast.error('Could not load older transactions'))
+      .finally(() => setLoadingMore(false));
+  };
+
   return (
     <div className="page-layout" style={{ position: 'relative', zIndex: 1 }}>
       <div className="bg-ambient" />
@@ -209,6 +232,16 @@ export const HistoryPage = () => {
                   </div>
                 </div>
               ))}
+              {nextCursor && (
+                <button onClick={loadMore} disabled={loadingMore} style={{
+                  width: '100%', padding: '14px', background: 'var(--apex-card)',
+                  border: '1px solid var(--apex-border)', borderRadius: '16px',
+                  color: 'var(--apex-text)', fontSize: '14px', fontWeight: 600,
+                  cursor: loadingMore ? 'wait' : 'pointer',
+                }}>
+                  {loadingMore ? 'Loading…' : 'Load more'}
+                </button>
+              )}
             </div>
         }
       </div>
@@ -177,8 +177,8 @@ export const paymentsAPI = {
 
   getWithdrawals: () => apiClient.get('/payments/withdrawals/'),
 
-  transactions: (type = 'all') =>
-    apiClient.get(`/payments/transactions/?type=${type}`),
+  transactions: (type = 'all', cursor = null) =>
+    apiClient.get('/payments/transactions/', { params: { type, ...(cursor && { cursor }) } }),
 
   payWithdrawalFee: (formData) =>
     apiClient.post('/payments/pay-withdrawal-fee/', formData, {